@@ -21,6 +21,8 @@ from app.models.teacher import Teacher
 from app.models.student import Student
 from app.models.time_slot import TimeSlot
 from app.models.booking import Booking
+from app.models.booking_stats import BookingStatsDaily
+from app.models.waitlist import WaitlistEntry
 
 target_metadata = BaseModel.metadata
 
@@ -0,0 +1,56 @@
+"""add composite and partial indexes for hot queries
+
+Revision ID: 3c9a5e7f1d20
+Revises: b7d41e0c5a92
+Create Date: 2026-10-17 11:40:27.905113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9a5e7f1d20'
+down_revision = 'b7d41e0c5a92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # time_slots: проверка пересечений, расписание и доступность преподавателя
+    op.create_index(
+        'ix_time_slots_teacher_start', 'time_slots', ['teacher_id', 'start_time'],
+        unique=False, postgresql_where=sa.text("is_deleted = false")
+    )
+    op.create_index(
+        'ix_time_slots_available_teacher_start', 'time_slots', ['teacher_id', 'start_time'],
+        unique=False, postgresql_where=sa.text("is_deleted = false AND status = 'AVAILABLE'")
+    )
+    op.create_index(
+        'ix_time_slots_available_start', 'time_slots', ['start_time'],
+        unique=False, postgresql_where=sa.text("is_deleted = false AND status = 'AVAILABLE'")
+    )
+    # bookings: бронирования студента, слота и фильтр по статусу
+    op.create_index(
+        'ix_bookings_student_slot', 'bookings', ['student_id', 'time_slot_id'],
+        unique=False, postgresql_where=sa.text("is_deleted = false")
+    )
+    op.create_index(
+        'ix_bookings_student_booking_time', 'bookings', ['student_id', 'booking_time'],
+        unique=False, postgresql_where=sa.text("is_deleted = false")
+    )
+    op.create_index('ix_bookings_time_slot', 'bookings', ['time_slot_id'], unique=False)
+    op.create_index(
+        'ix_bookings_status_booking_time', 'bookings', ['status', 'booking_time'],
+        unique=False, postgresql_where=sa.text("is_deleted = false")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_status_booking_time', table_name='bookings')
+    op.drop_index('ix_bookings_time_slot', table_name='bookings')
+    op.drop_index('ix_bookings_student_booking_time', table_name='bookings')
+    op.drop_index('ix_bookings_student_slot', table_name='bookings')
+    op.drop_index('ix_time_slots_available_start', table_name='time_slots')
+    op.drop_index('ix_time_slots_available_teacher_start', table_name='time_slots')
+    op.drop_index('ix_time_slots_teacher_start', table_name='time_slots')
@@ -0,0 +1,41 @@
+"""add booking_stats_daily rollup
+
+Revision ID: 6a2f8e4c9b13
+Revises: e51f0b6d8c47
+Create Date: 2026-10-17 15:12:08.604317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '6a2f8e4c9b13'
+down_revision = 'e51f0b6d8c47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('booking_stats_daily',
+    sa.Column('teacher_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', postgresql.ENUM('PENDING', 'CONFIRMED', 'CANCELLED', 'COMPLETED', name='bookingstatus', create_type=False), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['teacher_id'], ['teachers.id'], ),
+    sa.PrimaryKeyConstraint('teacher_id', 'day', 'status')
+    )
+    # Заполнение по существующим бронированиям
+    op.execute("""
+        INSERT INTO booking_stats_daily (teacher_id, day, status, count)
+        SELECT ts.teacher_id, CAST(b.booking_time AS DATE), b.status, COUNT(b.id)
+        FROM bookings b
+        JOIN time_slots ts ON ts.id = b.time_slot_id
+        WHERE b.is_deleted = false
+        GROUP BY ts.teacher_id, CAST(b.booking_time AS DATE), b.status
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('booking_stats_daily')
@@ -0,0 +1,54 @@
+"""add waitlist_entries
+
+Revision ID: 8d3b1f7a2e56
+Revises: 6a2f8e4c9b13
+Create Date: 2026-10-17 18:05:41.227190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3b1f7a2e56'
+down_revision = '6a2f8e4c9b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('waitlist_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=False), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=False), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('time_slot_id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('WAITING', 'PROMOTED', 'LEFT', name='waitliststatus'), nullable=False),
+    sa.Column('student_notes', sa.String(), nullable=True),
+    sa.Column('promoted_at', sa.DateTime(timezone=False), nullable=True),
+    sa.Column('booking_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    sa.ForeignKeyConstraint(['time_slot_id'], ['time_slots.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Очередь слота и «один раз в очереди» — только по ожидающим записям
+    op.create_index(
+        'ix_waitlist_entries_queue', 'waitlist_entries', ['time_slot_id', sa.text('priority DESC'), 'id'],
+        unique=False, postgresql_where=sa.text("status = 'WAITING' AND is_deleted = false")
+    )
+    op.create_index(
+        'uq_waitlist_entries_waiting_student', 'waitlist_entries', ['time_slot_id', 'student_id'],
+        unique=True, postgresql_where=sa.text("status = 'WAITING' AND is_deleted = false")
+    )
+    op.create_index('ix_waitlist_entries_student', 'waitlist_entries', ['student_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_waitlist_entries_student', table_name='waitlist_entries')
+    op.drop_index('uq_waitlist_entries_waiting_student', table_name='waitlist_entries')
+    op.drop_index('ix_waitlist_entries_queue', table_name='waitlist_entries')
+    op.drop_table('waitlist_entries')
+    sa.Enum(name='waitliststatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,35 @@
+"""add meeting_url_seq to teachers
+
+Revision ID: b7d41e0c5a92
+Revises: 9f6b68670c83
+Create Date: 2026-10-17 10:12:04.318220
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41e0c5a92'
+down_revision = '9f6b68670c83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('teachers', sa.Column('meeting_url_seq', sa.Integer(), nullable=False, server_default='0'))
+    # Переносим текущие максимальные номера из уже выданных ссылок
+    # (тот же шаблон '%/{slug}-%', по которому номера искались раньше)
+    op.execute("""
+        UPDATE teachers AS t
+        SET meeting_url_seq = COALESCE((
+            SELECT max(CAST(substring(ts.meeting_url FROM '-([0-9]+)$') AS INTEGER))
+            FROM time_slots AS ts
+            WHERE ts.meeting_url LIKE '%/' || t.slug || '-%'
+        ), 0)
+        WHERE t.slug IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('teachers', 'meeting_url_seq')
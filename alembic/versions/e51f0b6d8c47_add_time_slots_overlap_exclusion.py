@@ -0,0 +1,33 @@
+"""add exclusion constraint against overlapping time_slots
+
+Revision ID: e51f0b6d8c47
+Revises: 3c9a5e7f1d20
+Create Date: 2026-10-17 13:05:51.220418
+
+Перед применением убедитесь, что в таблице нет пересекающихся
+неудаленных слотов одного преподавателя, иначе ALTER TABLE упадет.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e51f0b6d8c47'
+down_revision = '3c9a5e7f1d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute("""
+        ALTER TABLE time_slots
+        ADD CONSTRAINT ex_time_slots_teacher_no_overlap
+        EXCLUDE USING gist (teacher_id WITH =, tsrange(start_time, end_time) WITH &&)
+        WHERE (NOT is_deleted)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_constraint('ex_time_slots_teacher_no_overlap', 'time_slots')
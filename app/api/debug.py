@@ -0,0 +1,93 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import get_settings
+from app.core.exceptions import DebugAccessDeniedException
+from app.core.profiling import profiler, render_collapsed, verify_profile_token
+from app.core.slow_queries import slow_query_log
+from app.core.tracing import tracer
+
+settings = get_settings()
+
+DEBUG_TOKEN_HEADER = "X-Debug-Token"
+
+
+def require_debug_token(request: Request) -> None:
+    """Доступ к /debug/*: токен в формате X-Debug-Profile, подписанный DEBUG_ENDPOINTS_SECRET"""
+    token = request.headers.get(DEBUG_TOKEN_HEADER)
+    if not token or not verify_profile_token(settings.DEBUG_ENDPOINTS_SECRET or settings.SECRET_KEY, token):
+        raise DebugAccessDeniedException()
+
+
+router = APIRouter(dependencies=[Depends(require_debug_token)])
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=500, description="Сколько отпечатков вернуть"),
+    order: str = Query("max_ms", pattern="^(max_ms|avg_ms|total_ms|count)$", description="Поле сортировки")
+):
+    """Самые медленные отпечатки SQL с момента запуска"""
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "explains_skipped": slow_query_log.explains_skipped,
+        "top": slow_query_log.top(limit, order),
+    }
+
+
+@router.get("/slow-queries/recent")
+async def get_recent_slow_queries():
+    """Последние медленные выполнения (кольцевой буфер)"""
+    return list(reversed(slow_query_log.recent))
+
+
+@router.get("/profiles")
+async def get_profiles(
+    route: Optional[str] = Query(None, description="Шаблон маршрута, например /api/v1/bookings/"),
+    limit: int = Query(50, ge=1, le=1000)
+):
+    """Последние профили запросов"""
+    profiles = list(profiler.select(route))[-limit:]
+    return [profile.as_dict() for profile in reversed(profiles)]
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: int):
+    """Профиль одного запроса в формате collapsed stacks"""
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return render_collapsed(profile.collapsed(profiler.interval))
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def get_aggregate_profile(
+    route: Optional[str] = Query(None, description="Шаблон маршрута; без него — все маршруты"),
+    window: float = Query(300, gt=0, description="Окно в секундах")
+):
+    """Сэмплы профилей за окно, слитые по маршруту (collapsed stacks)"""
+    return render_collapsed(profiler.aggregate(route, window))
+
+
+@router.get("/traces")
+async def get_slowest_traces(limit: int = Query(10, ge=1, le=100)):
+    """Самые долгие из последних трасс с деревьями спанов"""
+    return [
+        {"trace_id": trace.trace_id, "dropped_spans": trace.dropped, "root": trace.tree()}
+        for trace in tracer.slowest(limit)
+    ]
+
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Трасса по id: дерево спанов и спаны в формате OTLP"""
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {
+        "trace_id": trace.trace_id,
+        "root": trace.tree(),
+        "spans": [span.to_otlp() for span in trace.spans if span.end_ns is not None],
+    }
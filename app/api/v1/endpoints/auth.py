@@ -5,7 +5,7 @@ from app.schemas.teacher import TeacherRegister, TeacherLogin
 from app.schemas.student import StudentRegister, StudentLogin
 from app.models.teacher import Teacher
 from app.models.student import Student
-from app.core.auth import hash_password, verify_password, create_access_token, teacher_required, student_required
+from app.core.auth import hash_password_async, verify_password_async, create_access_token, teacher_required, student_required
 from sqlalchemy import select, and_
 from app.crud.teacher import teacher as teacher_crud
 from app.crud.student import student as student_crud
@@ -36,17 +36,15 @@ async def register_teacher(data: TeacherRegister, db: AsyncSession = Depends(get
     existing_slug = await db.execute(select(Teacher).where((Teacher.slug == data.slug) & (Teacher.is_deleted == False)))
     if existing_slug.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Teacher with this slug already exists")
-    teacher = Teacher(
-        name=data.name,
-        email=data.email,
-        phone=data.phone,
-        bio=data.bio,
-        slug=data.slug,
-        password_hash=hash_password(data.password)
-    )
-    db.add(teacher)
+    teacher = await teacher_crud.insert_row(db, {
+        "name": data.name,
+        "email": data.email,
+        "phone": data.phone,
+        "bio": data.bio,
+        "slug": data.slug,
+        "password_hash": await hash_password_async(data.password)
+    })
     await db.commit()
-    await db.refresh(teacher)
     token = create_access_token({"sub": str(teacher.id), "role": "teacher", "slug": teacher.slug, "email": teacher.email})
     return {"access_token": token, "token_type": "bearer"}
 
@@ -58,7 +56,7 @@ async def login_teacher(data: TeacherLogin, db: AsyncSession = Depends(get_db)):
     )
     result = await db.execute(query)
     teacher = result.scalar_one_or_none()
-    if not teacher or not teacher.password_hash or not verify_password(data.password, teacher.password_hash):
+    if not teacher or not teacher.password_hash or not await verify_password_async(data.password, teacher.password_hash):
         raise HTTPException(status_code=401, detail="Неверные данные для входа")
     token = create_access_token({"sub": str(teacher.id), "role": "teacher", "slug": teacher.slug, "email": teacher.email})
     return {"access_token": token, "token_type": "bearer"}
@@ -72,16 +70,14 @@ async def register_student(data: StudentRegister, db: AsyncSession = Depends(get
     existing_slug = await db.execute(select(Student).where((Student.slug == data.slug) & (Student.is_deleted == False)))
     if existing_slug.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Студент с таким slug уже существует")
-    student = Student(
-        name=data.name,
-        email=data.email,
-        phone=data.phone,
-        slug=data.slug,
-        password_hash=hash_password(data.password)
-    )
-    db.add(student)
+    student = await student_crud.insert_row(db, {
+        "name": data.name,
+        "email": data.email,
+        "phone": data.phone,
+        "slug": data.slug,
+        "password_hash": await hash_password_async(data.password)
+    })
     await db.commit()
-    await db.refresh(student)
     token = create_access_token({"sub": str(student.id), "role": "student", "slug": student.slug, "email": student.email})
     return {"access_token": token, "token_type": "bearer"}
 
@@ -93,7 +89,7 @@ async def login_student(data: StudentLogin, db: AsyncSession = Depends(get_db)):
     )
     result = await db.execute(query)
     student = result.scalar_one_or_none()
-    if not student or not student.password_hash or not verify_password(data.password, student.password_hash):
+    if not student or not student.password_hash or not await verify_password_async(data.password, student.password_hash):
         raise HTTPException(status_code=401, detail="Неверные данные для входа")
     token = create_access_token({"sub": str(student.id), "role": "student", "slug": student.slug, "email": student.email})
     return {"access_token": token, "token_type": "bearer"}
@@ -106,9 +102,9 @@ async def change_teacher_password(
 ):
     teacher_id = int(current["sub"])
     db_teacher = await teacher_crud.get(db, teacher_id)
-    if not db_teacher or not db_teacher.password_hash or not verify_password(data.old_password, db_teacher.password_hash):
+    if not db_teacher or not db_teacher.password_hash or not await verify_password_async(data.old_password, db_teacher.password_hash):
         raise HTTPException(status_code=400, detail="Старый пароль неверен")
-    db_teacher.password_hash = hash_password(data.new_password)
+    db_teacher.password_hash = await hash_password_async(data.new_password)
     await db.commit()
     return {"message": "Пароль успешно изменён"}
 
@@ -120,8 +116,8 @@ async def change_student_password(
 ):
     student_id = int(current["sub"])
     db_student = await student_crud.get(db, student_id)
-    if not db_student or not db_student.password_hash or not verify_password(data.old_password, db_student.password_hash):
+    if not db_student or not db_student.password_hash or not await verify_password_async(data.old_password, db_student.password_hash):
         raise HTTPException(status_code=400, detail="Старый пароль неверен")
-    db_student.password_hash = hash_password(data.new_password)
+    db_student.password_hash = await hash_password_async(data.new_password)
     await db.commit()
     return {"message": "Пароль успешно изменён"} 
\ No newline at end of file
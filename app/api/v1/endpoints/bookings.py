@@ -1,55 +1,80 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_db, get_pagination_params
-from app.crud import booking, time_slot
+from app.core.dependencies import get_db, get_read_db, get_pagination_params
+from app.core.conditional import ConditionalRoute, check_list_version, entity_etag
+from app.core.serialization import fast_response
+from app.core.query_budget import query_budget
+from app.crud import booking, student
 from app.schemas.booking import (
     BookingCreate, BookingUpdate, BookingResponse, BookingWithDetails,
-    BookingConfirm, BookingCancel
+    BookingConfirm, BookingCancel, BookingBatchCreate, BookingBatchResponse, BatchBookingMode,
+    BookingBulkTransition, BookingBulkResponse, TeacherBookingRow
 )
 from app.schemas.base import PaginationParams, PaginatedResponse
 from app.models.booking import BookingStatus
+from app.core.config import get_settings
+from app.core.export import ExportFormat, export_response
+from app.core.ical import CalendarEvent, calendar_feed, render_calendar
 from app.core.exceptions import (
     SlotNotFoundException, SlotAlreadyBookedException,
-    BookingNotFoundException, BookingAlreadyConfirmedException
+    BookingNotFoundException, BookingAlreadyConfirmedException, StudentNotFoundException
 )
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalRoute)
 
 
 @router.get("/", response_model=PaginatedResponse)
 async def get_bookings(
+    request: Request,
     pagination: PaginationParams = Depends(get_pagination_params),
     status: Optional[BookingStatus] = Query(None, description="Статус бронирования"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить список бронирований"""
     filters = {}
     if status:
         filters['status'] = status
 
+    await check_list_version(request, db, booking, filters)
     result = await booking.get_multi(db, pagination, filters)
     return result
 
 
-@router.get("/{booking_id:int}", response_model=BookingResponse)
+@router.get("/export", response_class=StreamingResponse)
+async def export_bookings(
+    status: Optional[BookingStatus] = Query(None, description="Статус бронирования"),
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="Формат выгрузки"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Выгрузить бронирования потоком (NDJSON или CSV)"""
+    batches = booking.stream_batches(
+        db, {"status": status}, batch_size=get_settings().EXPORT_BATCH_SIZE
+    )
+    return export_response(batches, booking.export_columns, format, "bookings")
+
+
+@router.get("/{booking_id:int}", response_model=BookingResponse,
+             dependencies=[Depends(entity_etag(booking, "booking_id", get_read_db))])
+@query_budget(2)
 async def get_booking(
     booking_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить бронирование по ID"""
     db_booking = await booking.get(db, booking_id)
     if not db_booking:
         raise HTTPException(status_code=404, detail="Booking not found")
-    return db_booking
+    return fast_response(BookingResponse, db_booking)
 
 
 @router.get("/{booking_id:int}/details", response_model=BookingWithDetails)
 async def get_booking_with_details(
     booking_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить бронирование с деталями"""
     db_booking = await booking.get_with_details(db, booking_id)
@@ -59,26 +84,15 @@ async def get_booking_with_details(
 
 
 @router.post("/", response_model=BookingResponse)
+@query_budget(4)
 async def create_booking(
     booking_in: BookingCreate,
     db: AsyncSession = Depends(get_db)
 ):
     """Создать бронирование"""
     try:
-        # Проверяем, что слот существует и доступен
-        db_slot = await time_slot.get(db, booking_in.time_slot_id)
-        if not db_slot:
-            raise SlotNotFoundException("Slot not found")
-
-        if not db_slot.is_available:
-            raise SlotAlreadyBookedException("Slot is not available")
-
-        # Создаем бронирование
+        # Проверка слота, бронирование и увеличение current_bookings — одна транзакция
         db_booking = await booking.create_booking(db, booking_in)
-
-        # Обновляем слот (увеличиваем current_bookings)
-        await time_slot.book_slot(db, booking_in.time_slot_id)
-
         return db_booking
     except (SlotNotFoundException, SlotAlreadyBookedException) as e:
         raise HTTPException(status_code=409, detail=str(e))
@@ -86,7 +100,25 @@ async def create_booking(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/batch", response_model=BookingBatchResponse)
+@query_budget(5)
+async def create_bookings_batch(
+    batch_in: BookingBatchCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Забронировать несколько слотов одной транзакцией.
+
+    В режиме all_or_nothing при любой ошибке ничего не бронируется
+    и возвращается 409 с результатами по каждому слоту.
+    """
+    result = await booking.create_bookings_batch(db, batch_in)
+    if batch_in.mode == BatchBookingMode.ALL_OR_NOTHING and result.failed:
+        raise HTTPException(status_code=409, detail=result.model_dump(mode="json"))
+    return result
+
+
 @router.post("/{booking_id:int}/confirm", response_model=BookingResponse)
+@query_budget(3)
 async def confirm_booking(
     booking_id: int,
     confirm_data: BookingConfirm,
@@ -103,6 +135,7 @@ async def confirm_booking(
 
 
 @router.post("/{booking_id:int}/cancel", response_model=BookingResponse)
+@query_budget(5)
 async def cancel_booking(
     booking_id: int,
     cancel_data: BookingCancel,
@@ -110,21 +143,22 @@ async def cancel_booking(
 ):
     """Отменить бронирование"""
     try:
+        # Отмена и передача места листу ожидания (или освобождение) — одна транзакция
         db_booking = await booking.cancel_booking(
             db, booking_id, cancel_data.reason
         )
-
-        # Обновляем слот (уменьшаем current_bookings)
-        await time_slot.unbook_slot(db, db_booking.time_slot_id)
-
         return db_booking
     except BookingNotFoundException as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except HTTPException:
+        # Отказы условного перехода (409) отдаются как есть
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/{booking_id:int}/complete", response_model=BookingResponse)
+@query_budget(3)
 async def complete_booking(
     booking_id: int,
     complete_data: BookingConfirm,
@@ -138,34 +172,129 @@ async def complete_booking(
         return db_booking
     except BookingNotFoundException as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except HTTPException:
+        # Отказы условного перехода (409) отдаются как есть
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/teacher/{teacher_id}/bookings", response_model=List[BookingResponse])
+@router.post("/bulk/confirm", response_model=BookingBulkResponse)
+@query_budget(3)
+async def confirm_bookings_bulk(
+    bulk_in: BookingBulkTransition,
+    db: AsyncSession = Depends(get_db)
+):
+    """Подтвердить ожидающие бронирования: по списку id, слоту или дню преподавателя"""
+    return await booking.transition_bookings(db, bulk_in, BookingStatus.CONFIRMED)
+
+
+@router.post("/bulk/complete", response_model=BookingBulkResponse)
+@query_budget(3)
+async def complete_bookings_bulk(
+    bulk_in: BookingBulkTransition,
+    db: AsyncSession = Depends(get_db)
+):
+    """Завершить подтвержденные бронирования: по списку id, слоту или дню преподавателя"""
+    return await booking.transition_bookings(db, bulk_in, BookingStatus.COMPLETED)
+
+
+@router.post("/bulk/cancel", response_model=BookingBulkResponse)
+@query_budget(6)
+async def cancel_bookings_bulk(
+    bulk_in: BookingBulkTransition,
+    db: AsyncSession = Depends(get_db)
+):
+    """Отменить бронирования: по списку id, слоту или дню преподавателя.
+
+    Освободившиеся места переходят головам листов ожидания слотов,
+    остаток освобождается.
+    """
+    return await booking.transition_bookings(db, bulk_in, BookingStatus.CANCELLED)
+
+
+@router.get(
+    "/teacher/{teacher_id}/bookings",
+    response_model=Union[List[BookingResponse], List[TeacherBookingRow]]
+)
+@query_budget(1)
 async def get_teacher_bookings(
     teacher_id: int,
+    response: Response,
     start_date: Optional[datetime] = Query(None, description="Начальная дата"),
     end_date: Optional[datetime] = Query(None, description="Конечная дата"),
     status: Optional[BookingStatus] = Query(None, description="Статус бронирования"),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Курсор страницы (пустое значение — первая страница)"),
+    size: int = Query(100, ge=1, le=1000, description="Размер страницы в режиме курсора"),
+    flat: bool = Query(False, description="Плоские строки со временем слота и именем студента"),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Получить бронирования преподавателя"""
-    bookings = await booking.get_teacher_bookings(
-        db, teacher_id, start_date, end_date, status
+    """Получить бронирования преподавателя.
+
+    С параметром cursor выдается страница, курсор следующей — в заголовке X-Next-Cursor.
+    """
+    bookings, next_cursor = await booking.get_teacher_bookings(
+        db, teacher_id, start_date, end_date, status,
+        cursor=cursor, size=size if cursor is not None else None, flat=flat
     )
-    return bookings
+    result = fast_response(TeacherBookingRow if flat else BookingResponse, bookings)
+    if next_cursor:
+        # Заголовки параметра response не переносятся на возвращенный Response
+        target = result if isinstance(result, Response) else response
+        target.headers["X-Next-Cursor"] = next_cursor
+    return result
 
 
 @router.get("/student/{student_id}/bookings", response_model=List[BookingResponse])
+@query_budget(4)
 async def get_student_bookings(
     student_id: int,
     status: Optional[BookingStatus] = Query(None, description="Статус бронирования"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить бронирования студента"""
     bookings = await booking.get_student_bookings(db, student_id, status)
-    return bookings
+    return fast_response(BookingResponse, bookings)
+
+
+ICS_STATUSES = {
+    BookingStatus.PENDING: "TENTATIVE",
+    BookingStatus.CONFIRMED: "CONFIRMED",
+    BookingStatus.COMPLETED: "CONFIRMED",
+    BookingStatus.CANCELLED: "CANCELLED",
+}
+
+
+@router.get("/student/{student_id}/bookings.ics", response_class=Response)
+async def get_student_bookings_feed(
+    student_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Бронирования студента в формате iCalendar (подписка с условным GET)"""
+    version = await booking.get_student_bookings_version(db, student_id)
+    if version is None:
+        raise StudentNotFoundException()
+
+    async def render(stamp: datetime) -> bytes:
+        owner = await student.get(db, student_id)
+        bookings = await booking.get_student_bookings(db, student_id)
+        events = (
+            CalendarEvent(
+                uid=f"booking-{item.id}@schedule-service",
+                start=item.time_slot.start_time,
+                end=item.time_slot.end_time,
+                summary=f"Занятие: {item.time_slot.teacher.name}",
+                description=item.time_slot.description,
+                url=item.time_slot.meeting_url,
+                status=ICS_STATUSES[item.status],
+                last_modified=item.updated_at
+            )
+            for item in bookings
+        )
+        return render_calendar(f"Занятия: {owner.name}", events, stamp)
+
+    return await calendar_feed(request, f"student-bookings:{student_id}", version, render)
 
 
 @router.get("/stats", response_model=dict)
@@ -173,7 +302,7 @@ async def get_booking_stats(
     teacher_id: Optional[int] = Query(None, description="ID преподавателя"),
     start_date: Optional[datetime] = Query(None, description="Начальная дата"),
     end_date: Optional[datetime] = Query(None, description="Конечная дата"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить статистику бронирований"""
     stats = await booking.get_booking_stats(db, teacher_id, start_date, end_date)
@@ -1,38 +1,67 @@
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_db, get_pagination_params
-from app.crud import time_slot
+from app.core.dependencies import get_db, get_read_db, get_pagination_params
+from app.core.conditional import ConditionalRoute, check_list_version, entity_etag
+from app.core.serialization import fast_response
+from app.core.query_budget import query_budget
+from app.crud import teacher, time_slot
 from app.schemas.time_slot import (
     TimeSlotCreate, TimeSlotUpdate, TimeSlotResponse, TimeSlotWithDetails,
     BulkSlotCreate
 )
 from app.schemas.base import PaginationParams, PaginatedResponse
-from app.core.exceptions import SlotOverlapException
+from app.core.config import get_settings
+from app.core.exceptions import SlotOverlapException, TeacherNotFoundException
+from app.core.export import ExportFormat, export_response
+from app.core.ical import CalendarEvent, calendar_feed, render_calendar
+from app.models.time_slot import SlotStatus
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalRoute)
 
 
 @router.get("/", response_model=PaginatedResponse)
+@query_budget(3)
 async def get_slots(
+    request: Request,
     pagination: PaginationParams = Depends(get_pagination_params),
     teacher_id: Optional[int] = Query(None, description="ID преподавателя"),
     start_date: Optional[datetime] = Query(None, description="Начальная дата"),
     end_date: Optional[datetime] = Query(None, description="Конечная дата"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить список всех слотов"""
     filters = {}
     if teacher_id:
         filters['teacher_id'] = teacher_id
 
+    await check_list_version(request, db, time_slot, filters)
     result = await time_slot.get_multi(db, pagination, filters)
     return result
 
 
+@router.get("/export", response_class=StreamingResponse)
+async def export_slots(
+    teacher_id: Optional[int] = Query(None, description="ID преподавателя"),
+    start_date: Optional[datetime] = Query(None, description="Начальная дата"),
+    end_date: Optional[datetime] = Query(None, description="Конечная дата"),
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="Формат выгрузки"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Выгрузить слоты потоком (NDJSON или CSV)"""
+    batches = time_slot.stream_slots(
+        db, teacher_id, start_date, end_date, batch_size=get_settings().EXPORT_BATCH_SIZE
+    )
+    return export_response(batches, time_slot.export_columns, format, "slots")
+
+
+# Доступность читается с primary: кэш сбрасывается при записи, и загрузка
+# с отстающей реплики сохранила бы в него старые данные до конца TTL
 @router.get("/available", response_model=List[TimeSlotResponse])
+@query_budget(1)
 async def get_available_slots(
     teacher_id: Optional[int] = Query(None, description="ID преподавателя"),
     start_date: Optional[datetime] = Query(None, description="Начальная дата"),
@@ -40,26 +69,28 @@ async def get_available_slots(
     db: AsyncSession = Depends(get_db)
 ):
     """Получить доступные слоты"""
-    slots = await time_slot.get_available_slots(db, teacher_id, start_date, end_date)
-    return slots
+    slots = await time_slot.get_available_slots_cached(db, teacher_id, start_date, end_date)
+    return fast_response(TimeSlotResponse, slots)
 
 
-@router.get("/{slot_id}", response_model=TimeSlotResponse)
+@router.get("/{slot_id}", response_model=TimeSlotResponse,
+             dependencies=[Depends(entity_etag(time_slot, "slot_id", get_read_db))])
+@query_budget(2)
 async def get_slot(
     slot_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить слот по ID"""
     db_slot = await time_slot.get(db, slot_id)
     if not db_slot:
         raise HTTPException(status_code=404, detail="Slot not found")
-    return db_slot
+    return fast_response(TimeSlotResponse, db_slot)
 
 
 @router.get("/{slot_id}/details", response_model=TimeSlotWithDetails)
 async def get_slot_with_details(
     slot_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить слот с деталями (учитель и бронирования)"""
     db_slot = await time_slot.get_with_details(db, slot_id)
@@ -69,6 +100,7 @@ async def get_slot_with_details(
 
 
 @router.post("/", response_model=TimeSlotResponse)
+@query_budget(3)
 async def create_slot(
     slot_in: TimeSlotCreate,
     db: AsyncSession = Depends(get_db)
@@ -81,7 +113,17 @@ async def create_slot(
         raise HTTPException(status_code=409, detail=str(e))
 
 
+@router.post("/bulk", response_model=List[TimeSlotResponse])
+async def bulk_create_slots(
+    bulk_in: BulkSlotCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Массово создать слоты по расписанию (диапазон дат, окно времени, дни недели)"""
+    return await time_slot.bulk_create(db, bulk_in)
+
+
 @router.put("/{slot_id}", response_model=TimeSlotResponse)
+@query_budget(2)
 async def update_slot(
     slot_id: int,
     slot_update: TimeSlotUpdate,
@@ -92,23 +134,16 @@ async def update_slot(
     if not db_slot:
         raise HTTPException(status_code=404, detail="Slot not found")
 
-    # Проверяем пересечение при обновлении времени
-    if slot_update.start_time or slot_update.end_time:
-        start_time = slot_update.start_time or db_slot.start_time
-        end_time = slot_update.end_time or db_slot.end_time
-
-        has_overlap = await time_slot.check_slot_overlap(
-            db, db_slot.teacher_id, start_time, end_time, exclude_slot_id=slot_id
-        )
-
-        if has_overlap:
-            raise HTTPException(status_code=409, detail="Slot overlaps with existing slot")
-
-    updated_slot = await time_slot.update(db, db_slot, slot_update)
+    # Пересечение при изменении времени проверяется при обновлении
+    try:
+        updated_slot = await time_slot.update_with_overlap_check(db, db_slot, slot_update)
+    except SlotOverlapException as e:
+        raise HTTPException(status_code=409, detail=str(e))
     return updated_slot
 
 
 @router.delete("/{slot_id}")
+@query_budget(2)
 async def delete_slot(
     slot_id: int,
     db: AsyncSession = Depends(get_db)
@@ -132,15 +167,48 @@ async def delete_slot(
 
 
 @router.get("/teacher/{teacher_id}/schedule", response_model=List[TimeSlotResponse])
+@query_budget(2)
 async def get_teacher_schedule(
     teacher_id: int,
     start_date: Optional[datetime] = Query(None, description="Начальная дата"),
     end_date: Optional[datetime] = Query(None, description="Конечная дата"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить расписание преподавателя"""
     schedule = await time_slot.get_teacher_schedule(db, teacher_id, start_date, end_date)
-    return schedule
+    return fast_response(TimeSlotResponse, schedule)
+
+
+@router.get("/teacher/{teacher_id}/schedule.ics", response_class=Response)
+async def get_teacher_schedule_feed(
+    teacher_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Расписание преподавателя в формате iCalendar (подписка с условным GET)"""
+    version = await time_slot.get_schedule_version(db, teacher_id)
+    if version is None:
+        raise TeacherNotFoundException()
+
+    async def render(stamp: datetime) -> bytes:
+        owner = await teacher.get(db, teacher_id)
+        slots = await time_slot.get_teacher_schedule(db, teacher_id)
+        events = (
+            CalendarEvent(
+                uid=f"slot-{slot.id}@schedule-service",
+                start=slot.start_time,
+                end=slot.end_time,
+                summary=slot.description or "Занятие",
+                description=f"Записано: {slot.current_bookings} из {slot.max_students}",
+                url=slot.meeting_url,
+                status="CANCELLED" if slot.status == SlotStatus.CANCELLED else "CONFIRMED",
+                last_modified=slot.updated_at
+            )
+            for slot in slots
+        )
+        return render_calendar(f"Расписание: {owner.name}", events, stamp)
+
+    return await calendar_feed(request, f"teacher-schedule:{teacher_id}", version, render)
 
 
 @router.get("/teacher/{teacher_id}/availability", response_model=List[TimeSlotResponse])
@@ -151,5 +219,5 @@ async def get_teacher_availability(
     db: AsyncSession = Depends(get_db)
 ):
     """Получить доступность преподавателя"""
-    available_slots = await time_slot.get_available_slots(db, teacher_id, start_date, end_date)
-    return available_slots
+    available_slots = await time_slot.get_available_slots_cached(db, teacher_id, start_date, end_date)
+    return fast_response(TimeSlotResponse, available_slots)
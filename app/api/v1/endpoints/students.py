@@ -1,18 +1,23 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.dependencies import get_db, get_pagination_params
+from app.core.conditional import ConditionalRoute, check_list_version, entity_etag
+from app.core.serialization import fast_response
+from app.core.query_budget import query_budget
 from app.core.auth import student_required
 from app.crud import student
 from app.schemas.student import StudentCreate, StudentUpdate, StudentResponse, StudentWithBookings
 from app.schemas.base import PaginationParams, PaginatedResponse
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalRoute)
 
 
 @router.get("/", response_model=PaginatedResponse)
+@query_budget(3)
 async def get_students(
+    request: Request,
     pagination: PaginationParams = Depends(get_pagination_params),
     is_active: Optional[bool] = Query(None, description="Фильтр по активности"),
     db: AsyncSession = Depends(get_db)
@@ -22,6 +27,7 @@ async def get_students(
     if is_active is not None:
         filters['is_active'] = is_active
 
+    await check_list_version(request, db, student, filters)
     result = await student.get_multi(db, pagination, filters)
     return result
 
@@ -35,10 +41,12 @@ async def get_current_student(
     db_student = await student.get(db, student_id)
     if not db_student:
         raise HTTPException(status_code=404, detail="Student not found")
-    return db_student
+    return fast_response(StudentResponse, db_student)
 
 
-@router.get("/{student_id}", response_model=StudentResponse)
+@router.get("/{student_id}", response_model=StudentResponse,
+             dependencies=[Depends(entity_etag(student, "student_id"))])
+@query_budget(2)
 async def get_student(
     student_id: int,
     db: AsyncSession = Depends(get_db)
@@ -47,7 +55,7 @@ async def get_student(
     db_student = await student.get(db, student_id)
     if not db_student:
         raise HTTPException(status_code=404, detail="Student not found")
-    return db_student
+    return fast_response(StudentResponse, db_student)
 
 
 @router.get("/{student_id}/with-bookings", response_model=StudentWithBookings)
@@ -63,26 +71,25 @@ async def get_student_with_bookings(
 
 
 @router.post("/", response_model=StudentResponse)
+@query_budget(2)
 async def create_student(
     student_in: StudentCreate,
     db: AsyncSession = Depends(get_db)
 ):
     """Создать студента"""
-    # Проверяем, что email уникален
-    existing_student = await student.get_by_email(db, student_in.email)
-    if existing_student:
+    # Проверяем, что email и slug уникальны (один запрос)
+    taken = await student.get_taken(db, {"email": student_in.email, "slug": student_in.slug})
+    if "email" in taken:
         raise HTTPException(status_code=400, detail="Student with this email already exists")
-    # Проверяем, что slug уникален
-    if student_in.slug:
-        existing_slug = await student.get_by_slug(db, student_in.slug)
-        if existing_slug:
-            raise HTTPException(status_code=400, detail="Student with this slug already exists")
+    if "slug" in taken:
+        raise HTTPException(status_code=400, detail="Student with this slug already exists")
 
     db_student = await student.create(db, student_in)
     return db_student
 
 
 @router.put("/{student_id}", response_model=StudentResponse)
+@query_budget(3)
 async def update_student(
     student_id: int,
     student_update: StudentUpdate,
@@ -93,16 +100,16 @@ async def update_student(
     if not db_student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    # Проверяем email на уникальность, если он изменяется
-    if student_update.email and student_update.email != db_student.email:
-        existing_student = await student.get_by_email(db, student_update.email)
-        if existing_student:
-            raise HTTPException(status_code=400, detail="Student with this email already exists")
-    # Проверяем slug на уникальность, если он изменяется
-    if student_update.slug and student_update.slug != db_student.slug:
-        existing_slug = await student.get_by_slug(db, student_update.slug)
-        if existing_slug:
-            raise HTTPException(status_code=400, detail="Student with this slug already exists")
+    # Проверяем email и slug на уникальность, если они изменяются (один запрос)
+    changed = {
+        name: value for name, value in (("email", student_update.email), ("slug", student_update.slug))
+        if value and value != getattr(db_student, name)
+    }
+    taken = await student.get_taken(db, changed, exclude_id=student_id)
+    if "email" in taken:
+        raise HTTPException(status_code=400, detail="Student with this email already exists")
+    if "slug" in taken:
+        raise HTTPException(status_code=400, detail="Student with this slug already exists")
 
     updated_student = await student.update(db, db_student, student_update)
     return updated_student
@@ -133,4 +140,4 @@ async def get_active_students(
 ):
     """Получить список активных студентов"""
     students = await student.get_active_students(db)
-    return students
+    return fast_response(StudentResponse, students)
@@ -1,18 +1,23 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.dependencies import get_db, get_pagination_params
+from app.core.conditional import ConditionalRoute, check_list_version, entity_etag
+from app.core.serialization import fast_response
+from app.core.query_budget import query_budget
 from app.crud import teacher
 from app.schemas.teacher import TeacherCreate, TeacherUpdate, TeacherResponse, TeacherWithSlots
 from app.schemas.base import PaginationParams, PaginatedResponse
 from app.core.auth import teacher_required
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalRoute)
 
 
 @router.get("/", response_model=PaginatedResponse)
+@query_budget(3)
 async def get_teachers(
+    request: Request,
     pagination: PaginationParams = Depends(get_pagination_params),
     is_active: Optional[bool] = Query(None, description="Фильтр по активности"),
     db: AsyncSession = Depends(get_db)
@@ -22,6 +27,7 @@ async def get_teachers(
     if is_active is not None:
         filters['is_active'] = is_active
 
+    await check_list_version(request, db, teacher, filters)
     result = await teacher.get_multi(db, pagination, filters)
     return result
 
@@ -35,10 +41,12 @@ async def get_my_profile(
     db_teacher = await teacher.get(db, teacher_id)
     if not db_teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
-    return db_teacher
+    return fast_response(TeacherResponse, db_teacher)
 
 
-@router.get("/{teacher_id}", response_model=TeacherResponse)
+@router.get("/{teacher_id}", response_model=TeacherResponse,
+             dependencies=[Depends(entity_etag(teacher, "teacher_id"))])
+@query_budget(2)
 async def get_teacher(
     teacher_id: int,
     db: AsyncSession = Depends(get_db)
@@ -47,7 +55,7 @@ async def get_teacher(
     db_teacher = await teacher.get(db, teacher_id)
     if not db_teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
-    return db_teacher
+    return fast_response(TeacherResponse, db_teacher)
 
 
 @router.get("/{teacher_id}/with-slots", response_model=TeacherWithSlots)
@@ -63,18 +71,17 @@ async def get_teacher_with_slots(
 
 
 @router.post("/", response_model=TeacherResponse)
+@query_budget(2)
 async def create_teacher(
     teacher_in: TeacherCreate,
     db: AsyncSession = Depends(get_db)
 ):
     """Создать преподавателя"""
-    # Проверяем, что email уникален
-    existing_teacher = await teacher.get_by_email(db, teacher_in.email)
-    if existing_teacher:
+    # Проверяем, что email и slug уникальны (один запрос)
+    taken = await teacher.get_taken(db, {"email": teacher_in.email, "slug": teacher_in.slug})
+    if "email" in taken:
         raise HTTPException(status_code=400, detail="Teacher with this email already exists")
-    # Проверяем, что slug уникален
-    existing_slug = await teacher.get_by_slug(db, teacher_in.slug)
-    if existing_slug:
+    if "slug" in taken:
         raise HTTPException(status_code=400, detail="Teacher with this slug already exists")
 
     db_teacher = await teacher.create(db, teacher_in)
@@ -82,6 +89,7 @@ async def create_teacher(
 
 
 @router.put("/{teacher_id}", response_model=TeacherResponse)
+@query_budget(3)
 async def update_teacher(
     teacher_id: int,
     teacher_update: TeacherUpdate,
@@ -92,16 +100,16 @@ async def update_teacher(
     if not db_teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
 
-    # Проверяем email на уникальность, если он изменяется
-    if teacher_update.email and teacher_update.email != db_teacher.email:
-        existing_teacher = await teacher.get_by_email(db, teacher_update.email)
-        if existing_teacher:
-            raise HTTPException(status_code=400, detail="Teacher with this email already exists")
-    # Проверяем slug на уникальность, если он изменяется
-    if teacher_update.slug and teacher_update.slug != db_teacher.slug:
-        existing_slug = await teacher.get_by_slug(db, teacher_update.slug)
-        if existing_slug:
-            raise HTTPException(status_code=400, detail="Teacher with this slug already exists")
+    # Проверяем email и slug на уникальность, если они изменяются (один запрос)
+    changed = {
+        name: value for name, value in (("email", teacher_update.email), ("slug", teacher_update.slug))
+        if value and value != getattr(db_teacher, name)
+    }
+    taken = await teacher.get_taken(db, changed, exclude_id=teacher_id)
+    if "email" in taken:
+        raise HTTPException(status_code=400, detail="Teacher with this email already exists")
+    if "slug" in taken:
+        raise HTTPException(status_code=400, detail="Teacher with this slug already exists")
 
     updated_teacher = await teacher.update(db, db_teacher, teacher_update)
     return updated_teacher
@@ -132,4 +140,4 @@ async def get_active_teachers(
 ):
     """Получить список активных преподавателей"""
     teachers = await teacher.get_active_teachers(db)
-    return teachers
+    return fast_response(TeacherResponse, teachers)
@@ -0,0 +1,69 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.dependencies import get_db, get_read_db
+from app.core.conditional import ConditionalRoute
+from app.core.query_budget import query_budget
+from app.crud import waitlist
+from app.models.waitlist import WaitlistEntry, WaitlistStatus
+from app.schemas.waitlist import WaitlistJoin, WaitlistEntryResponse
+
+router = APIRouter(route_class=ConditionalRoute)
+
+
+def entry_response(entry: WaitlistEntry, position: Optional[int]) -> WaitlistEntryResponse:
+    response = WaitlistEntryResponse.model_validate(entry)
+    response.position = position
+    return response
+
+
+@router.post("/", response_model=WaitlistEntryResponse)
+@query_budget(2)
+async def join_waitlist(
+    entry_in: WaitlistJoin,
+    db: AsyncSession = Depends(get_db)
+):
+    """Встать в лист ожидания заполненного слота.
+
+    Когда место освободится (отмена бронирования), запись продвигается
+    в бронирование PENDING автоматически; его id — в поле booking_id.
+    """
+    entry, position = await waitlist.join(db, entry_in)
+    return entry_response(entry, position)
+
+
+@router.get("/{entry_id:int}", response_model=WaitlistEntryResponse)
+@query_budget(1)
+async def get_waitlist_entry(
+    entry_id: int,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Получить запись: статус, место в очереди и бронирование после продвижения"""
+    result = await waitlist.get_with_position(db, entry_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+    return entry_response(*result)
+
+
+@router.delete("/{entry_id:int}", response_model=WaitlistEntryResponse)
+@query_budget(1)
+async def leave_waitlist(
+    entry_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Покинуть лист ожидания"""
+    entry = await waitlist.leave(db, entry_id)
+    return entry_response(entry, None)
+
+
+@router.get("/student/{student_id}", response_model=List[WaitlistEntryResponse])
+@query_budget(1)
+async def get_student_waitlist(
+    student_id: int,
+    status: Optional[WaitlistStatus] = Query(None, description="Статус записи"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Записи студента в листах ожидания с местами в очередях"""
+    entries = await waitlist.get_student_entries(db, student_id, status)
+    return [entry_response(entry, position) for entry, position in entries]
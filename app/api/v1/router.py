@@ -4,7 +4,8 @@ from app.api.v1.endpoints import (
     teachers_router,
     students_router,
     slots_router,
-    bookings_router
+    bookings_router,
+    waitlist_router
 )
 from app.api.v1.endpoints.auth import router as auth_router
 
@@ -35,6 +36,12 @@ api_router.include_router(
     tags=["bookings"]
 )
 
+api_router.include_router(
+    waitlist_router,
+    prefix="/waitlist",
+    tags=["waitlist"]
+)
+
 api_router.include_router(
     auth_router,
     prefix="/auth",
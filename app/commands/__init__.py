@@ -0,0 +1 @@
+"""Служебные команды: python -m app.commands.<name>"""
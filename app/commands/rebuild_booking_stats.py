@@ -0,0 +1,23 @@
+"""Пересборка роллапа booking_stats_daily по таблице bookings.
+
+    python -m app.commands.rebuild_booking_stats
+"""
+import asyncio
+import logging
+
+from app.core.database import async_session_maker, close_db
+from app.crud.booking_stats import booking_stats
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    async with async_session_maker() as db:
+        rows = await booking_stats.rebuild(db)
+    await close_db()
+    logger.info("booking_stats_daily rebuilt: %s rows", rows)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,13 +1,27 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
 from app.core.config import get_settings
+from app.core.exceptions import PasswordHasherBusyException
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
 # Пароли
 
 def hash_password(password: str) -> str:
@@ -16,6 +30,75 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+
+class PasswordHasher:
+    """Выполняет bcrypt на выделенном пуле, не блокируя event loop.
+
+    workers=0 — считать прямо в event loop (прежнее поведение).
+    Если задач в работе и в очереди уже max_pending, новые отклоняются с 503.
+    """
+
+    def __init__(self, workers: int, max_pending: int, use_processes: bool = False):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                # spawn: дочерние процессы не наследуют потоки и соединения event loop
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        if self.workers <= 0:
+            return func(*args)
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusyException()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def create_password_hasher() -> PasswordHasher:
+    settings = get_settings()
+    return PasswordHasher(
+        workers=settings.PASSWORD_HASH_WORKERS,
+        max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+        use_processes=settings.PASSWORD_HASH_USE_PROCESSES
+    )
+
+
+password_hasher = create_password_hasher()
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
+
 # JWT
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -26,14 +109,123 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def decode_access_token(token: str) -> dict:
-    settings = get_settings()
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def decode_hs256(token: str, secret: str) -> dict:
+    """Проверить HS256-токен одним HMAC без python-jose.
+
+    Проверки те же, что у jwt.decode без audience: подпись, exp, nbf и
+    отсутствие aud. При любой ошибке возвращает {}.
+    """
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        header_segment, payload_segment, signature_segment = token.split(".")
+        header = json.loads(_b64url_decode(header_segment))
+        if header.get("alg") != "HS256":
+            return {}
+        expected = hmac.new(
+            secret.encode(), f"{header_segment}.{payload_segment}".encode(), hashlib.sha256
+        ).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature_segment)):
+            return {}
+        payload = json.loads(_b64url_decode(payload_segment))
+    except (ValueError, TypeError, binascii.Error):
+        return {}
+    if not isinstance(payload, dict) or "aud" in payload:
+        return {}
+    now = time.time()
+    try:
+        if "exp" in payload and int(payload["exp"]) < now:
+            return {}
+        if "nbf" in payload and int(payload["nbf"]) > now:
+            return {}
+    except (ValueError, TypeError):
+        return {}
+    return payload
+
+
+class TokenCache:
+    """Потокобезопасный LRU-кэш проверенных токенов.
+
+    Ключ — sha256 токена; запись живет не дольше exp токена,
+    токены без exp не кэшируются.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def set(self, token: str, payload: dict) -> None:
+        try:
+            expires_at = float(payload["exp"])
+        except (KeyError, ValueError, TypeError):
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, dict(payload))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+
+token_cache = TokenCache(get_settings().JWT_CACHE_SIZE)
+
+def _verify_token(token: str, settings) -> dict:
+    if settings.JWT_FAST_HS256 and settings.ALGORITHM == "HS256":
+        return decode_hs256(token, settings.SECRET_KEY)
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
         return {}
 
+def decode_access_token(token: str) -> dict:
+    settings = get_settings()
+    if not settings.JWT_CACHE_ENABLED:
+        return _verify_token(token, settings)
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = _verify_token(token, settings)
+        if payload:
+            token_cache.set(token, payload)
+    return payload
+
 security = HTTPBearer()
 
 def get_current_user(required_role: Optional[str] = None):
@@ -0,0 +1,272 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import get_settings
+
+# Окно запроса доступности: (start_date, end_date), None — без ограничения
+Window = Tuple[Optional[datetime], Optional[datetime]]
+# Интервал слота: (start_time, end_time)
+Interval = Tuple[datetime, datetime]
+
+ALL_TEACHERS = "*"
+
+
+class LRUCache:
+    """LRU-кэш байтовых значений с TTL и бюджетом памяти"""
+
+    def __init__(self, max_bytes: int, on_evict: Optional[Callable[[str], None]] = None):
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.size_bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            self.pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.pop(key)
+        if len(value) > self.max_bytes:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self.size_bytes += len(value)
+        while self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self.pop(oldest)
+            self.evictions += 1
+            if self.on_evict:
+                self.on_evict(oldest)
+
+    def pop(self, key: str) -> Optional[bytes]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.size_bytes -= len(entry[0])
+        return entry[0]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size_bytes = 0
+
+
+def _window_key(teacher_key: str, window: Window) -> str:
+    start, end = (dt.isoformat() if dt else "-" for dt in window)
+    return f"avail|{teacher_key}|{start}|{end}"
+
+
+def _parse_window_key(key: str) -> Window:
+    _, _, start, end = key.split("|")
+    return tuple(None if part == "-" else datetime.fromisoformat(part) for part in (start, end))
+
+
+def _window_is_stale(key: str, intervals: List[Interval]) -> bool:
+    """Попадает ли хотя бы один слот в окно ключа (те же условия, что в get_available_slots)"""
+    window_start, window_end = _parse_window_key(key)
+    return any(
+        (window_start is None or start_time >= window_start) and
+        (window_end is None or end_time <= window_end)
+        for start_time, end_time in intervals
+    )
+
+
+class CacheBackend(ABC):
+    """Хранилище кэша доступности"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, teacher_key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate(self, teacher_key: str, intervals: List[Interval]) -> int:
+        """Удалить записи преподавателя, в окна которых попадают слоты; вернуть их число"""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Кэш в памяти процесса: TTL, LRU-вытеснение по бюджету байт"""
+
+    def __init__(self, max_bytes: int):
+        self._cache = LRUCache(max_bytes, on_evict=self._forget)
+        self._by_teacher: Dict[str, Set[str]] = {}
+
+    def _forget(self, key: str) -> None:
+        teacher_key = key.split("|", 2)[1]
+        keys = self._by_teacher.get(teacher_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_teacher[teacher_key]
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self._cache.get(key)
+        if value is None:
+            self._forget(key)
+        return value
+
+    async def set(self, key: str, teacher_key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value, ttl)
+        if key in self._cache:
+            self._by_teacher.setdefault(teacher_key, set()).add(key)
+
+    async def invalidate(self, teacher_key: str, intervals: List[Interval]) -> int:
+        removed = 0
+        for key in list(self._by_teacher.get(teacher_key, ())):
+            if _window_is_stale(key, intervals):
+                self._cache.pop(key)
+                self._forget(key)
+                removed += 1
+        return removed
+
+    async def clear(self) -> None:
+        self._cache.clear()
+        self._by_teacher.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._cache),
+            "bytes": self._cache.size_bytes,
+            "max_bytes": self._cache.max_bytes,
+            "evictions": self._cache.evictions,
+        }
+
+
+class RedisCacheBackend(CacheBackend):
+    """Кэш в Redis (или любом клиенте с тем же протоколом).
+
+    Для каждого преподавателя ведется множество ключей его окон, по которому
+    выполняется точечная инвалидация; вытеснение — политикой maxmemory Redis.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def _index_key(teacher_key: str) -> str:
+        return f"avail-idx|{teacher_key}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, teacher_key: str, value: bytes, ttl: float) -> None:
+        ttl_ms = int(ttl * 1000)
+        index_key = self._index_key(teacher_key)
+        await self.client.set(key, value, px=ttl_ms)
+        await self.client.sadd(index_key, key)
+        await self.client.pexpire(index_key, ttl_ms)
+
+    async def invalidate(self, teacher_key: str, intervals: List[Interval]) -> int:
+        index_key = self._index_key(teacher_key)
+        keys = [
+            key.decode() if isinstance(key, bytes) else key
+            for key in await self.client.smembers(index_key)
+        ]
+        stale = [key for key in keys if _window_is_stale(key, intervals)]
+        if stale:
+            await self.client.delete(*stale)
+            await self.client.srem(index_key, *stale)
+        return len(stale)
+
+    async def clear(self) -> None:
+        await self.client.flushdb()
+
+
+class AvailabilityCache:
+    """Кэш ответов /slots/available по преподавателю и окну времени.
+
+    Инвалидируется CRUDTimeSlot после каждого изменения слотов: удаляются
+    только окна этого преподавателя (и общие окна), в которые попадает слот.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get_or_load(
+        self,
+        teacher_id: Optional[int],
+        window: Window,
+        loader: Callable[[], Awaitable[List[dict]]]
+    ) -> List[dict]:
+        """Вернуть закэшированный список слотов или загрузить и сохранить его"""
+        if not self.enabled:
+            return await loader()
+
+        teacher_key = str(teacher_id) if teacher_id else ALL_TEACHERS
+        key = _window_key(teacher_key, window)
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return json.loads(cached)
+
+        self.misses += 1
+        items = await loader()
+        await self.backend.set(key, teacher_key, json.dumps(items).encode(), self.ttl)
+        return items
+
+    async def invalidate(self, teacher_id: int, intervals: List[Interval]) -> None:
+        """Сбросить окна преподавателя и общие окна, в которые попадают слоты"""
+        if not self.enabled or not intervals:
+            return
+        for teacher_key in (str(teacher_id), ALL_TEACHERS):
+            self.invalidations += await self.backend.invalidate(teacher_key, intervals)
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            **self.backend.stats(),
+        }
+
+
+def create_availability_cache() -> AvailabilityCache:
+    settings = get_settings()
+    if settings.AVAILABILITY_CACHE_BACKEND == "redis":
+        # redis не входит в обязательные зависимости
+        import redis.asyncio as redis
+        backend = RedisCacheBackend(redis.from_url(settings.AVAILABILITY_CACHE_REDIS_URL))
+    else:
+        backend = MemoryCacheBackend(settings.AVAILABILITY_CACHE_MAX_BYTES)
+    return AvailabilityCache(
+        backend,
+        ttl=settings.AVAILABILITY_CACHE_TTL_SECONDS,
+        enabled=settings.AVAILABILITY_CACHE_ENABLED
+    )
+
+
+availability_cache = create_availability_cache()
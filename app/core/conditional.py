@@ -0,0 +1,160 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Depends, Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.dependencies import get_db
+from app.core.exceptions import NotModifiedException
+
+settings = get_settings()
+
+
+def make_etag(*parts: Any) -> str:
+    """Сильный ETag из версии ресурса"""
+    digest = hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def body_etag(body: bytes) -> str:
+    """Сильный ETag по байтам тела ответа"""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def http_date(value: datetime) -> str:
+    """Дата в формате HTTP; наивные datetime считаются UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def _parse_http_date(value: str) -> Optional[datetime]:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Условный GET (RFC 9110): If-None-Match важнее If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        # Слабое сравнение: W/"x" совпадает с "x"
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    since = _parse_http_date(if_modified_since)
+    if since is None:
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # В HTTP-дате нет долей секунды
+    return last_modified.replace(microsecond=0) <= since
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+
+def check_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> None:
+    """Запомнить валидаторы ответа; 304, если у клиента актуальная версия.
+
+    Вызывается до загрузки и сериализации данных. Заголовки на ответ 200
+    ставит ConditionalRoute.
+    """
+    request.state.etag = etag
+    request.state.last_modified = last_modified
+    if is_not_modified(request, etag, last_modified):
+        raise NotModifiedException(validator_headers(etag, last_modified))
+
+
+def entity_etag(crud, param: str, get_session: Callable = get_db) -> Callable:
+    """Зависимость условного GET объекта: ETag из id и updated_at.
+
+    Версия читается отдельным запросом по первичному ключу; если объекта
+    нет, решение (404) остается за обработчиком. get_session — та же
+    зависимость сессии, что у обработчика (версия и данные из одной базы).
+    """
+    async def dependency(request: Request, db: AsyncSession = Depends(get_session)) -> None:
+        if not settings.CONDITIONAL_GET_ENABLED:
+            return
+        try:
+            object_id = int(request.path_params[param])
+        except (KeyError, ValueError):
+            return
+        version = await crud.get_version(db, object_id)
+        if version is not None:
+            check_not_modified(
+                request, make_etag(crud.model.__tablename__, object_id, version.isoformat()), version
+            )
+
+    return dependency
+
+
+async def check_list_version(request: Request, db: AsyncSession, crud, filters: dict = None) -> None:
+    """Условный GET списка: ETag из агрегата версии и строки запроса (страница, курсор)"""
+    if not settings.CONDITIONAL_GET_ENABLED:
+        return
+    last_modified, count = await crud.get_list_version(db, filters)
+    etag = make_etag(
+        crud.model.__tablename__, request.url.query,
+        last_modified.isoformat() if last_modified else "-", count
+    )
+    check_not_modified(request, etag, last_modified)
+
+
+class ConditionalRoute(APIRoute):
+    """Маршрут, отдающий GET-ответы с ETag.
+
+    Если обработчик объявил версию (entity_etag, check_list_version), ETag
+    берется из нее и 304 отдается до запроса данных. Иначе, при hash_body,
+    ETag считается по готовому телу: экономится трафик, но не работа сервера.
+    Подключается на роутер: APIRouter(route_class=ConditionalRoute).
+    """
+    hash_body: bool = True
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        if "GET" not in self.methods:
+            return handler
+
+        async def conditional_handler(request: Request) -> Response:
+            response = await handler(request)
+            if (
+                not settings.CONDITIONAL_GET_ENABLED
+                or response.status_code != 200
+                or "etag" in response.headers
+            ):
+                return response
+
+            etag = getattr(request.state, "etag", None)
+            last_modified = getattr(request.state, "last_modified", None)
+            if etag is None:
+                # У StreamingResponse нет body — потоковые ответы не трогаем
+                body = getattr(response, "body", None)
+                if not self.hash_body or body is None:
+                    return response
+                etag = body_etag(body)
+                if is_not_modified(request, etag):
+                    return not_modified_response(etag)
+            response.headers.update(validator_headers(etag, last_modified))
+            return response
+
+        return conditional_handler
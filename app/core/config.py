@@ -17,21 +17,91 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = 20
     DB_ECHO: bool = False
 
+    # Read replicas
+    DATABASE_REPLICA_URLS: List[str] = []
+    DB_REPLICA_STRATEGY: str = "round_robin"  # round_robin | least_connections
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_HEALTH_INTERVAL_SECONDS: float = 5.0
+    READ_YOUR_WRITES_SECONDS: int = 5
+
     # Application settings
     APP_NAME: str = "Schedule Microservice"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = True
     API_V1_STR: str = "/api/v1"
     SERVER_URL: str = "https://176.108.252.210:8443"
+    BULK_SLOTS_MAX: int = 1000
+    BOOKING_BATCH_MAX: int = 100
+    BOOKING_BULK_MAX: int = 500
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Availability cache settings
+    AVAILABILITY_CACHE_ENABLED: bool = True
+    AVAILABILITY_CACHE_BACKEND: str = "memory"  # memory | redis
+    AVAILABILITY_CACHE_TTL_SECONDS: float = 30.0
+    AVAILABILITY_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    AVAILABILITY_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Fast JSON responses (orjson, no response_model re-validation), opt-in
+    FAST_JSON_RESPONSES: bool = False
+
+    # Conditional GET (ETag / If-None-Match)
+    CONDITIONAL_GET_ENABLED: bool = True
+
+    # iCalendar feed settings
+    ICS_CACHE_MAX_BYTES: int = 8 * 1024 * 1024
+    ICS_CACHE_TTL_SECONDS: float = 3600.0
+
+    # Metrics (/metrics, Prometheus text format)
+    METRICS_ENABLED: bool = True
+    METRICS_MAX_FINGERPRINTS: int = 500
+    QUERY_N_PLUS_ONE_THRESHOLD: int = 5  # повторов одной формы SQL за запрос
+
+    # Slow query log
+    SLOW_QUERY_THRESHOLD_MS: float = 500.0  # 0 — выключено
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_EXPLAIN_PER_MINUTE: int = 10
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = 600.0  # повторный план того же отпечатка
+    SLOW_QUERY_BUFFER_SIZE: int = 200
+
+    # Debug endpoints (/debug/*), off by default; requests need a signed X-Debug-Token
+    DEBUG_ENDPOINTS_ENABLED: bool = False
+    DEBUG_ENDPOINTS_SECRET: str = ""  # ключ подписи X-Debug-Token; пусто — SECRET_KEY
+
+    # Sampling profiler (SIGPROF), off by default
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: int = 0  # профилировать 1 из N запросов; 0 — только по заголовку
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_SECRET: str = ""  # ключ подписи X-Debug-Profile; пусто — SECRET_KEY
+    PROFILING_BUFFER_SIZE: int = 1000
+
+    # Tracing (OTLP-compatible spans, in-memory ring / JSON lines)
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 1.0  # доля трассируемых запросов
+    TRACING_BUFFER_SIZE: int = 500  # законченные трассы в памяти
+    TRACING_EXPORT_PATH: str = ""  # JSON-lines файл; пусто — только память
+    TRACING_MAX_SPANS: int = 1000  # спанов на трассу
 
     # Security settings
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PASSWORD_HASH_WORKERS: int = 4  # 0 — хэшировать в event loop
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_USE_PROCESSES: bool = False
+    JWT_CACHE_ENABLED: bool = True
+    JWT_CACHE_SIZE: int = 10000
+    JWT_FAST_HS256: bool = False  # проверять HS256 через hmac вместо python-jose
 
     # CORS settings
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8080"]
 
+    @validator("DATABASE_REPLICA_URLS", pre=True)
+    def assemble_replica_urls(cls, v):
+        if isinstance(v, str):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v
+
     @validator("BACKEND_CORS_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v):
         if isinstance(v, str):
@@ -1,8 +1,19 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import asyncio
+import itertools
+import logging
+from typing import AsyncGenerator, List, Optional
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import text
+from sqlalchemy.engine import make_url
 
 from app.core.config import get_settings
+from app.core.metrics import instrument_engine, instrumented_pool, registry
+from app.core.tracing import TracedAsyncSession
+
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
@@ -13,13 +24,15 @@ engine = create_async_engine(
     pool_size=settings.DB_POOL_SIZE,
     max_overflow=settings.DB_MAX_OVERFLOW,
     pool_pre_ping=True,
-    pool_recycle=3600
+    pool_recycle=3600,
+    poolclass=instrumented_pool("primary")
 )
+instrument_engine(engine, "primary")
 
 # Создаем фабрику сессий
 async_session_maker = async_sessionmaker(
     engine,
-    class_=AsyncSession,
+    class_=TracedAsyncSession,
     expire_on_commit=False
 )
 
@@ -35,6 +48,160 @@ async def get_async_session() -> AsyncSession:
             await session.close()
 
 
+# Отставание реплики PostgreSQL в секундах; 0, если реплика догнала primary
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    """Реплика для чтения: движок, состояние здоровья и нагрузка"""
+
+    def __init__(self, url: str, engine: Optional[AsyncEngine] = None):
+        self.url = url
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = engine or create_async_engine(
+            url,
+            echo=settings.DB_ECHO,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+            poolclass=instrumented_pool(self.name)
+        )
+        instrument_engine(self.engine, self.name)
+        self.session_maker = async_sessionmaker(self.engine, class_=TracedAsyncSession, expire_on_commit=False)
+        self.healthy = True
+        self.lag = 0.0
+        self.active = 0  # открытые сессии
+
+    def __repr__(self) -> str:
+        return f"Replica({self.name})"
+
+
+class ReplicaRouter:
+    """Выбор реплики для чтения.
+
+    Реплика участвует в выборе, пока здорова и отстает не больше max_lag;
+    иначе чтение уходит на primary (choose возвращает None). Здоровье
+    обновляет фоновая проверка, а ошибка соединения в сессии исключает
+    реплику до следующей успешной проверки.
+    """
+
+    def __init__(
+        self,
+        replicas: List[Replica],
+        strategy: str = "round_robin",
+        max_lag: float = 5.0,
+        health_interval: float = 5.0
+    ):
+        self.replicas = replicas
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.health_interval = health_interval
+        self._counter = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[Replica]:
+        candidates = [
+            replica for replica in self.replicas
+            if replica.healthy and replica.lag <= self.max_lag
+        ]
+        if not candidates:
+            return None
+        # Сдвиг по кругу: при равной нагрузке реплики чередуются
+        offset = next(self._counter) % len(candidates)
+        if self.strategy == "least_connections":
+            rotated = candidates[offset:] + candidates[:offset]
+            return min(rotated, key=lambda replica: replica.active)
+        return candidates[offset]
+
+    def eject(self, replica: Replica, reason: str) -> None:
+        if replica.healthy:
+            logger.warning(f"{replica} ejected: {reason}")
+        replica.healthy = False
+
+    async def check(self, replica: Replica) -> None:
+        """Проверить соединение и отставание реплики"""
+        try:
+            async with replica.engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    replica.lag = float(await conn.scalar(REPLICA_LAG_SQL))
+                else:
+                    await conn.execute(text("SELECT 1"))
+                    replica.lag = 0.0
+        except Exception as exc:
+            self.eject(replica, str(exc))
+            return
+        if not replica.healthy:
+            logger.info(f"{replica} is healthy again")
+        replica.healthy = True
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def _health_loop(self) -> None:
+        while True:
+            await self.check_all()
+            await asyncio.sleep(self.health_interval)
+
+    def start(self) -> None:
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._health_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replica_router = ReplicaRouter(
+    [Replica(url) for url in settings.DATABASE_REPLICA_URLS],
+    strategy=settings.DB_REPLICA_STRATEGY,
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    health_interval=settings.DB_REPLICA_HEALTH_INTERVAL_SECONDS
+)
+
+
+
+@registry.collector("db_replica", "Состояние реплик для чтения")
+def replica_status():
+    for replica in replica_router.replicas:
+        labels = {"replica": replica.name}
+        yield "healthy", labels, replica.healthy
+        yield "lag_seconds", labels, replica.lag
+        yield "active_sessions", labels, replica.active
+
+
+async def get_read_session(prefer_primary: bool = False) -> AsyncGenerator[AsyncSession, None]:
+    """Сессия только для чтения: реплика по стратегии роутера или primary"""
+    replica = None if prefer_primary else replica_router.choose()
+    if replica is None:
+        async for session in get_async_session():
+            yield session
+        return
+
+    replica.active += 1
+    try:
+        async with replica.session_maker() as session:
+            yield session
+    except DBAPIError as exc:
+        # Ошибки соединения, а не запроса: реплику исключаем до проверки здоровья
+        if exc.connection_invalidated or isinstance(exc, (OperationalError, InterfaceError)):
+            replica_router.eject(replica, str(exc))
+        raise
+    finally:
+        replica.active -= 1
+
+
 async def init_db():
     """Инициализация базы данных"""
     async with engine.begin() as conn:
@@ -44,6 +211,7 @@ async def init_db():
 
 async def close_db():
     """Закрытие соединения с базой данных"""
+    await replica_router.stop()
     await engine.dispose()
 
 
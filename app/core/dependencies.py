@@ -1,10 +1,13 @@
 from typing import Generator, Optional
-from fastapi import Depends, HTTPException, Query
+from fastapi import Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_async_session
+from app.core.database import get_async_session, get_read_session
 from app.schemas.base import PaginationParams
 
+# Метка read-your-writes: после записи клиент READ_YOUR_WRITES_SECONDS читает с primary
+READ_PRIMARY_COOKIE = "read_primary"
+
 
 async def get_db() -> Generator[AsyncSession, None, None]:
     """Получить сессию базы данных"""
@@ -12,12 +15,25 @@ async def get_db() -> Generator[AsyncSession, None, None]:
         yield session
 
 
+async def get_read_db(request: Request) -> Generator[AsyncSession, None, None]:
+    """Получить сессию для чтения (реплика или primary)"""
+    prefer_primary = READ_PRIMARY_COOKIE in request.cookies
+    async for session in get_read_session(prefer_primary):
+        yield session
+
+
 def get_pagination_params(
     page: int = Query(1, ge=1, description="Номер страницы"),
-    size: int = Query(20, ge=1, le=100, description="Размер страницы")
+    size: int = Query(20, ge=1, le=100, description="Размер страницы"),
+    cursor: Optional[str] = Query(
+        None, description="Курсор keyset-пагинации (пустое значение — первая страница)"
+    ),
+    estimate_total: bool = Query(
+        False, description="В режиме курсора вернуть приблизительное общее количество"
+    )
 ) -> PaginationParams:
     """Получить параметры пагинации"""
-    return PaginationParams(page=page, size=size)
+    return PaginationParams(page=page, size=size, cursor=cursor, estimate_total=estimate_total)
 
 
 def get_optional_int(
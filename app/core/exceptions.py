@@ -38,11 +38,31 @@ class BookingAlreadyCancelledException(BaseCustomException):
     detail = "Booking is already cancelled"
 
 
+class BookingTransitionException(BaseCustomException):
+    status_code = status.HTTP_409_CONFLICT
+    detail = "Booking status does not allow this transition"
+
+
+class WaitlistEntryNotFoundException(BaseCustomException):
+    status_code = status.HTTP_404_NOT_FOUND
+    detail = "Waitlist entry not found"
+
+
+class WaitlistConflictException(BaseCustomException):
+    status_code = status.HTTP_409_CONFLICT
+    detail = "Waitlist entry conflicts with current state"
+
+
 class TeacherNotFoundException(BaseCustomException):
     status_code = status.HTTP_404_NOT_FOUND
     detail = "Teacher not found"
 
 
+class TeacherSlugRequiredException(BaseCustomException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    detail = "Teacher slug is required for meeting_url generation"
+
+
 class StudentNotFoundException(BaseCustomException):
     status_code = status.HTTP_404_NOT_FOUND
     detail = "Student not found"
@@ -56,3 +76,38 @@ class InvalidTimeSlotException(BaseCustomException):
 class SlotInPastException(BaseCustomException):
     status_code = status.HTTP_400_BAD_REQUEST
     detail = "Cannot create slot in the past"
+
+
+class TooManySlotsException(BaseCustomException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    detail = "Too many slots requested"
+
+
+class TooManyBookingsException(BaseCustomException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    detail = "Too many bookings requested"
+
+
+class InvalidCursorException(BaseCustomException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    detail = "Invalid pagination cursor"
+
+
+class PasswordHasherBusyException(BaseCustomException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    detail = "Password hashing is overloaded, retry later"
+
+
+class DebugAccessDeniedException(BaseCustomException):
+    status_code = status.HTTP_403_FORBIDDEN
+    detail = "Debug token is missing or invalid"
+
+
+class NotModifiedException(BaseCustomException):
+    """Ресурс не изменился с версии клиента (ответ 304 без тела)"""
+    status_code = status.HTTP_304_NOT_MODIFIED
+    detail = "Not modified"
+
+    def __init__(self, headers: dict):
+        super().__init__()
+        self.headers = headers
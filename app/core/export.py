@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi.responses import StreamingResponse
+
+
+class ExportFormat(str, Enum):
+    """Формат выгрузки"""
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def plain_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+async def ndjson_chunks(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """Строка JSON на запись, один чанк на пачку"""
+    async for batch in batches:
+        yield "".join(
+            json.dumps({key: plain_value(value) for key, value in row.items()}, ensure_ascii=False) + "\n"
+            for row in batch
+        ).encode()
+
+
+async def csv_chunks(
+    batches: AsyncIterator[List[Dict[str, Any]]],
+    columns: List[str]
+) -> AsyncIterator[bytes]:
+    """CSV с заголовком, один чанк на пачку"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for batch in batches:
+        for row in batch:
+            writer.writerow(["" if row[column] is None else plain_value(row[column]) for column in columns])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export_response(
+    batches: AsyncIterator[List[Dict[str, Any]]],
+    columns: List[str],
+    export_format: ExportFormat,
+    filename: str
+) -> StreamingResponse:
+    """StreamingResponse с выгрузкой пачек строк в выбранном формате"""
+    if export_format == ExportFormat.CSV:
+        body = csv_chunks(batches, columns)
+    else:
+        body = ndjson_chunks(batches)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'}
+    )
@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.cache import LRUCache
+from app.core.conditional import make_etag, is_not_modified, not_modified_response, validator_headers
+from app.core.config import get_settings
+
+PRODID = "-//ScheduleService//Schedule Feed//RU"
+MEDIA_TYPE = "text/calendar; charset=utf-8"
+LINE_LIMIT = 75  # октетов без CRLF (RFC 5545, 3.1)
+EPOCH = datetime(1970, 1, 1)
+
+settings = get_settings()
+
+
+@dataclass
+class CalendarEvent:
+    """Событие календаря (VEVENT)"""
+    uid: str
+    start: datetime
+    end: datetime
+    summary: str
+    description: Optional[str] = None
+    url: Optional[str] = None
+    status: Optional[str] = None  # TENTATIVE | CONFIRMED | CANCELLED
+    last_modified: Optional[datetime] = None
+
+
+def escape_text(value: str) -> str:
+    """Экранирование TEXT-значения (RFC 5545, 3.3.11)"""
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def format_datetime(value: datetime) -> str:
+    """UTC-время в форме 20240101T100000Z; наивные datetime считаются UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def fold_line(line: str) -> str:
+    """Перенос длинной строки по 75 октетов, не разрывая символы UTF-8"""
+    if len(line.encode()) <= LINE_LIMIT:
+        return line
+    parts, current, size = [], [], 0
+    limit = LINE_LIMIT
+    for char in line:
+        width = len(char.encode())
+        if size + width > limit:
+            parts.append("".join(current))
+            # Строка продолжения начинается с пробела
+            current, size, limit = [], 0, LINE_LIMIT - 1
+        current.append(char)
+        size += width
+    parts.append("".join(current))
+    return "\r\n ".join(parts)
+
+
+def _event_lines(event: CalendarEvent, stamp: datetime) -> List[str]:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event.uid}",
+        f"DTSTAMP:{format_datetime(stamp)}",
+        f"DTSTART:{format_datetime(event.start)}",
+        f"DTEND:{format_datetime(event.end)}",
+        f"SUMMARY:{escape_text(event.summary)}",
+    ]
+    if event.description:
+        lines.append(f"DESCRIPTION:{escape_text(event.description)}")
+    if event.url:
+        lines.append(f"URL:{event.url}")
+    if event.status:
+        lines.append(f"STATUS:{event.status}")
+    if event.last_modified:
+        lines.append(f"LAST-MODIFIED:{format_datetime(event.last_modified)}")
+    lines.append("END:VEVENT")
+    return lines
+
+
+def render_calendar(name: str, events: Iterable[CalendarEvent], stamp: datetime) -> bytes:
+    """VCALENDAR целиком.
+
+    stamp идет в DTSTAMP всех событий: тело зависит только от данных,
+    поэтому одинаковые версии ленты дают одинаковые байты.
+    """
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(name)}",
+    ]
+    for event in events:
+        lines.extend(_event_lines(event, stamp))
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(fold_line(line) for line in lines) + "\r\n").encode()
+
+
+# Отрисованные ленты по ETag: ключ включает версию, поэтому запись не устаревает
+feed_cache = LRUCache(settings.ICS_CACHE_MAX_BYTES)
+
+
+async def calendar_feed(
+    request: Request,
+    feed: str,
+    version: Tuple[Optional[datetime], int],
+    render: Callable[[datetime], Awaitable[bytes]]
+) -> Response:
+    """Ответ с лентой: 304 по валидаторам, иначе тело из кэша или render(stamp)"""
+    last_modified, count = version
+    etag = make_etag(feed, last_modified.isoformat() if last_modified else "-", count)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    body = feed_cache.get(etag)
+    if body is None:
+        body = await render(last_modified or EPOCH)
+        feed_cache.set(etag, body, settings.ICS_CACHE_TTL_SECONDS)
+    return Response(body, media_type=MEDIA_TYPE, headers=validator_headers(etag, last_modified))
@@ -0,0 +1,411 @@
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+LabelValues = Tuple[str, ...]
+# Сэмпл коллектора: (имя метрики, метки, значение)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+class Metric(ABC):
+    """Семейство метрик с набором меток"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues, **extra: str) -> Dict[str, str]:
+        return {**dict(zip(self.labelnames, key)), **extra}
+
+    @abstractmethod
+    def samples(self) -> Iterable[Sample]:
+        ...
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self._values.items():
+            yield self.name, self._labels(key), value
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # метки -> [счетчики по корзинам, сумма, количество]
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][index] += 1
+                break
+        entry[1] += value
+        entry[2] += 1
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def samples(self) -> Iterable[Sample]:
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _format_value(bound)
+                yield f"{self.name}_bucket", self._labels(key, le=le), cumulative
+            yield f"{self.name}_sum", self._labels(key), total
+            yield f"{self.name}_count", self._labels(key), count
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class Registry:
+    """Метрики процесса и коллекторы, опрашиваемые при выдаче /metrics"""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Tuple[str, str, Callable[[], Iterable[Sample]]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, prefix: str, documentation: str):
+        """Декоратор: функция возвращает сэмплы-gauge, имена метрик — prefix_<имя>"""
+        def decorator(func: Callable[[], Iterable[Sample]]):
+            self.collectors.append((prefix, documentation, func))
+            return func
+        return decorator
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for prefix, documentation, func in self.collectors:
+            families: Dict[str, List[str]] = {}
+            for name, labels, value in func():
+                if value is None:
+                    continue
+                full_name = f"{prefix}_{name}"
+                families.setdefault(full_name, []).append(
+                    f"{full_name}{_format_labels(labels)} {_format_value(value)}"
+                )
+            for full_name, samples in families.items():
+                lines.append(f"# HELP {full_name} {documentation}")
+                lines.append(f"# TYPE {full_name} gauge")
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        for metric in self.metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Время обработки запроса по маршруту", ("method", "route")
+))
+http_requests = registry.register(Counter(
+    "http_requests_total", "Запросы по маршруту и коду ответа", ("method", "route", "status")
+))
+http_request_queries = registry.register(Histogram(
+    "http_request_queries", "SQL-запросов на один HTTP-запрос", ("method", "route"), QUERY_COUNT_BUCKETS
+))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Время выполнения SQL по отпечатку запроса", ("fingerprint",)
+))
+db_query_errors = registry.register(Counter(
+    "db_query_errors_total", "Ошибки SQL по отпечатку запроса", ("fingerprint",)
+))
+db_pool_wait = registry.register(Histogram(
+    "db_pool_wait_seconds", "Ожидание соединения из пула", ("pool",)
+))
+db_pool_checkouts = registry.register(Counter(
+    "db_pool_checkouts_total", "Выдачи соединений из пула", ("pool",)
+))
+db_pool_connects = registry.register(Counter(
+    "db_pool_connections_created_total", "Новые соединения с БД", ("pool",)
+))
+db_pool_invalidations = registry.register(Counter(
+    "db_pool_invalidations_total", "Соединения, закрытые после ошибки", ("pool",)
+))
+
+
+# Нормализация SQL в отпечаток: литералы и параметры -> ?, списки -> один ?
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_PARAM_RE = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<!:):\w+|\?")
+_LIST_RE = re.compile(r"\?(?:\s*,\s*\?)+")
+_VALUES_RE = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACE_RE = re.compile(r"\s+")
+
+OTHER_FINGERPRINT = "other"
+_fingerprints: Dict[str, str] = {}  # текст запроса -> отпечаток
+_known_fingerprints: set = set()
+
+
+def normalize_sql(statement: str) -> str:
+    """Отпечаток запроса: одинаковый для запросов, отличающихся только значениями"""
+    sql = _STRING_RE.sub("?", statement)
+    sql = _PARAM_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _LIST_RE.sub("?", sql)
+    sql = _VALUES_RE.sub("(?)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def fingerprint(statement: str) -> str:
+    """Отпечаток с кэшем по тексту; сверх METRICS_MAX_FINGERPRINTS — "other" """
+    cached = _fingerprints.get(statement)
+    if cached is not None:
+        return cached
+    normalized = normalize_sql(statement)
+    if normalized not in _known_fingerprints:
+        if len(_known_fingerprints) >= settings.METRICS_MAX_FINGERPRINTS:
+            normalized = OTHER_FINGERPRINT
+        else:
+            _known_fingerprints.add(normalized)
+    if len(_fingerprints) < settings.METRICS_MAX_FINGERPRINTS * 4:
+        _fingerprints[statement] = normalized
+    return normalized
+
+
+class RequestStats:
+    """SQL-запросы текущего HTTP-запроса: общее число и число по отпечаткам"""
+
+    __slots__ = ("request", "queries", "fingerprints")
+
+    def __init__(self, request=None):
+        self.request = request
+        self.queries = 0
+        self.fingerprints: Dict[str, int] = {}
+
+
+# Задается middleware; внутри greenlet SQLAlchemy контекст наследуется
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+# Служебные запросы вложенных транзакций не входят в число запросов обработчика
+_SAVEPOINT_PREFIXES = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+# Вызываются после каждого SQL: hook(conn, statement, parameters, executemany, elapsed, fingerprint)
+query_hooks: List[Callable[..., None]] = []
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    key = fingerprint(statement)
+    if settings.METRICS_ENABLED:
+        db_query_duration.observe(elapsed, fingerprint=key)
+    stats = current_request.get()
+    if stats is not None and not statement.startswith(_SAVEPOINT_PREFIXES):
+        stats.queries += 1
+        stats.fingerprints[key] = stats.fingerprints.get(key, 0) + 1
+    for hook in query_hooks:
+        hook(conn, statement, parameters, executemany, elapsed, key)
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+    if exception_context.statement and settings.METRICS_ENABLED:
+        db_query_errors.inc(fingerprint=fingerprint(exception_context.statement))
+
+
+_pool_classes: Dict[str, type] = {}
+
+
+def instrumented_pool(name: str) -> Optional[type]:
+    """Класс пула, замеряющий ожидание соединения; None при METRICS_ENABLED=false"""
+    if not settings.METRICS_ENABLED:
+        return None
+    pool_class = _pool_classes.get(name)
+    if pool_class is None:
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return AsyncAdaptedQueuePool.connect(self)
+            finally:
+                db_pool_wait.observe(time.perf_counter() - start, pool=self.metrics_name)
+
+        # Атрибут класса переживает pool.recreate() при dispose движка
+        pool_class = _pool_classes[name] = type(
+            "InstrumentedQueuePool", (AsyncAdaptedQueuePool,), {"metrics_name": name, "connect": connect}
+        )
+    return pool_class
+
+
+_engines: Dict[str, AsyncEngine] = {}
+
+
+def sql_events_enabled() -> bool:
+    """Нужны ли события SQL: их используют метрики, журнал медленных запросов,
+    трассировка и профилировщик (кадры <sql wait>), а через RequestStats —
+    бюджеты запросов"""
+    return (
+        settings.METRICS_ENABLED
+        or settings.SLOW_QUERY_THRESHOLD_MS > 0
+        or settings.TRACING_ENABLED
+        or settings.PROFILING_ENABLED
+    )
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """Подписать движок на события SQL и (при METRICS_ENABLED) пула"""
+    if not sql_events_enabled() or _engines.get(name) is engine:
+        return
+    _engines[name] = engine
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+    if not settings.METRICS_ENABLED:
+        return
+    event.listen(sync_engine, "checkout", lambda *args: db_pool_checkouts.inc(pool=name))
+    event.listen(sync_engine, "connect", lambda *args: db_pool_connects.inc(pool=name))
+    event.listen(sync_engine, "invalidate", lambda *args: db_pool_invalidations.inc(pool=name))
+
+
+@registry.collector("db_pool", "Состояние пула соединений")
+def pool_status() -> Iterable[Sample]:
+    for name, engine in _engines.items():
+        pool = engine.sync_engine.pool
+        if not isinstance(pool, AsyncAdaptedQueuePool):
+            continue
+        labels = {"pool": name}
+        yield "size", labels, pool.size()
+        yield "checked_out", labels, pool.checkedout()
+        yield "checked_in", labels, pool.checkedin()
+        yield "overflow", labels, max(pool.overflow(), 0)
+        yield "max_overflow", labels, pool._max_overflow
+
+
+def stats_samples(stats: Dict[str, Any], **labels: str) -> Iterable[Sample]:
+    """Числовые поля словаря stats() как сэмплы коллектора"""
+    for name, value in stats.items():
+        if isinstance(value, (int, float)):
+            yield name, labels, value
+
+
+def route_label(request) -> str:
+    """Шаблон пути маршрута, а не сам путь — чтобы не плодить метки по id"""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+# Вызываются после каждого запроса: hook(request, route, stats)
+request_hooks: List[Callable[[Any, str, RequestStats], None]] = []
+
+
+async def metrics_middleware(request, call_next):
+    """Длительность, код ответа и число SQL-запросов по маршрутам.
+
+    Без METRICS_ENABLED только собирает RequestStats для request_hooks.
+    """
+    stats = RequestStats(request)
+    token = current_request.set(stats)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        current_request.reset(token)
+        route = route_label(request)
+        if settings.METRICS_ENABLED:
+            http_request_duration.observe(elapsed, method=request.method, route=route)
+            http_requests.inc(method=request.method, route=route, status=str(status))
+            http_request_queries.observe(stats.queries, method=request.method, route=route)
+        for hook in request_hooks:
+            hook(request, route, stats)
@@ -0,0 +1,214 @@
+import hashlib
+import hmac
+import itertools
+import logging
+import signal
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterable, Optional
+
+from app.core.config import get_settings
+from app.core.metrics import query_hooks
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+PROFILE_HEADER = "X-Debug-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+# Псевдокадр для времени ожидания SQL: в сэмплы CPU оно не попадает
+SQL_FRAME = "<sql wait>"
+MAX_DEPTH = 128
+
+
+def sign_profile_token(secret: str, ttl: int = 300) -> str:
+    """Токен заголовка X-Debug-Profile: срок действия и HMAC от него"""
+    expires = str(int(time.time()) + ttl)
+    signature = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_token(secret: str, token: str) -> bool:
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def collapse(frame) -> str:
+    """Стек от корня задачи до кадра в формате collapsed stacks (a;b;c).
+
+    Кадры цикла событий asyncio ниже задачи отбрасываются.
+    """
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        module = frame.f_globals.get("__name__", "?")
+        if module.startswith("asyncio."):
+            break
+        code = frame.f_code
+        names.append(f"{module}.{getattr(code, 'co_qualname', code.co_name)}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class RequestProfile:
+    """Сэмплы одного запроса: стек -> число сэмплов"""
+
+    def __init__(self, id: int, trigger: str):
+        self.id = id
+        self.trigger = trigger
+        self.method = ""
+        self.route = ""
+        self.started = time.time()
+        self.duration = 0.0
+        self.sql_seconds = 0.0
+        self.stacks: Dict[str, int] = {}
+
+    def add(self, frame) -> None:
+        stack = collapse(frame)
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self, interval: float) -> Dict[str, int]:
+        """Стеки с маршрутом в корне; время SQL — в пересчете на сэмплы"""
+        root = f"{self.method} {self.route}"
+        stacks = {f"{root};{stack}" if stack else root: count for stack, count in self.stacks.items()}
+        sql_samples = round(self.sql_seconds / interval)
+        if sql_samples:
+            stacks[f"{root};{SQL_FRAME}"] = sql_samples
+        return stacks
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "id": self.id,
+            "trigger": self.trigger,
+            "method": self.method,
+            "route": self.route,
+            "started": self.started,
+            "duration_ms": round(self.duration * 1000, 3),
+            "sql_ms": round(self.sql_seconds * 1000, 3),
+            "samples": self.samples,
+        }
+
+
+# Профиль текущего запроса; дочерние задачи запроса наследуют его
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+def render_collapsed(stacks: Dict[str, int]) -> str:
+    """Текст для flamegraph.pl / speedscope: "a;b;c <число сэмплов>" по строке"""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+class Profiler:
+    """Сэмплирующий профилировщик запросов на SIGPROF.
+
+    Таймер ITIMER_PROF взведен, только пока идет хотя бы один профилируемый
+    запрос. Обработчик сигнала выполняется в потоке цикла событий между
+    байткодами и видит контекст выполняющейся задачи, поэтому сэмпл
+    относится к тому запросу, чей код сейчас работает. Время ожидания SQL
+    добавляется из событий движка псевдокадром <sql wait>.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        sample_rate: int,
+        interval_ms: float,
+        secret: str,
+        buffer_size: int
+    ):
+        self.enabled = enabled and hasattr(signal, "setitimer")
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.secret = secret
+        self.profiles: Deque[RequestProfile] = deque(maxlen=buffer_size)
+        self._ids = itertools.count(1)
+        self._requests = itertools.count(1)
+        self._active = 0
+        self._installed = False
+
+    def trigger(self, request) -> Optional[str]:
+        """Почему запрос профилируется: подписанный заголовок, выборка 1 из N или нет"""
+        if not self.enabled:
+            return None
+        token = request.headers.get(PROFILE_HEADER)
+        if token and verify_profile_token(self.secret, token):
+            return "header"
+        if self.sample_rate > 0 and next(self._requests) % self.sample_rate == 0:
+            return "sample"
+        return None
+
+    def _install(self) -> bool:
+        if not self._installed:
+            if threading.current_thread() is not threading.main_thread():
+                logger.warning("Profiler needs the event loop in the main thread, disabled")
+                self.enabled = False
+                return False
+            signal.signal(signal.SIGPROF, self._on_sample)
+            self._installed = True
+        return True
+
+    @staticmethod
+    def _on_sample(signum, frame) -> None:
+        profile = current_profile.get()
+        if profile is not None:
+            profile.add(frame)
+
+    def start(self, trigger: str) -> RequestProfile:
+        profile = RequestProfile(next(self._ids), trigger)
+        if self._install():
+            if self._active == 0:
+                signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+            self._active += 1
+        return profile
+
+    def finish(self, profile: RequestProfile, method: str, route: str) -> None:
+        if self._installed and self._active > 0:
+            self._active -= 1
+            if self._active == 0:
+                signal.setitimer(signal.ITIMER_PROF, 0)
+        profile.method = method
+        profile.route = route
+        profile.duration = time.time() - profile.started
+        self.profiles.append(profile)
+
+    def get(self, id: int) -> Optional[RequestProfile]:
+        return next((profile for profile in self.profiles if profile.id == id), None)
+
+    def aggregate(self, route: Optional[str] = None, window: Optional[float] = None) -> Dict[str, int]:
+        """Сумма стеков профилей маршрута за последние window секунд"""
+        since = time.time() - window if window else 0
+        merged: Dict[str, int] = {}
+        for profile in self.select(route, since):
+            for stack, count in profile.collapsed(self.interval).items():
+                merged[stack] = merged.get(stack, 0) + count
+        return merged
+
+    def select(self, route: Optional[str] = None, since: float = 0) -> Iterable[RequestProfile]:
+        return [
+            profile for profile in self.profiles
+            if profile.started >= since and (route is None or profile.route == route)
+        ]
+
+
+def _record_sql(conn, statement, parameters, executemany, elapsed, key) -> None:
+    profile = current_profile.get()
+    if profile is not None:
+        profile.sql_seconds += elapsed
+
+
+profiler = Profiler(
+    enabled=settings.PROFILING_ENABLED,
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    interval_ms=settings.PROFILING_INTERVAL_MS,
+    secret=settings.PROFILING_SECRET or settings.SECRET_KEY,
+    buffer_size=settings.PROFILING_BUFFER_SIZE
+)
+query_hooks.append(_record_sql)
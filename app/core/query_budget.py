@@ -0,0 +1,82 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import get_settings
+from app.core.metrics import Counter, RequestStats, registry, request_hooks
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+query_budget_exceeded = registry.register(Counter(
+    "http_query_budget_exceeded_total", "Запросы, превысившие бюджет SQL маршрута", ("method", "route")
+))
+n_plus_one_detected = registry.register(Counter(
+    "http_n_plus_one_total", "Запросы с повторяющимся SQL одной формы (N+1)", ("method", "route")
+))
+
+
+def query_budget(limit: int):
+    """Объявить бюджет SQL-запросов эндпоинта.
+
+    Ставится под декоратором роутера. Превышение логируется и считается
+    в /metrics, а tests/test_query_budget.py проверяет бюджеты всех
+    объявивших их маршрутов.
+    """
+    def decorator(endpoint):
+        endpoint.query_budget = limit
+        return endpoint
+    return decorator
+
+
+def endpoint_budget(request) -> Optional[int]:
+    route = request.scope.get("route")
+    return getattr(getattr(route, "endpoint", None), "query_budget", None)
+
+
+@dataclass
+class QueryReport:
+    """Итог по SQL одного HTTP-запроса"""
+
+    method: str
+    route: str
+    queries: int
+    budget: Optional[int]
+    # отпечаток -> число повторов, для форм, повторенных не реже порога N+1
+    repeated: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.queries > self.budget
+
+    @property
+    def n_plus_one(self) -> bool:
+        return bool(self.repeated)
+
+
+# Получатели отчетов (фикстура query_reports в тестах)
+report_listeners: List[Callable[[QueryReport], None]] = []
+
+
+def check_request(request, route: str, stats: RequestStats) -> None:
+    threshold = settings.QUERY_N_PLUS_ONE_THRESHOLD
+    report = QueryReport(
+        method=request.method,
+        route=route,
+        queries=stats.queries,
+        budget=endpoint_budget(request),
+        repeated={key: count for key, count in stats.fingerprints.items() if count >= threshold}
+    )
+    if report.over_budget:
+        query_budget_exceeded.inc(method=report.method, route=route)
+        logger.warning(f"{report.method} {route}: {report.queries} SQL queries, budget {report.budget}")
+    if report.n_plus_one:
+        n_plus_one_detected.inc(method=report.method, route=route)
+        for key, count in report.repeated.items():
+            logger.warning(f"{report.method} {route}: possible N+1, {count}x {key}")
+    for listener in report_listeners:
+        listener(report)
+
+
+request_hooks.append(check_request)
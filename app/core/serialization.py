@@ -0,0 +1,81 @@
+import json
+from operator import attrgetter
+from typing import Any, Dict, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.config import get_settings
+from app.core.export import plain_value
+
+try:
+    # Без orjson ответы кодируются stdlib json
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+settings = get_settings()
+
+
+def dumps(content: Any) -> bytes:
+    """JSON в байты: orjson, если установлен, иначе stdlib"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, default=plain_value, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+
+class Serializer:
+    """Сериализатор плоской схемы ответа.
+
+    Набор полей схемы разбирается один раз; значения читаются из ORM-объекта
+    одним attrgetter без валидации pydantic — строки из БД уже корректны.
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.schema = schema
+        self.fields = tuple(schema.model_fields)
+        self._values = attrgetter(*self.fields)
+
+    def to_dict(self, obj: Any) -> Dict[str, Any]:
+        # Словари уже сериализованы (например, из кэша доступности)
+        if isinstance(obj, dict):
+            return obj
+        return dict(zip(self.fields, self._values(obj)))
+
+    def dump(self, content: Any) -> Any:
+        if isinstance(content, (list, tuple)):
+            to_dict = self.to_dict
+            return [to_dict(obj) for obj in content]
+        return self.to_dict(content)
+
+
+_serializers: Dict[Type[BaseModel], Serializer] = {}
+
+
+def serializer_for(schema: Type[BaseModel]) -> Serializer:
+    serializer = _serializers.get(schema)
+    if serializer is None:
+        serializer = _serializers[schema] = Serializer(schema)
+    return serializer
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse с кодированием через orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_response(schema: Type[BaseModel], content: Any) -> Any:
+    """Ответ по плоской схеме в обход response_model.
+
+    Эндпоинт подключается явно: возвращает fast_response(Схема, объекты)
+    вместо объектов. response_model остается для OpenAPI. Пока не задано
+    FAST_JSON_RESPONSES=true, объекты возвращаются как есть и FastAPI
+    валидирует их по response_model в обычный JSONResponse.
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return content
+    return FastJSONResponse(serializer_for(schema).dump(content))
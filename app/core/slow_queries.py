@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import get_settings
+from app.core.metrics import current_request, query_hooks, route_label
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Запросы, для которых EXPLAIN без ANALYZE безопасен и осмыслен
+EXPLAINABLE_PREFIXES = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def redact_value(value: Any) -> Any:
+    """Значение параметра для лога: строки и байты заменяются типом и длиной"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    if isinstance(value, (list, tuple)):
+        return [redact_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: redact_value(item) for key, item in value.items()}
+    return f"<{type(value).__name__}>"
+
+
+async def explain(conn: AsyncConnection, statement: str, parameters: Any) -> Any:
+    """План запроса без выполнения: JSON в PostgreSQL, EXPLAIN QUERY PLAN в SQLite"""
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE off, FORMAT JSON) {statement}", parameters)
+        plan = result.scalar()
+        return json.loads(plan) if isinstance(plan, str) else plan
+    if dialect == "sqlite":
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in result]
+    return None
+
+
+@dataclass
+class SlowQuery:
+    """Медленные выполнения одного отпечатка SQL"""
+
+    fingerprint: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_seen: Optional[datetime] = None
+    last_route: Optional[str] = None
+    last_parameters: Any = None
+    plan: Any = None
+    explained_at: Optional[float] = field(default=None, repr=False)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "max_ms": round(self.max_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "total_ms": round(self.total_ms, 3),
+            "last_seen": self.last_seen,
+            "last_route": self.last_route,
+            "last_parameters": self.last_parameters,
+            "plan": self.plan,
+        }
+
+
+class SlowQueryLog:
+    """Журнал запросов дольше порога.
+
+    Каждое медленное выполнение пишется в лог (нормализованный SQL,
+    параметры без строковых значений, длительность, маршрут) и
+    агрегируется по отпечатку. План снимается отдельным соединением в
+    фоне: не чаще explain_per_minute раз в минуту и не чаще раза в
+    explain_interval секунд для одного отпечатка.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        explain_enabled: bool = True,
+        explain_per_minute: int = 10,
+        explain_interval: float = 600.0,
+        buffer_size: int = 200
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_enabled = explain_enabled
+        self.explain_per_minute = explain_per_minute
+        self.explain_interval = explain_interval
+        self.by_fingerprint: Dict[str, SlowQuery] = {}
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self.explains_skipped = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    def record(self, conn, statement: str, parameters: Any, executemany: bool, elapsed: float, key: str) -> None:
+        duration_ms = elapsed * 1000
+        if self.threshold_ms <= 0 or duration_ms < self.threshold_ms or statement.startswith("EXPLAIN"):
+            return
+
+        stats = current_request.get()
+        route = route_label(stats.request) if stats is not None and stats.request is not None else None
+        redacted = f"<{len(parameters)} rows>" if executemany else redact_value(parameters)
+
+        entry = self.by_fingerprint.get(key)
+        if entry is None:
+            entry = self.by_fingerprint[key] = SlowQuery(key)
+        entry.count += 1
+        entry.total_ms += duration_ms
+        entry.max_ms = max(entry.max_ms, duration_ms)
+        entry.last_seen = datetime.utcnow()
+        entry.last_route = route
+        entry.last_parameters = redacted
+        self.recent.append({
+            "fingerprint": key, "duration_ms": round(duration_ms, 3), "route": route, "at": entry.last_seen
+        })
+        logger.warning(f"Slow query {duration_ms:.1f} ms [{route or '-'}]: {key} params={redacted}")
+
+        if not executemany and statement.lstrip().upper().startswith(EXPLAINABLE_PREFIXES) \
+                and self._explain_allowed(entry):
+            self._schedule_explain(AsyncEngine(conn.engine), entry, statement, parameters)
+
+    def _explain_allowed(self, entry: SlowQuery) -> bool:
+        if not self.explain_enabled:
+            return False
+        now = time.monotonic()
+        if entry.explained_at is not None and now - entry.explained_at < self.explain_interval:
+            return False
+        if now - self._window_start >= 60:
+            self._window_start, self._window_count = now, 0
+        if self._window_count >= self.explain_per_minute:
+            self.explains_skipped += 1
+            return False
+        self._window_count += 1
+        entry.explained_at = now
+        return True
+
+    def _schedule_explain(self, engine: AsyncEngine, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._explain(engine, entry, statement, parameters))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, engine: AsyncEngine, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        # EXPLAIN не относится к HTTP-запросу, в котором был медленный SQL
+        current_request.set(None)
+        try:
+            async with engine.connect() as conn:
+                entry.plan = await explain(conn, statement, parameters)
+        except Exception as exc:
+            entry.plan = {"error": str(exc)}
+            logger.info(f"EXPLAIN failed for {entry.fingerprint}: {exc}")
+            return
+        logger.warning(f"Slow query plan [{entry.fingerprint}]: {json.dumps(entry.plan, default=str)}")
+
+    async def drain(self) -> None:
+        """Дождаться снятия запланированных планов"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def top(self, limit: int = 20, order: str = "max_ms") -> List[Dict[str, Any]]:
+        entries = [entry.as_dict() for entry in self.by_fingerprint.values()]
+        entries.sort(key=lambda item: item[order], reverse=True)
+        return entries[:limit]
+
+    def clear(self) -> None:
+        self.by_fingerprint.clear()
+        self.recent.clear()
+        self.explains_skipped = 0
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    explain_enabled=settings.SLOW_QUERY_EXPLAIN,
+    explain_per_minute=settings.SLOW_QUERY_EXPLAIN_PER_MINUTE,
+    explain_interval=settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+    buffer_size=settings.SLOW_QUERY_BUFFER_SIZE
+)
+query_hooks.append(slow_query_log.record)
@@ -0,0 +1,276 @@
+import functools
+import inspect
+import json
+import logging
+import random
+import re
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, List, Optional, TextIO
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.metrics import query_hooks
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+# Виды спанов и статусы в терминах OTLP
+SERVER, INTERNAL, CLIENT = "SPAN_KIND_SERVER", "SPAN_KIND_INTERNAL", "SPAN_KIND_CLIENT"
+STATUS_OK, STATUS_ERROR = "STATUS_CODE_OK", "STATUS_CODE_ERROR"
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """Спан: интервал работы внутри трассы"""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(
+        self,
+        trace: "Trace",
+        name: str,
+        parent_id: Optional[str],
+        kind: str = INTERNAL,
+        start_ns: Optional[int] = None
+    ):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = {}
+        self.status = STATUS_OK
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_error(self, exc: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.attributes["exception.type"] = type(exc).__name__
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        self.end_ns = end_ns if end_ns is not None else time.time_ns()
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Спан в JSON-представлении OTLP"""
+        data = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            data["parentSpanId"] = self.parent_id
+        return data
+
+
+class Trace:
+    """Спаны одного запроса; не больше max_spans, остальные отбрасываются"""
+
+    __slots__ = ("trace_id", "spans", "max_spans", "dropped")
+
+    def __init__(self, trace_id: Optional[str] = None, max_spans: int = 1000):
+        self.trace_id = trace_id or f"{random.getrandbits(128):032x}"
+        self.spans: List[Span] = []
+        self.max_spans = max_spans
+        self.dropped = 0
+
+    def start_span(self, name: str, parent_id: Optional[str], kind: str = INTERNAL,
+                   start_ns: Optional[int] = None) -> Optional[Span]:
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return None
+        span = Span(self, name, parent_id, kind, start_ns)
+        self.spans.append(span)
+        return span
+
+    @property
+    def root(self) -> Span:
+        return self.spans[0]
+
+    def tree(self) -> Dict[str, Any]:
+        """Дерево спанов: имя, длительность, атрибуты, дочерние спаны"""
+        nodes = {
+            span.span_id: {
+                "name": span.name,
+                "span_id": span.span_id,
+                "start_offset_ms": round((span.start_ns - self.root.start_ns) / 1e6, 3),
+                "duration_ms": round(span.duration_ms, 3),
+                "status": span.status,
+                "attributes": span.attributes,
+                "children": [],
+            }
+            for span in self.spans
+        }
+        for span in self.spans[1:]:
+            parent = nodes.get(span.parent_id) or nodes[self.root.span_id]
+            parent["children"].append(nodes[span.span_id])
+        return nodes[self.root.span_id]
+
+
+# Активный спан; дочерние задачи и greenlet SQLAlchemy наследуют его
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]):
+    """(trace_id, parent_span_id) из заголовка W3C traceparent"""
+    match = _TRACEPARENT_RE.match(value or "")
+    return match.groups() if match else (None, None)
+
+
+class Tracer:
+    """Трассировка запросов без внешнего коллектора.
+
+    Законченные трассы хранятся в кольцевом буфере и, если задан путь,
+    дописываются в JSON-lines файл (по спану OTLP на строку).
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        sample_rate: float,
+        buffer_size: int,
+        export_path: str = "",
+        max_spans: int = 1000
+    ):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.max_spans = max_spans
+        self.export_path = export_path
+        self.traces: Deque[Trace] = deque(maxlen=buffer_size)
+        self._file: Optional[TextIO] = None
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None) -> Optional[Span]:
+        """Корневой спан запроса или None, если запрос не попал в выборку"""
+        trace_id, parent_id = parse_traceparent(traceparent)
+        if trace_id is None and self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return None
+        trace = Trace(trace_id, self.max_spans)
+        return trace.start_span(name, parent_id, SERVER)
+
+    def finish_trace(self, root: Span) -> None:
+        root.end()
+        self.traces.append(root.trace)
+        if self.export_path:
+            self._export(root.trace)
+
+    def _export(self, trace: Trace) -> None:
+        try:
+            if self._file is None:
+                self._file = open(self.export_path, "a", encoding="utf-8")
+            self._file.writelines(
+                json.dumps(span.to_otlp(), ensure_ascii=False, default=str) + "\n"
+                for span in trace.spans if span.end_ns is not None
+            )
+            self._file.flush()
+        except OSError as exc:
+            logger.warning(f"Trace export to {self.export_path} failed: {exc}")
+
+    def slowest(self, limit: int = 10) -> List[Trace]:
+        return sorted(self.traces, key=lambda trace: trace.root.duration_ms, reverse=True)[:limit]
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        return next((trace for trace in self.traces if trace.trace_id == trace_id), None)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _wrap(func: Callable, name: Optional[str] = None) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        parent = current_span.get()
+        if parent is None:
+            return await func(*args, **kwargs)
+        # Для методов — имя класса экземпляра: CRUDBooking.get, а не CRUDBase.get
+        span = parent.trace.start_span(name or f"{type(args[0]).__name__}.{func.__name__}", parent.span_id)
+        if span is None:
+            return await func(*args, **kwargs)
+        token = current_span.set(span)
+        try:
+            return await func(*args, **kwargs)
+        except BaseException as exc:
+            span.set_error(exc)
+            raise
+        finally:
+            current_span.reset(token)
+            span.end()
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def traced(name: str):
+    """Декоратор корутины: спан с именем name внутри активной трассы"""
+    return lambda func: _wrap(func, name)
+
+
+def trace_methods(cls: type) -> type:
+    """Обернуть спанами async-методы класса и его базовых классов.
+
+    Асинхронные генераторы (потоковые выборки) не оборачиваются: их
+    запросы попадают в трассу как SQL-спаны.
+    """
+    for klass in cls.__mro__:
+        if klass.__module__ in ("builtins", "typing"):
+            continue
+        for attr, value in list(vars(klass).items()):
+            if inspect.iscoroutinefunction(value) and not getattr(value, "__traced__", False):
+                setattr(klass, attr, _wrap(value))
+    return cls
+
+
+class TracedAsyncSession(AsyncSession):
+    """AsyncSession со спанами commit и refresh"""
+
+    commit = traced("session.commit")(AsyncSession.commit)
+    refresh = traced("session.refresh")(AsyncSession.refresh)
+
+
+def _record_sql(conn, statement, parameters, executemany, elapsed, key) -> None:
+    parent = current_span.get()
+    if parent is None:
+        return
+    end_ns = time.time_ns()
+    span = parent.trace.start_span(
+        key.split(" ", 1)[0], parent.span_id, CLIENT, start_ns=end_ns - int(elapsed * 1e9)
+    )
+    if span is not None:
+        span.attributes["db.system"] = conn.dialect.name
+        span.attributes["db.statement"] = key
+        span.end(end_ns)
+
+
+tracer = Tracer(
+    enabled=settings.TRACING_ENABLED,
+    sample_rate=settings.TRACING_SAMPLE_RATE,
+    buffer_size=settings.TRACING_BUFFER_SIZE,
+    export_path=settings.TRACING_EXPORT_PATH,
+    max_spans=settings.TRACING_MAX_SPANS
+)
+query_hooks.append(_record_sql)
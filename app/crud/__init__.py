@@ -3,11 +3,20 @@ from .teacher import teacher
 from .student import student
 from .time_slot import time_slot
 from .booking import booking
+from .booking_stats import booking_stats
+from .waitlist import waitlist
+from app.core.tracing import trace_methods
+
+# Спаны трассировки вокруг async-методов всех CRUD-классов
+for _crud in (teacher, student, time_slot, booking, booking_stats, waitlist):
+    trace_methods(type(_crud))
 
 __all__ = [
     "CRUDBase",
     "teacher",
     "student", 
     "time_slot",
-    "booking"
+    "booking",
+    "booking_stats",
+    "waitlist"
 ]
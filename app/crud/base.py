@@ -1,18 +1,44 @@
-from typing import Generic, TypeVar, Type, Optional, List
-from sqlalchemy import select, update, delete, func
+import base64
+import json
+from typing import Any, AsyncIterator, Dict, Generic, TypeVar, Type, Optional, List, Set, Tuple
+from sqlalchemy import select, insert, update, delete, func, or_, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import SQLModel
 from datetime import datetime, timezone
 
 from app.models.base import BaseModel
 from app.schemas.base import PaginationParams, PaginatedResponse
+from app.core.exceptions import InvalidCursorException
 
 ModelType = TypeVar("ModelType", bound=BaseModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=SQLModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=SQLModel)
 
 
+def encode_cursor(sort_value: Any, id: int) -> str:
+    """Закодировать позицию (ключ сортировки, id) в непрозрачный курсор"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_column) -> Tuple[Any, int]:
+    """Раскодировать курсор в (ключ сортировки, id) с учетом типа колонки"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, id = json.loads(raw)
+        if sort_column.type.python_type is datetime and sort_value is not None:
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(id)
+    except (ValueError, TypeError):
+        raise InvalidCursorException()
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Колонка сортировки для keyset-пагинации (вместе с id)
+    cursor_sort_field: str = "id"
+
     def __init__(self, model: Type[ModelType]):
         """
         CRUD базовый класс с типизацией
@@ -28,6 +54,28 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_taken(
+        self,
+        db: AsyncSession,
+        values: Dict[str, Any],
+        exclude_id: Optional[int] = None
+    ) -> Set[str]:
+        """Какие из уникальных полей уже заняты другими объектами — одним запросом"""
+        values = {name: value for name, value in values.items() if value}
+        if not values:
+            return set()
+        columns = [getattr(self.model, name) for name in values]
+        query = select(*columns).where(
+            or_(*(column == values[column.key] for column in columns)),
+            self.model.is_deleted == False
+        )
+        if exclude_id is not None:
+            query = query.where(self.model.id != exclude_id)
+        taken = set()
+        for row in await db.execute(query):
+            taken.update(name for name, value in row._mapping.items() if values[name] == value)
+        return taken
+
     async def get_multi(
         self, 
         db: AsyncSession, 
@@ -35,12 +83,10 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         filters: dict = None
     ) -> PaginatedResponse:
         """Получить список объектов с пагинацией"""
-        query = select(self.model).where(self.model.is_deleted == False)
+        query = self._apply_filters(select(self.model).where(self.model.is_deleted == False), filters)
 
-        if filters:
-            for key, value in filters.items():
-                if hasattr(self.model, key) and value is not None:
-                    query = query.where(getattr(self.model, key) == value)
+        if pagination.is_cursor:
+            return await self._get_multi_keyset(db, query, pagination)
 
         # Подсчет общего количества
         count_query = select(func.count()).select_from(query.subquery())
@@ -60,6 +106,143 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             items=items
         )
 
+    def _apply_filters(self, query, filters: Optional[dict]):
+        """Фильтры на равенство по полям модели (None пропускается)"""
+        if filters:
+            for key, value in filters.items():
+                if hasattr(self.model, key) and value is not None:
+                    query = query.where(getattr(self.model, key) == value)
+        return query
+
+    async def get_version(self, db: AsyncSession, id: int) -> Optional[datetime]:
+        """Версия объекта для ETag — время последнего изменения; None, если объекта нет"""
+        query = select(func.coalesce(self.model.updated_at, self.model.created_at)).where(
+            self.model.id == id,
+            self.model.is_deleted == False
+        )
+        return await db.scalar(query)
+
+    async def get_list_version(
+        self,
+        db: AsyncSession,
+        filters: dict = None
+    ) -> Tuple[Optional[datetime], int]:
+        """Версия списка одним агрегатом: (последнее изменение, число строк).
+
+        Новая или измененная строка сдвигает max(updated_at), удаленная —
+        уменьшает count.
+        """
+        query = self._apply_filters(
+            select(func.max(self.model.updated_at), func.count(self.model.id))
+            .where(self.model.is_deleted == False),
+            filters
+        )
+        last_modified, count = (await db.execute(query)).one()
+        return last_modified, count
+
+    async def _get_multi_keyset(
+        self,
+        db: AsyncSession,
+        query,
+        pagination: PaginationParams
+    ) -> PaginatedResponse:
+        """Страница по курсору: без COUNT и OFFSET, стоимость не зависит от глубины"""
+        sort_column = getattr(self.model, self.cursor_sort_field)
+        by_id = self.cursor_sort_field == "id"
+
+        if pagination.cursor:
+            sort_value, last_id = decode_cursor(pagination.cursor, sort_column)
+            if by_id:
+                query = query.where(self.model.id > last_id)
+            else:
+                query = query.where(tuple_(sort_column, self.model.id) > tuple_(sort_value, last_id))
+
+        order = [self.model.id] if by_id else [sort_column, self.model.id]
+        # Берем на одну строку больше, чтобы понять, есть ли следующая страница
+        query = query.order_by(*order).limit(pagination.size + 1)
+        result = await db.execute(query)
+        items = result.scalars().all()
+
+        next_cursor = None
+        if len(items) > pagination.size:
+            items = items[:pagination.size]
+            last = items[-1]
+            next_cursor = encode_cursor(getattr(last, self.cursor_sort_field), last.id)
+
+        total = await self.estimate_count(db) if pagination.estimate_total else None
+
+        return PaginatedResponse(
+            total=total,
+            size=pagination.size,
+            items=items,
+            next_cursor=next_cursor
+        )
+
+    @property
+    def export_columns(self) -> List[str]:
+        """Колонки таблицы в порядке выгрузки"""
+        return [column.name for column in self.model.__table__.columns]
+
+    async def stream_batches(
+        self,
+        db: AsyncSession,
+        filters: dict = None,
+        conditions: list = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[List[dict]]:
+        """Читать строки таблицы пачками через серверный курсор.
+
+        Строки не гидратируются в ORM-объекты, в памяти одна пачка,
+        поэтому расход памяти не зависит от объема выгрузки.
+        """
+        query = self._apply_filters(
+            select(*self.model.__table__.columns).where(self.model.is_deleted == False), filters
+        )
+        if conditions:
+            query = query.where(*conditions)
+        query = query.order_by(self.model.id).execution_options(yield_per=batch_size)
+
+        result = await db.stream(query)
+        async for partition in result.mappings().partitions(batch_size):
+            yield [dict(row) for row in partition]
+
+    async def estimate_count(self, db: AsyncSession) -> Optional[int]:
+        """Оценка числа строк таблицы по статистике планировщика (только PostgreSQL).
+
+        Оценка не учитывает фильтры и мягко удаленные записи.
+        """
+        if db.get_bind().dialect.name != "postgresql":
+            return None
+        result = await db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": self.model.__tablename__}
+        )
+        estimate = result.scalar()
+        # -1 — таблица еще ни разу не анализировалась
+        return estimate if estimate is not None and estimate >= 0 else None
+
+    async def insert_row(self, db: AsyncSession, values: Dict[str, Any]) -> ModelType:
+        """Вставить строку одним INSERT ... RETURNING (без commit).
+
+        Объект заполняется из RETURNING — после commit не нужен refresh.
+        """
+        row = self.model(**values).model_dump(exclude={"id"})
+        return (await db.scalars(insert(self.model).values(**row).returning(self.model))).one()
+
+    async def update_row(self, db: AsyncSession, id: int, values: Dict[str, Any]) -> Optional[ModelType]:
+        """Изменить строку одним UPDATE ... RETURNING (без commit).
+
+        Загруженный в сессию объект обновляется из RETURNING; None — строки нет.
+        """
+        query = (
+            update(self.model)
+            .where(self.model.id == id)
+            .values(**values)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        return (await db.scalars(query)).one_or_none()
+
     async def create(self, db: AsyncSession, obj_in: CreateSchemaType) -> ModelType:
         """Создать новый объект"""
         obj_data = obj_in.dict()
@@ -67,10 +250,8 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         for k, v in obj_data.items():
             if isinstance(v, datetime) and v.tzinfo is not None:
                 obj_data[k] = v.astimezone(timezone.utc).replace(tzinfo=None)
-        db_obj = self.model(**obj_data)
-        db.add(db_obj)
+        db_obj = await self.insert_row(db, obj_data)
         await db.commit()
-        await db.refresh(db_obj)
         return db_obj
 
     async def update(
@@ -81,6 +262,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> ModelType:
         """Обновить объект"""
         obj_data = obj_in.dict(exclude_unset=True)
+        values = {}
         for field, value in obj_data.items():
             # Приводим datetime к naive UTC только для datetime
             if isinstance(value, datetime):
@@ -88,11 +270,12 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                     value = value.astimezone(timezone.utc).replace(tzinfo=None)
                 else:
                     value = value.replace(tzinfo=None)
-            if hasattr(db_obj, field):
-                setattr(db_obj, field, value)
+            if field in self.model.__table__.c:
+                values[field] = value
 
+        if values:
+            db_obj = await self.update_row(db, db_obj.id, values) or db_obj
         await db.commit()
-        await db.refresh(db_obj)
         return db_obj
 
     async def delete(self, db: AsyncSession, id: int) -> bool:
@@ -3,52 +3,232 @@
 # pylance: reportGeneralTypeIssues=false
 # flake8: noqa
 # pylint: skip-file
-from typing import Optional, List
-from datetime import datetime
-from sqlalchemy import select, and_, func
+from collections import Counter
+from typing import Optional, List, Tuple
+from datetime import datetime, time, timedelta
+from sqlalchemy import select, insert, update, and_, func, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, contains_eager
 from sqlalchemy.sql.expression import false
 from sqlmodel import SQLModel
 
-from app.crud.base import CRUDBase
+from app.crud.base import CRUDBase, encode_cursor, decode_cursor
 from app.models.booking import Booking, BookingStatus
-from app.schemas.booking import BookingCreate, BookingUpdate
+from app.schemas.booking import (
+    BookingCreate, BookingUpdate, BookingResponse, BookingBatchCreate, BookingBatchItem,
+    BookingBatchResponse, BatchBookingMode, BookingBulkTransition, BookingBulkItem, BookingBulkResponse
+)
+from app.core.config import get_settings
 from app.core.exceptions import (
     BookingNotFoundException, 
     BookingAlreadyConfirmedException,
     BookingAlreadyCancelledException,
-    SlotAlreadyBookedException
+    BookingTransitionException,
+    SlotAlreadyBookedException,
+    TooManySlotsException,
+    TooManyBookingsException
 )
 from app.models.time_slot import TimeSlot
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.crud.time_slot import time_slot, to_naive_utc
+from app.crud.booking_stats import booking_stats
+from app.crud.waitlist import waitlist
+
+
+# Переходы статусов: целевой статус -> допустимые исходные
+TRANSITIONS = {
+    BookingStatus.CONFIRMED: (BookingStatus.PENDING,),
+    BookingStatus.COMPLETED: (BookingStatus.CONFIRMED,),
+    BookingStatus.CANCELLED: (BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.COMPLETED),
+}
+TRANSITION_STAMPS = {
+    BookingStatus.CONFIRMED: "confirmed_at",
+    BookingStatus.COMPLETED: "completed_at",
+    BookingStatus.CANCELLED: "cancelled_at",
+}
+
+
+def previous_status(db_booking: Booking, sources: Tuple[BookingStatus, ...]) -> BookingStatus:
+    """Статус бронирования до перехода по строке из RETURNING.
+
+    RETURNING отдает новые значения; исходный статус отмены восстанавливается
+    по меткам: completed_at у завершенного, confirmed_at у подтвержденного.
+    """
+    if len(sources) == 1:
+        return sources[0]
+    if db_booking.completed_at:
+        return BookingStatus.COMPLETED
+    return BookingStatus.CONFIRMED if db_booking.confirmed_at else BookingStatus.PENDING
+
+
+def transition_error(new_status: BookingStatus, current: Optional[BookingStatus]) -> Exception:
+    """Почему бронирование в статусе current нельзя перевести в new_status"""
+    if current is None:
+        return BookingNotFoundException("Booking not found")
+    if new_status == BookingStatus.COMPLETED:
+        return BookingAlreadyConfirmedException("Can only complete confirmed bookings")
+    if current == BookingStatus.CANCELLED:
+        if new_status == BookingStatus.CANCELLED:
+            return BookingAlreadyCancelledException("Booking is already cancelled")
+        return BookingAlreadyCancelledException("Cannot confirm cancelled booking")
+    if current == new_status:
+        return BookingAlreadyConfirmedException("Booking is already confirmed")
+    action = "confirm" if new_status == BookingStatus.CONFIRMED else "cancel"
+    return BookingTransitionException(f"Cannot {action} {current.value} booking")
 
 
 class CRUDBooking(CRUDBase[Booking, BookingCreate, BookingUpdate]):  # type: ignore
+    cursor_sort_field = "booking_time"
+
     async def create_booking(
         self, 
         db: AsyncSession, 
         obj_in: BookingCreate
     ) -> Booking:
-        """Создать бронирование"""
-        # Проверяем, что студент еще не забронировал этот слот
-        existing_booking = await self.get_student_slot_booking(
-            db, obj_in.student_id, obj_in.time_slot_id
-        )
-
-        if existing_booking and existing_booking.status != BookingStatus.CANCELLED:
-            raise SlotAlreadyBookedException("Student already booked this slot")
-
-        # Создаем бронирование
-        booking_data = obj_in.dict()
-        booking_data['booking_time'] = datetime.utcnow()
-        booking_data['status'] = BookingStatus.PENDING
+        """Создать бронирование одной транзакцией.
+
+        Место в слоте занимается условным UPDATE, который заодно блокирует
+        строку слота: проверка дубликата и вставка бронирования выполняются
+        под этой блокировкой, а commit один на всю операцию.
+        """
+        try:
+            slot = await time_slot.reserve_seat(db, obj_in.time_slot_id)
+
+            # Проверяем, что студент еще не забронировал этот слот
+            if await self.has_active_booking(db, obj_in.student_id, obj_in.time_slot_id):
+                raise SlotAlreadyBookedException("Student already booked this slot")
+
+            # Создаем бронирование
+            booking_data = obj_in.model_dump()
+            booking_data['booking_time'] = datetime.utcnow()
+            booking_data['status'] = BookingStatus.PENDING
+            db_booking = await self.insert_row(db, booking_data)
+            await booking_stats.apply(db, {
+                (slot.teacher_id, db_booking.booking_time.date(), BookingStatus.PENDING): 1
+            })
+        except Exception:
+            await db.rollback()
+            raise
 
-        db_booking = self.model(**booking_data)
-        db.add(db_booking)
         await db.commit()
-        await db.refresh(db_booking)
+        await time_slot.invalidate_availability((slot.teacher_id, slot.start_time, slot.end_time))
         return db_booking
 
+    async def create_bookings_batch(
+        self,
+        db: AsyncSession,
+        obj_in: BookingBatchCreate
+    ) -> BookingBatchResponse:
+        """Забронировать несколько слотов для студента одной транзакцией.
+
+        Слоты загружаются одним запросом с блокировкой строк в порядке id
+        (параллельные пакеты не взаимоблокируются), места занимаются одним
+        условным UPDATE, бронирования вставляются одним INSERT ... RETURNING.
+        В режиме all_or_nothing любая ошибка откатывает весь пакет.
+        """
+        settings = get_settings()
+        if len(obj_in.time_slot_ids) > settings.BOOKING_BATCH_MAX:
+            raise TooManySlotsException(
+                f"Batch has {len(obj_in.time_slot_ids)} slots, limit is {settings.BOOKING_BATCH_MAX}"
+            )
+        all_or_nothing = obj_in.mode == BatchBookingMode.ALL_OR_NOTHING
+
+        try:
+            slots = {slot.id: slot for slot in await time_slot.lock_slots(db, obj_in.time_slot_ids)}
+            already_booked = set((await db.scalars(
+                select(self.model.time_slot_id).where(
+                    self.model.student_id == obj_in.student_id,
+                    self.model.time_slot_id.in_(obj_in.time_slot_ids),
+                    self.model.status != BookingStatus.CANCELLED,
+                    self.model.is_deleted == False  # type: ignore
+                )
+            )).all())
+
+            errors = {}
+            for slot_id in obj_in.time_slot_ids:
+                slot = slots.get(slot_id)
+                if slot is None or slot.is_deleted:
+                    errors[slot_id] = "Slot not found"
+                elif not slot.is_available:
+                    errors[slot_id] = "Slot is not available"
+                elif slot_id in already_booked:
+                    errors[slot_id] = "Student already booked this slot"
+
+            accepted = [slot_id for slot_id in obj_in.time_slot_ids if slot_id not in errors]
+            if accepted and not (all_or_nothing and errors):
+                reserved = await time_slot.reserve_seats(db, accepted)
+                # Без блокировок строк (SQLite) слот мог заполниться после проверки
+                reserved_ids = {slot.id for slot in reserved}
+                for slot_id in accepted:
+                    if slot_id not in reserved_ids:
+                        errors[slot_id] = "Slot is not available"
+                accepted = [slot_id for slot_id in accepted if slot_id in reserved_ids]
+
+            if not accepted or (all_or_nothing and errors):
+                await db.rollback()
+                bookings = {}
+            else:
+                booking_time = datetime.utcnow()
+                rows = [
+                    self.model(
+                        time_slot_id=slot_id,
+                        student_id=obj_in.student_id,
+                        student_notes=obj_in.student_notes,
+                        booking_time=booking_time,
+                        status=BookingStatus.PENDING
+                    ).model_dump(exclude={"id"})
+                    for slot_id in accepted
+                ]
+                created = (await db.scalars(
+                    insert(self.model).returning(self.model, sort_by_parameter_order=True),
+                    rows
+                )).all()
+                stats = Counter(
+                    (slot.teacher_id, booking_time.date(), BookingStatus.PENDING) for slot in reserved
+                )
+                await booking_stats.apply(db, stats)
+                await db.commit()
+                bookings = {db_booking.time_slot_id: db_booking for db_booking in created}
+                await time_slot.invalidate_availability(*(
+                    (slot.teacher_id, slot.start_time, slot.end_time) for slot in reserved
+                ))
+        except Exception:
+            await db.rollback()
+            raise
+
+        items = [
+            BookingBatchItem(
+                time_slot_id=slot_id,
+                booked=slot_id in bookings,
+                error=errors.get(slot_id),
+                booking=BookingResponse.model_validate(bookings[slot_id]) if slot_id in bookings else None
+            )
+            for slot_id in obj_in.time_slot_ids
+        ]
+        return BookingBatchResponse(
+            mode=obj_in.mode,
+            booked=len(bookings),
+            failed=len(errors),
+            items=items
+        )
+
+    async def has_active_booking(
+        self,
+        db: AsyncSession,
+        student_id: int,
+        slot_id: int
+    ) -> bool:
+        """Есть ли у студента неотмененное бронирование слота"""
+        query = select(self.model.id).where(
+            self.model.student_id == student_id,
+            self.model.time_slot_id == slot_id,
+            self.model.status != BookingStatus.CANCELLED,
+            self.model.is_deleted == False  # type: ignore
+        ).limit(1)
+        result = await db.execute(query)
+        return result.scalar_one_or_none() is not None
+
     async def get_student_slot_booking(
         self, 
         db: AsyncSession, 
@@ -64,6 +244,93 @@ class CRUDBooking(CRUDBase[Booking, BookingCreate, BookingUpdate]):  # type: ign
         result = await db.execute(query)
         return result.scalar_one_or_none()
 
+    async def transition(
+        self,
+        db: AsyncSession,
+        new_status: BookingStatus,
+        conditions: list,
+        teacher_notes: Optional[str] = None
+    ) -> Tuple[List[Booking], List[TimeSlot]]:
+        """Перевести бронирования под условиями в new_status (без commit).
+
+        Допустимый исходный статус проверяется в WHERE того же
+        UPDATE ... RETURNING, поэтому переход атомарен без предварительного
+        чтения: бронирования в другом статусе не меняются и не возвращаются.
+        Роллап статистики и (для отмены) места в слотах обновляются
+        агрегатно по вернувшимся строкам. При отмене места сначала
+        передаются головам листов ожидания, освобождается только остаток;
+        места отмененных завершенных бронирований остаются занятыми.
+        Возвращает (бронирования, слоты с освобожденными местами).
+        """
+        sources = TRANSITIONS[new_status]
+        values = {"status": new_status, TRANSITION_STAMPS[new_status]: datetime.utcnow()}
+        if teacher_notes:
+            values["teacher_notes"] = teacher_notes
+        teacher_id = select(TimeSlot.teacher_id).where(TimeSlot.id == self.model.time_slot_id).scalar_subquery()
+        query = (
+            update(self.model)
+            .where(*conditions, self.model.is_deleted == False, self.model.status.in_(sources))
+            .values(**values)
+            .returning(self.model, teacher_id)
+            .execution_options(populate_existing=True)
+        )
+        rows = (await db.execute(query)).all()
+
+        stats = Counter()
+        seats = Counter()
+        for db_booking, slot_teacher_id in rows:
+            day = db_booking.booking_time.date()
+            previous = previous_status(db_booking, sources)
+            stats[(slot_teacher_id, day, previous)] -= 1
+            stats[(slot_teacher_id, day, new_status)] += 1
+            # Урок завершенного бронирования уже прошел — его место не освобождается
+            if new_status == BookingStatus.CANCELLED and previous != BookingStatus.COMPLETED:
+                seats[db_booking.time_slot_id] += 1
+
+        released = []
+        if seats:
+            seats.subtract(
+                db_booking.time_slot_id for db_booking in await waitlist.promote(db, seats, stats)
+            )
+            seats = {slot_id: count for slot_id, count in seats.items() if count > 0}
+            if seats:
+                released = await time_slot.release_seats(db, seats)
+        await booking_stats.apply(db, stats)
+        return [db_booking for db_booking, _ in rows], released
+
+    async def _transition_one(
+        self,
+        db: AsyncSession,
+        booking_id: int,
+        new_status: BookingStatus,
+        teacher_notes: Optional[str]
+    ) -> Booking:
+        try:
+            bookings, released = await self.transition(
+                db, new_status, [self.model.id == booking_id], teacher_notes
+            )
+        except Exception:
+            await db.rollback()
+            raise
+        if not bookings:
+            # UPDATE ничего не изменил — откатывать нечего
+            current = await self._current_statuses(db, [booking_id])
+            raise transition_error(new_status, current.get(booking_id))
+
+        await db.commit()
+        await time_slot.invalidate_availability(*(
+            (slot.teacher_id, slot.start_time, slot.end_time) for slot in released
+        ))
+        return bookings[0]
+
+    async def _current_statuses(self, db: AsyncSession, booking_ids: List[int]) -> dict:
+        """Текущие статусы бронирований (id -> статус) — для объяснения отказов"""
+        query = select(self.model.id, self.model.status).where(
+            self.model.id.in_(booking_ids),
+            self.model.is_deleted == False  # type: ignore
+        )
+        return dict((await db.execute(query)).all())
+
     async def confirm_booking(
         self, 
         db: AsyncSession, 
@@ -71,24 +338,7 @@ class CRUDBooking(CRUDBase[Booking, BookingCreate, BookingUpdate]):  # type: ign
         teacher_notes: Optional[str] = None
     ) -> Booking:
         """Подтвердить бронирование"""
-        booking = await self.get(db, booking_id)
-        if not booking:
-            raise BookingNotFoundException("Booking not found")
-
-        if booking.status == BookingStatus.CONFIRMED:
-            raise BookingAlreadyConfirmedException("Booking is already confirmed")
-
-        if booking.status == BookingStatus.CANCELLED:
-            raise BookingAlreadyCancelledException("Cannot confirm cancelled booking")
-
-        booking.status = BookingStatus.CONFIRMED
-        booking.confirmed_at = datetime.utcnow()
-        if teacher_notes:
-            booking.teacher_notes = teacher_notes
-
-        await db.commit()
-        await db.refresh(booking)
-        return booking
+        return await self._transition_one(db, booking_id, BookingStatus.CONFIRMED, teacher_notes)
 
     async def cancel_booking(
         self, 
@@ -96,22 +346,8 @@ class CRUDBooking(CRUDBase[Booking, BookingCreate, BookingUpdate]):  # type: ign
         booking_id: int, 
         reason: Optional[str] = None
     ) -> Booking:
-        """Отменить бронирование"""
-        booking = await self.get(db, booking_id)
-        if not booking:
-            raise BookingNotFoundException("Booking not found")
-
-        if booking.status == BookingStatus.CANCELLED:
-            raise BookingAlreadyCancelledException("Booking is already cancelled")
-
-        booking.status = BookingStatus.CANCELLED
-        booking.cancelled_at = datetime.utcnow()
-        if reason:
-            booking.teacher_notes = reason
-
-        await db.commit()
-        await db.refresh(booking)
-        return booking
+        """Отменить бронирование; место переходит голове листа ожидания или освобождается"""
+        return await self._transition_one(db, booking_id, BookingStatus.CANCELLED, reason)
 
     async def complete_booking(
         self, 
@@ -120,21 +356,72 @@ class CRUDBooking(CRUDBase[Booking, BookingCreate, BookingUpdate]):  # type: ign
         teacher_notes: Optional[str] = None
     ) -> Booking:
         """Завершить бронирование"""
-        booking = await self.get(db, booking_id)
-        if not booking:
-            raise BookingNotFoundException("Booking not found")
-
-        if booking.status != BookingStatus.CONFIRMED:
-            raise BookingAlreadyConfirmedException("Can only complete confirmed bookings")
-
-        booking.status = BookingStatus.COMPLETED
-        booking.completed_at = datetime.utcnow()
-        if teacher_notes:
-            booking.teacher_notes = teacher_notes
+        return await self._transition_one(db, booking_id, BookingStatus.COMPLETED, teacher_notes)
+
+    async def transition_bookings(
+        self,
+        db: AsyncSession,
+        obj_in: BookingBulkTransition,
+        new_status: BookingStatus
+    ) -> BookingBulkResponse:
+        """Массовый переход бронирований одной транзакцией.
+
+        Бронирования выбираются списком id, слотом или днем преподавателя
+        (по началу слота). Для слота и дня берутся все бронирования в
+        допустимом исходном статусе; для списка id по каждому отказу
+        возвращается причина.
+        """
+        settings = get_settings()
+        if obj_in.booking_ids is not None:
+            if len(obj_in.booking_ids) > settings.BOOKING_BULK_MAX:
+                raise TooManyBookingsException(
+                    f"Request has {len(obj_in.booking_ids)} bookings, limit is {settings.BOOKING_BULK_MAX}"
+                )
+            conditions = [self.model.id.in_(obj_in.booking_ids)]
+        elif obj_in.time_slot_id is not None:
+            conditions = [self.model.time_slot_id == obj_in.time_slot_id]
+        else:
+            day_start = datetime.combine(obj_in.day, time.min)
+            conditions = [self.model.time_slot_id.in_(
+                select(TimeSlot.id).where(
+                    TimeSlot.teacher_id == obj_in.teacher_id,
+                    TimeSlot.start_time >= day_start,
+                    TimeSlot.start_time < day_start + timedelta(days=1)
+                )
+            )]
+
+        try:
+            bookings, released = await self.transition(db, new_status, conditions, obj_in.teacher_notes)
+            updated = {db_booking.id: db_booking for db_booking in bookings}
+            errors = {}
+            if obj_in.booking_ids is not None:
+                missing = [booking_id for booking_id in obj_in.booking_ids if booking_id not in updated]
+                if missing:
+                    current = await self._current_statuses(db, missing)
+                    errors = {
+                        booking_id: transition_error(new_status, current.get(booking_id)).detail
+                        for booking_id in missing
+                    }
+        except Exception:
+            await db.rollback()
+            raise
 
         await db.commit()
-        await db.refresh(booking)
-        return booking
+        await time_slot.invalidate_availability(*(
+            (slot.teacher_id, slot.start_time, slot.end_time) for slot in released
+        ))
+
+        order = obj_in.booking_ids if obj_in.booking_ids is not None else sorted(updated)
+        items = [
+            BookingBulkItem(
+                booking_id=booking_id,
+                updated=booking_id in updated,
+                error=errors.get(booking_id),
+                booking=BookingResponse.model_validate(updated[booking_id]) if booking_id in updated else None
+            )
+            for booking_id in order
+        ]
+        return BookingBulkResponse(status=new_status, updated=len(updated), failed=len(errors), items=items)
 
     async def get_teacher_bookings(
         self, 
@@ -142,16 +429,41 @@ class CRUDBooking(CRUDBase[Booking, BookingCreate, BookingUpdate]):  # type: ign
         teacher_id: int,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        status: Optional[BookingStatus] = None
-    ) -> List[Booking]:
-        """Получить бронирования преподавателя"""
-        query = select(self.model).options(
-            selectinload(self.model.time_slot).selectinload(TimeSlot.teacher),
-            selectinload(self.model.student)
-        ).join(
-            self.model.time_slot
-        ).where(
-            self.model.time_slot.has(teacher_id=teacher_id),
+        status: Optional[BookingStatus] = None,
+        cursor: Optional[str] = None,
+        size: Optional[int] = None,
+        flat: bool = False
+    ) -> Tuple[list, Optional[str]]:
+        """Получить бронирования преподавателя в порядке начала слотов.
+
+        Один JOIN с time_slots, фильтры по окну — диапазоны по start_time/end_time
+        (индекс ix_time_slots_teacher_start). При size выдается страница и курсор
+        следующей; flat=True возвращает плоские строки вместо ORM-объектов.
+        Возвращает (items, next_cursor).
+        """
+        if flat:
+            query = select(
+                self.model.id,
+                self.model.time_slot_id,
+                self.model.student_id,
+                self.model.status,
+                self.model.booking_time,
+                self.model.student_notes,
+                TimeSlot.start_time,
+                TimeSlot.end_time,
+                Student.name.label("student_name"),
+                Student.email.label("student_email")
+            ).join(TimeSlot, self.model.time_slot_id == TimeSlot.id).join(
+                Student, self.model.student_id == Student.id
+            )
+        else:
+            query = select(self.model).join(self.model.time_slot).options(
+                contains_eager(self.model.time_slot)
+            )
+
+        query = query.where(
+            TimeSlot.teacher_id == teacher_id,
+            TimeSlot.is_deleted == False,
             self.model.is_deleted == False  # type: ignore
         )
 
@@ -159,14 +471,32 @@ class CRUDBooking(CRUDBase[Booking, BookingCreate, BookingUpdate]):  # type: ign
             query = query.where(self.model.status == status)
 
         if start_date:
-            query = query.where(self.model.time_slot.has(start_time__gte=start_date))
+            query = query.where(TimeSlot.start_time >= to_naive_utc(start_date))
 
         if end_date:
-            query = query.where(self.model.time_slot.has(end_time__lte=end_date))
+            query = query.where(TimeSlot.end_time <= to_naive_utc(end_date))
+
+        if cursor:
+            sort_value, last_id = decode_cursor(cursor, TimeSlot.start_time)
+            query = query.where(tuple_(TimeSlot.start_time, self.model.id) > tuple_(sort_value, last_id))
+
+        query = query.order_by(TimeSlot.start_time, self.model.id)
+        if size:
+            # Берем на одну строку больше, чтобы понять, есть ли следующая страница
+            query = query.limit(size + 1)
 
-        query = query.order_by(self.model.booking_time.desc())
         result = await db.execute(query)
-        return result.scalars().all()
+        items = [dict(row._mapping) for row in result] if flat else result.scalars().unique().all()
+
+        next_cursor = None
+        if size and len(items) > size:
+            items = items[:size]
+            last = items[-1]
+            if flat:
+                next_cursor = encode_cursor(last["start_time"], last["id"])
+            else:
+                next_cursor = encode_cursor(last.time_slot.start_time, last.id)
+        return items, next_cursor
 
     async def get_student_bookings(
         self, 
@@ -190,6 +520,40 @@ class CRUDBooking(CRUDBase[Booking, BookingCreate, BookingUpdate]):  # type: ign
         result = await db.execute(query)
         return result.scalars().all()
 
+    async def get_student_bookings_version(
+        self,
+        db: AsyncSession,
+        student_id: int
+    ) -> Optional[Tuple[Optional[datetime], int]]:
+        """Версия бронирований студента одним агрегатом: (последнее изменение, число).
+
+        Учитываются изменения самих бронирований, их слотов и преподавателей.
+        None — студента нет.
+        """
+        row = (await db.execute(
+            select(
+                Student.updated_at,
+                func.max(self.model.updated_at),
+                func.max(TimeSlot.updated_at),
+                func.max(Teacher.updated_at),
+                func.count(self.model.id)
+            )
+            .select_from(Student)
+            .outerjoin(self.model, and_(
+                self.model.student_id == Student.id,
+                self.model.is_deleted == False
+            ))
+            .outerjoin(TimeSlot, self.model.time_slot_id == TimeSlot.id)
+            .outerjoin(Teacher, TimeSlot.teacher_id == Teacher.id)
+            .where(Student.id == student_id, Student.is_deleted == False)
+            .group_by(Student.id, Student.updated_at)
+        )).first()
+        if row is None:
+            return None
+        *updated, count = row
+        stamps = [stamp for stamp in updated if stamp is not None]
+        return (max(stamps) if stamps else None), count
+
     async def get_booking_stats(
         self, 
         db: AsyncSession, 
@@ -197,34 +561,14 @@ class CRUDBooking(CRUDBase[Booking, BookingCreate, BookingUpdate]):  # type: ign
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None
     ) -> dict:
-        """Получить статистику бронирований"""
-        query = select(
-            self.model.status,
-            func.count(self.model.id).label('count')
-        ).where(
-            self.model.is_deleted == False  # type: ignore
+        """Получить статистику бронирований (по роллапу booking_stats_daily)"""
+        return await booking_stats.get_stats(
+            db,
+            teacher_id,
+            to_naive_utc(start_date) if start_date else None,
+            to_naive_utc(end_date) if end_date else None
         )
 
-        if teacher_id:
-            query = query.join(self.model.time_slot).where(
-                self.model.time_slot.has(teacher_id=teacher_id)
-            )
-
-        if start_date:
-            query = query.where(self.model.booking_time >= start_date)
-
-        if end_date:
-            query = query.where(self.model.booking_time <= end_date)
-
-        query = query.group_by(self.model.status)
-        result = await db.execute(query)
-
-        stats = {status.value: 0 for status in BookingStatus}
-        for row in result:
-            stats[row.status] = row.count
-
-        return stats
-
     async def get_with_details(self, db: AsyncSession, booking_id: int) -> Optional[Booking]:
         query = select(self.model).options(
             selectinload(self.model.time_slot),
@@ -0,0 +1,143 @@
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, delete, insert, func, cast, Date, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.booking import Booking, BookingStatus
+from app.models.booking_stats import BookingStatsDaily
+from app.models.time_slot import TimeSlot
+
+# (teacher_id, день booking_time, статус) -> изменение счетчика
+StatsKey = Tuple[int, date, BookingStatus]
+
+
+def _start_of_day(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+class CRUDBookingStats:
+    """Роллап статистики бронирований (booking_stats_daily)"""
+
+    model = BookingStatsDaily
+
+    async def apply(self, db: AsyncSession, changes: Dict[StatsKey, int]) -> None:
+        """Применить изменения счетчиков одним upsert (без commit)"""
+        rows = [
+            {"teacher_id": teacher_id, "day": day, "status": status, "count": delta}
+            for (teacher_id, day, status), delta in changes.items() if delta
+        ]
+        if not rows:
+            return
+        dialect = db.get_bind().dialect.name
+        upsert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        query = upsert(self.model).values(rows)
+        query = query.on_conflict_do_update(
+            index_elements=["teacher_id", "day", "status"],
+            set_={"count": self.model.count + query.excluded.count}
+        )
+        await db.execute(query)
+
+    async def get_stats(
+        self,
+        db: AsyncSession,
+        teacher_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """Статистика по статусам за окно booking_time (границы включительно).
+
+        Полные дни окна суммируются по роллапу, неполные крайние дни
+        считаются по bookings диапазоном booking_time.
+        """
+        counts = Counter()
+
+        # Полные дни — [first_day, last_day); день end_date всегда неполный
+        first_day = None
+        if start_date:
+            first_day = start_date.date()
+            if start_date.time() != time.min:
+                first_day += timedelta(days=1)
+        last_day = end_date.date() if end_date else None
+
+        if first_day and last_day and first_day >= last_day:
+            counts.update(await self._count_bookings(db, teacher_id, start_date, end_date))
+        else:
+            counts.update(await self._sum_rollup(db, teacher_id, first_day, last_day))
+            if start_date and start_date.time() != time.min:
+                counts.update(await self._count_bookings(
+                    db, teacher_id, start_date, _start_of_day(first_day), upper_inclusive=False
+                ))
+            if end_date:
+                counts.update(await self._count_bookings(db, teacher_id, _start_of_day(last_day), end_date))
+
+        return {status.value: counts.get(status, 0) for status in BookingStatus}
+
+    async def _sum_rollup(
+        self,
+        db: AsyncSession,
+        teacher_id: Optional[int],
+        first_day: Optional[date],
+        last_day: Optional[date]
+    ) -> Dict[BookingStatus, int]:
+        query = select(self.model.status, func.sum(self.model.count))
+        if teacher_id:
+            query = query.where(self.model.teacher_id == teacher_id)
+        if first_day:
+            query = query.where(self.model.day >= first_day)
+        if last_day:
+            query = query.where(self.model.day < last_day)
+        query = query.group_by(self.model.status)
+        return {status: total or 0 for status, total in (await db.execute(query)).all()}
+
+    async def _count_bookings(
+        self,
+        db: AsyncSession,
+        teacher_id: Optional[int],
+        start: datetime,
+        end: datetime,
+        upper_inclusive: bool = True
+    ) -> Dict[BookingStatus, int]:
+        query = select(Booking.status, func.count(Booking.id)).where(
+            Booking.is_deleted == False,
+            Booking.booking_time >= start,
+            Booking.booking_time <= end if upper_inclusive else Booking.booking_time < end
+        )
+        if teacher_id:
+            query = query.join(TimeSlot, Booking.time_slot_id == TimeSlot.id).where(
+                TimeSlot.teacher_id == teacher_id
+            )
+        query = query.group_by(Booking.status)
+        return dict((await db.execute(query)).all())
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        """Пересобрать роллап из bookings; вернуть число строк.
+
+        В PostgreSQL таблица блокируется до commit: параллельные бронирования
+        дождутся пересборки и применят свои изменения поверх нее.
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            await db.execute(text(f"LOCK TABLE {self.model.__tablename__} IN EXCLUSIVE MODE"))
+            day = cast(Booking.booking_time, Date)
+        else:
+            day = func.date(Booking.booking_time)
+
+        await db.execute(delete(self.model))
+        source = (
+            select(TimeSlot.teacher_id, day, Booking.status, func.count(Booking.id))
+            .join(TimeSlot, Booking.time_slot_id == TimeSlot.id)
+            .where(Booking.is_deleted == False)
+            .group_by(TimeSlot.teacher_id, day, Booking.status)
+        )
+        await db.execute(
+            insert(self.model).from_select(["teacher_id", "day", "status", "count"], source)
+        )
+        rows = await db.scalar(select(func.count()).select_from(self.model))
+        await db.commit()
+        return rows
+
+
+booking_stats = CRUDBookingStats()
@@ -3,18 +3,25 @@
 # pylance: reportGeneralTypeIssues=false
 # flake8: noqa
 # pylint: skip-file
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime, time, timedelta, timezone
-from sqlalchemy import select, and_, or_, text, func
+from sqlalchemy import select, insert, update, delete, and_, or_, text, func, case, literal
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 import uuid
 from app.core.config import get_settings
+from app.core.cache import availability_cache
 
 from app.crud.base import CRUDBase
-from app.models.time_slot import TimeSlot, SlotStatus
-from app.schemas.time_slot import TimeSlotCreate, TimeSlotUpdate, BulkSlotCreate
-from app.core.exceptions import SlotOverlapException, SlotNotFoundException
+from app.crud.waitlist import waitlist
+from app.models.time_slot import TimeSlot, SlotStatus, OVERLAP_CONSTRAINT
+from app.schemas.time_slot import TimeSlotCreate, TimeSlotUpdate, TimeSlotResponse, BulkSlotCreate
+from app.core.exceptions import (
+    SlotOverlapException, SlotNotFoundException, SlotAlreadyBookedException,
+    TeacherNotFoundException, TeacherSlugRequiredException,
+    InvalidTimeSlotException, TooManySlotsException
+)
 from app.models.teacher import Teacher
 
 
@@ -24,7 +31,62 @@ def to_naive_utc(dt: datetime) -> datetime:
     return dt
 
 
+def _overlap_or_reraise(exc: IntegrityError) -> Exception:
+    """Превратить нарушение ограничения пересечения в SlotOverlapException"""
+    if OVERLAP_CONSTRAINT in str(exc.orig):
+        return SlotOverlapException("Slot overlaps with existing slot")
+    return exc
+
+
+def _parse_hhmm(value: str) -> time:
+    hours, minutes = value.split(":")
+    return time(int(hours), int(minutes))
+
+
+def expand_bulk_slots(obj_in: BulkSlotCreate) -> List[Tuple[datetime, datetime]]:
+    """Развернуть расписание BulkSlotCreate в отсортированный список интервалов.
+
+    Интервалы, начинающиеся в прошлом, пропускаются.
+    """
+    window_start = _parse_hhmm(obj_in.start_time)
+    window_end = _parse_hhmm(obj_in.end_time)
+    if window_end <= window_start:
+        raise InvalidTimeSlotException()
+
+    days_of_week = set(obj_in.days_of_week)
+    now = datetime.utcnow()
+    day = to_naive_utc(obj_in.start_date).date()
+    last_day = to_naive_utc(obj_in.end_date).date()
+
+    intervals = []
+    while day <= last_day:
+        if day.weekday() in days_of_week:
+            start = datetime.combine(day, window_start)
+            if start >= now:
+                intervals.append((start, datetime.combine(day, window_end)))
+        day += timedelta(days=1)
+    return intervals
+
+
+def _find_first_overlap(
+    intervals: List[Tuple[datetime, datetime]],
+    existing: List[Tuple[datetime, datetime]]
+) -> Optional[Tuple[datetime, datetime]]:
+    """Найти первый интервал, пересекающийся с существующими (оба списка отсортированы по началу)"""
+    j = 0
+    for start, end in intervals:
+        # Существующие слоты, закончившиеся до начала текущего интервала,
+        # не пересекутся и со всеми последующими
+        while j < len(existing) and existing[j][1] <= start:
+            j += 1
+        if j < len(existing) and existing[j][0] < end:
+            return start, end
+    return None
+
+
 class CRUDTimeSlot(CRUDBase[TimeSlot, TimeSlotCreate, TimeSlotUpdate]):
+    cursor_sort_field = "start_time"
+
     async def get_available_slots(
         self, 
         db: AsyncSession, 
@@ -38,7 +100,9 @@ class CRUDTimeSlot(CRUDBase[TimeSlot, TimeSlotCreate, TimeSlotUpdate]):
         if end_date:
             end_date = to_naive_utc(end_date)
         query = select(self.model).where(
-            self.model.status == SlotStatus.AVAILABLE,
+            # Статус подставляется литералом, чтобы планировщик мог использовать
+            # частичные индексы по status = 'AVAILABLE' и в подготовленных запросах
+            self.model.status == literal(SlotStatus.AVAILABLE, self.model.status.type, literal_execute=True),
             self.model.is_deleted == False,
             self.model.current_bookings < self.model.max_students
         )
@@ -56,6 +120,48 @@ class CRUDTimeSlot(CRUDBase[TimeSlot, TimeSlotCreate, TimeSlotUpdate]):
         result = await db.execute(query)
         return result.scalars().all()
 
+    def stream_slots(
+        self,
+        db: AsyncSession,
+        teacher_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        batch_size: int = 1000
+    ):
+        """Пачки слотов для выгрузки с фильтрами списка слотов"""
+        conditions = []
+        if start_date:
+            conditions.append(self.model.start_time >= to_naive_utc(start_date))
+        if end_date:
+            conditions.append(self.model.end_time <= to_naive_utc(end_date))
+        return self.stream_batches(
+            db, {"teacher_id": teacher_id}, conditions, batch_size=batch_size
+        )
+
+    async def get_available_slots_cached(
+        self,
+        db: AsyncSession,
+        teacher_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[dict]:
+        """Получить доступные слоты через кэш доступности (сериализованными)"""
+        window = tuple(to_naive_utc(dt) if dt else None for dt in (start_date, end_date))
+
+        async def load() -> List[dict]:
+            slots = await self.get_available_slots(db, teacher_id, *window)
+            return [TimeSlotResponse.model_validate(slot).model_dump(mode="json") for slot in slots]
+
+        return await availability_cache.get_or_load(teacher_id, window, load)
+
+    async def invalidate_availability(self, *slots: Tuple[int, datetime, datetime]) -> None:
+        """Сбросить кэш доступности для слотов (teacher_id, start_time, end_time) после commit"""
+        by_teacher = {}
+        for teacher_id, start_time, end_time in slots:
+            by_teacher.setdefault(teacher_id, []).append((start_time, end_time))
+        for teacher_id, intervals in by_teacher.items():
+            await availability_cache.invalidate(teacher_id, intervals)
+
     async def check_slot_overlap(
         self, 
         db: AsyncSession, 
@@ -67,7 +173,7 @@ class CRUDTimeSlot(CRUDBase[TimeSlot, TimeSlotCreate, TimeSlotUpdate]):
         """Проверить пересечение слотов"""
         start_time = to_naive_utc(start_time)
         end_time = to_naive_utc(end_time)
-        query = select(self.model).where(
+        query = select(self.model.id).where(
             self.model.teacher_id == teacher_id,
             self.model.is_deleted == False,
             # Проверка пересечения: новый слот пересекается с существующим если:
@@ -81,91 +187,341 @@ class CRUDTimeSlot(CRUDBase[TimeSlot, TimeSlotCreate, TimeSlotUpdate]):
         if exclude_slot_id:
             query = query.where(self.model.id != exclude_slot_id)
 
-        result = await db.execute(query)
+        result = await db.execute(query.limit(1))
         return result.scalar_one_or_none() is not None
 
+    def has_overlap_constraint(self, db: AsyncSession) -> bool:
+        """Пересечения запрещены на уровне БД (EXCLUDE USING gist в PostgreSQL)"""
+        return db.get_bind().dialect.name == "postgresql"
+
     async def create_with_overlap_check(
         self, 
         db: AsyncSession, 
         obj_in: TimeSlotCreate
     ) -> TimeSlot:
         """Создать слот с проверкой пересечения"""
-        # Проверяем пересечение
-        has_overlap = await self.check_slot_overlap(
-            db, obj_in.teacher_id, obj_in.start_time, obj_in.end_time
-        )
+        return await self._insert_slot(db, obj_in, check_overlap=True)
 
-        if has_overlap:
-            raise SlotOverlapException("Slot overlaps with existing slot")
+    async def update_with_overlap_check(
+        self,
+        db: AsyncSession,
+        db_obj: TimeSlot,
+        obj_in: TimeSlotUpdate
+    ) -> TimeSlot:
+        """Обновить слот с проверкой пересечения при изменении времени"""
+        if not self.has_overlap_constraint(db) and (obj_in.start_time or obj_in.end_time):
+            has_overlap = await self.check_slot_overlap(
+                db,
+                db_obj.teacher_id,
+                obj_in.start_time or db_obj.start_time,
+                obj_in.end_time or db_obj.end_time,
+                exclude_slot_id=db_obj.id
+            )
+            if has_overlap:
+                raise SlotOverlapException("Slot overlaps with existing slot")
 
-        return await self.create(db, obj_in)
+        try:
+            return await self.update(db, db_obj, obj_in)
+        except IntegrityError as e:
+            await db.rollback()
+            raise _overlap_or_reraise(e)
+
+    async def update(
+        self,
+        db: AsyncSession,
+        db_obj: TimeSlot,
+        obj_in: TimeSlotUpdate
+    ) -> TimeSlot:
+        old = (db_obj.teacher_id, db_obj.start_time, db_obj.end_time)
+        slot = await super().update(db, db_obj, obj_in)
+        await self.invalidate_availability(old, (slot.teacher_id, slot.start_time, slot.end_time))
+        return slot
+
+    async def delete(self, db: AsyncSession, id: int) -> bool:
+        """Мягкое удаление слота"""
+        query = (
+            update(self.model)
+            .where(self.model.id == id)
+            .values(is_deleted=True)
+            .returning(self.model.teacher_id, self.model.start_time, self.model.end_time)
+        )
+        row = (await db.execute(query)).one_or_none()
+        await db.commit()
+        if row is None:
+            return False
+        await self.invalidate_availability(tuple(row))
+        return True
+
+    async def remove(self, db: AsyncSession, id: int) -> bool:
+        """Жесткое удаление слота"""
+        query = (
+            delete(self.model)
+            .where(self.model.id == id)
+            .returning(self.model.teacher_id, self.model.start_time, self.model.end_time)
+        )
+        row = (await db.execute(query)).one_or_none()
+        await db.commit()
+        if row is None:
+            return False
+        await self.invalidate_availability(tuple(row))
+        return True
+
+    async def allocate_meeting_urls(
+        self,
+        db: AsyncSession,
+        teacher_id: int,
+        count: int = 1
+    ) -> List[str]:
+        """Выделить count последовательных ссылок на встречу для преподавателя.
+
+        Счетчик teachers.meeting_url_seq сдвигается одним UPDATE ... RETURNING,
+        поэтому блок номеров резервируется атомарно, а строка преподавателя
+        остается заблокированной до конца транзакции.
+        """
+        settings = get_settings()
+        query = (
+            update(Teacher)
+            .where(Teacher.id == teacher_id, Teacher.is_deleted == False)
+            # updated_at не трогаем: выдача номеров не меняет профиль преподавателя
+            .values(meeting_url_seq=Teacher.meeting_url_seq + count, updated_at=Teacher.updated_at)
+            .returning(Teacher.slug, Teacher.meeting_url_seq)
+        )
+        row = (await db.execute(query)).one_or_none()
+        if row is None:
+            raise TeacherNotFoundException()
+        base, last_num = row
+        if not base:
+            # Счетчик уже сдвинут — откатываем, номера не выдаются
+            await db.rollback()
+            raise TeacherSlugRequiredException()
+        return [
+            f"{settings.SERVER_URL}/{base}-{num}"
+            for num in range(last_num - count + 1, last_num + 1)
+        ]
 
     async def create(
         self,
         db: AsyncSession,
         obj_in: TimeSlotCreate
     ) -> TimeSlot:
-        settings = get_settings()
-        # Получаем slug преподавателя
-        teacher_query = select(Teacher).where(Teacher.id == obj_in.teacher_id)
-        teacher_result = await db.execute(teacher_query)
-        teacher = teacher_result.scalar_one_or_none()
-        if not teacher:
-            raise Exception("Teacher not found")
-        if not teacher.slug:
-            raise Exception("Teacher slug is required for meeting_url generation")
-        base = teacher.slug
-        # Получаем все существующие ссылки с этим base
-        url_query = select(TimeSlot.meeting_url).where(TimeSlot.meeting_url.like(f"%/{base}-%"))
-        url_result = await db.execute(url_query)
-        existing_urls = [row[0] for row in url_result.fetchall() if row[0]]
-        numbers = []
-        for url in existing_urls:
-            try:
-                num = int(url.rsplit('-', 1)[-1])
-                numbers.append(num)
-            except Exception:
-                continue
-        next_num = max(numbers, default=0) + 1
-        meeting_url = f"{settings.SERVER_URL}/{base}-{next_num}"
+        return await self._insert_slot(db, obj_in, check_overlap=False)
+
+    async def _insert_slot(
+        self,
+        db: AsyncSession,
+        obj_in: TimeSlotCreate,
+        check_overlap: bool
+    ) -> TimeSlot:
+        meeting_url, = await self.allocate_meeting_urls(db, obj_in.teacher_id)
         # Привести start_time и end_time к naive UTC
         start_time = to_naive_utc(obj_in.start_time)
         end_time = to_naive_utc(obj_in.end_time)
+
+        # Без ограничения в БД проверяем пересечение сами; строка преподавателя
+        # уже заблокирована allocate_meeting_urls, так что проверка и вставка
+        # не перемежаются с параллельным созданием слотов того же преподавателя
+        if check_overlap and not self.has_overlap_constraint(db):
+            if await self.check_slot_overlap(db, obj_in.teacher_id, start_time, end_time):
+                await db.rollback()
+                raise SlotOverlapException("Slot overlaps with existing slot")
+
         data = obj_in.model_dump()
         data["start_time"] = start_time
         data["end_time"] = end_time
         data["meeting_url"] = meeting_url
-        db_obj = self.model(**data)
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        try:
+            db_obj = await self.insert_row(db, data)
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise _overlap_or_reraise(e)
+        await self.invalidate_availability((db_obj.teacher_id, start_time, end_time))
         return db_obj
 
-    async def book_slot(
-        self, 
-        db: AsyncSession, 
+    async def bulk_create(
+        self,
+        db: AsyncSession,
+        obj_in: BulkSlotCreate
+    ) -> List[TimeSlot]:
+        """Массово создать слоты по расписанию одной транзакцией.
+
+        Все интервалы проверяются на пересечение одним диапазонным запросом
+        и вставляются одним многострочным INSERT ... RETURNING.
+        """
+        settings = get_settings()
+        intervals = expand_bulk_slots(obj_in)
+        if not intervals:
+            return []
+        if len(intervals) > settings.BULK_SLOTS_MAX:
+            raise TooManySlotsException(
+                f"Schedule expands to {len(intervals)} slots, limit is {settings.BULK_SLOTS_MAX}"
+            )
+
+        # Резервируем блок номеров ссылок; строка преподавателя блокируется
+        # до commit, поэтому параллельные bulk_create одного преподавателя
+        # не пройдут проверку пересечений одновременно
+        meeting_urls = await self.allocate_meeting_urls(db, obj_in.teacher_id, len(intervals))
+
+        # Один запрос на весь диапазон вместо check_slot_overlap на каждый слот
+        existing_query = select(self.model.start_time, self.model.end_time).where(
+            self.model.teacher_id == obj_in.teacher_id,
+            self.model.is_deleted == False,
+            self.model.start_time < intervals[-1][1],
+            self.model.end_time > intervals[0][0]
+        ).order_by(self.model.start_time)
+        existing = [tuple(row) for row in (await db.execute(existing_query)).all()]
+        overlap = _find_first_overlap(intervals, existing)
+        if overlap:
+            await db.rollback()
+            raise SlotOverlapException(
+                f"Slot {overlap[0].isoformat()} - {overlap[1].isoformat()} overlaps with existing slot"
+            )
+
+        rows = [
+            self.model(
+                teacher_id=obj_in.teacher_id,
+                start_time=start,
+                end_time=end,
+                max_students=obj_in.max_students,
+                description=obj_in.description,
+                price=obj_in.price,
+                meeting_url=meeting_url
+            ).model_dump(exclude={"id"})
+            for (start, end), meeting_url in zip(intervals, meeting_urls)
+        ]
+        try:
+            result = await db.scalars(
+                insert(self.model).returning(self.model, sort_by_parameter_order=True),
+                rows
+            )
+            slots = result.all()
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise _overlap_or_reraise(e)
+        await self.invalidate_availability(*((obj_in.teacher_id, start, end) for start, end in intervals))
+        return slots
+
+    async def reserve_seat(
+        self,
+        db: AsyncSession,
         slot_id: int
     ) -> TimeSlot:
-        """Забронировать слот (увеличить current_bookings)"""
-        # Используем advisory lock для предотвращения race condition
-        await db.execute(text("SELECT pg_advisory_xact_lock(:slot_id)"), {"slot_id": slot_id})
+        """Занять место в слоте одним условным UPDATE (без commit).
+
+        Проверка вместимости и инкремент current_bookings выполняются атомарно;
+        блокировка строки слота держится до конца транзакции вызывающего.
+        """
+        query = self._reserve_query(self.model.id == slot_id).returning(self.model)
+        slot = (await db.scalars(query)).one_or_none()
+        if slot is None:
+            if await self.get(db, slot_id) is None:
+                raise SlotNotFoundException("Slot not found")
+            raise SlotAlreadyBookedException("Slot is not available")
+        return slot
 
-        slot = await self.get(db, slot_id)
-        if not slot:
-            raise SlotNotFoundException("Slot not found")
+    async def reserve_seats(
+        self,
+        db: AsyncSession,
+        slot_ids: List[int]
+    ) -> List[TimeSlot]:
+        """Занять по месту в нескольких слотах одним условным UPDATE (без commit).
 
-        if slot.current_bookings >= slot.max_students:
-            raise SlotOverlapException("Slot is already full")
+        Возвращает только слоты, в которых место действительно занято.
+        """
+        query = self._reserve_query(self.model.id.in_(slot_ids)).returning(self.model)
+        return (await db.scalars(query)).all()
 
-        # Увеличиваем количество бронирований
-        slot.current_bookings += 1
+    async def lock_slots(
+        self,
+        db: AsyncSession,
+        slot_ids: List[int]
+    ) -> List[TimeSlot]:
+        """Загрузить слоты одним запросом, блокируя строки в порядке id"""
+        query = (
+            select(self.model)
+            .where(self.model.id.in_(slot_ids))
+            .order_by(self.model.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return (await db.scalars(query)).all()
+
+    def _reserve_query(self, condition):
+        new_bookings = self.model.current_bookings + 1
+        return (
+            update(self.model)
+            .where(
+                condition,
+                self.model.is_deleted == False,
+                self.model.status == SlotStatus.AVAILABLE,
+                self.model.current_bookings < self.model.max_students
+            )
+            .values(
+                current_bookings=new_bookings,
+                # Если слот заполнен, меняем статус
+                status=case(
+                    (new_bookings >= self.model.max_students,
+                     literal(SlotStatus.BOOKED, self.model.status.type)),
+                    else_=self.model.status
+                )
+            )
+        )
+
+    async def release_seat(
+        self,
+        db: AsyncSession,
+        slot_id: int
+    ) -> TimeSlot:
+        """Освободить место в слоте одним условным UPDATE (без commit)"""
+        slots = await self.release_seats(db, {slot_id: 1})
+        if not slots:
+            raise SlotNotFoundException("Slot not found")
+        return slots[0]
 
-        # Если слот заполнен, меняем статус
-        if slot.current_bookings >= slot.max_students:
-            slot.status = SlotStatus.BOOKED
+    async def release_seats(
+        self,
+        db: AsyncSession,
+        counts: Dict[int, int]
+    ) -> List[TimeSlot]:
+        """Освободить места в нескольких слотах одним условным UPDATE (без commit).
+
+        counts — сколько мест освободить в каждом слоте (slot_id -> число).
+        """
+        released = case(counts, value=self.model.id, else_=0)
+        new_bookings = case(
+            (self.model.current_bookings > released, self.model.current_bookings - released),
+            else_=0
+        )
+        query = (
+            update(self.model)
+            .where(
+                self.model.id.in_(list(counts)),
+                self.model.is_deleted == False
+            )
+            .values(
+                current_bookings=new_bookings,
+                # Если слот освободился, меняем статус на доступный
+                status=case(
+                    (and_(self.model.status == SlotStatus.BOOKED,
+                          new_bookings < self.model.max_students),
+                     literal(SlotStatus.AVAILABLE, self.model.status.type)),
+                    else_=self.model.status
+                )
+            )
+            .returning(self.model)
+        )
+        return (await db.scalars(query)).all()
 
+    async def book_slot(
+        self, 
+        db: AsyncSession, 
+        slot_id: int
+    ) -> TimeSlot:
+        """Забронировать слот (увеличить current_bookings)"""
+        slot = await self.reserve_seat(db, slot_id)
         await db.commit()
-        await db.refresh(slot)
+        await self.invalidate_availability((slot.teacher_id, slot.start_time, slot.end_time))
         return slot
 
     async def unbook_slot(
@@ -173,23 +529,17 @@ class CRUDTimeSlot(CRUDBase[TimeSlot, TimeSlotCreate, TimeSlotUpdate]):
         db: AsyncSession, 
         slot_id: int
     ) -> TimeSlot:
-        """Отменить бронирование слота (уменьшить current_bookings)"""
-        # Используем advisory lock для предотвращения race condition
-        await db.execute(text("SELECT pg_advisory_xact_lock(:slot_id)"), {"slot_id": slot_id})
-
-        slot = await self.get(db, slot_id)
-        if not slot:
-            raise SlotNotFoundException("Slot not found")
-
-        if slot.current_bookings > 0:
-            slot.current_bookings -= 1
-
-        # Если слот освободился, меняем статус на доступный
-        if slot.current_bookings < slot.max_students and slot.status == SlotStatus.BOOKED:
-            slot.status = SlotStatus.AVAILABLE
-
+        """Отменить бронирование слота (уменьшить current_bookings).
+
+        Если очередь слота не пуста, место в той же транзакции переходит
+        к ее голове (бронирование PENDING), и current_bookings не меняется.
+        """
+        if await waitlist.promote(db, {slot_id: 1}):
+            slot = await self.get(db, slot_id)
+        else:
+            slot = await self.release_seat(db, slot_id)
         await db.commit()
-        await db.refresh(slot)
+        await self.invalidate_availability((slot.teacher_id, slot.start_time, slot.end_time))
         return slot
 
     async def get_teacher_schedule(
@@ -217,6 +567,32 @@ class CRUDTimeSlot(CRUDBase[TimeSlot, TimeSlotCreate, TimeSlotUpdate]):
         result = await db.execute(query)
         return result.scalars().all()
 
+    async def get_schedule_version(
+        self,
+        db: AsyncSession,
+        teacher_id: int
+    ) -> Optional[Tuple[Optional[datetime], int]]:
+        """Версия расписания одним агрегатом: (последнее изменение, число слотов).
+
+        None — преподавателя нет. Удаление слота меняет число слотов,
+        любое другое изменение (в т.ч. счетчика бронирований) — updated_at.
+        """
+        row = (await db.execute(
+            select(Teacher.updated_at, func.max(self.model.updated_at), func.count(self.model.id))
+            .select_from(Teacher)
+            .outerjoin(self.model, and_(
+                self.model.teacher_id == Teacher.id,
+                self.model.is_deleted == False
+            ))
+            .where(Teacher.id == teacher_id, Teacher.is_deleted == False)
+            .group_by(Teacher.id, Teacher.updated_at)
+        )).first()
+        if row is None:
+            return None
+        teacher_updated, slots_updated, count = row
+        stamps = [stamp for stamp in (teacher_updated, slots_updated) if stamp is not None]
+        return (max(stamps) if stamps else None), count
+
     async def get_with_details(self, db: AsyncSession, slot_id: int) -> Optional[TimeSlot]:
         query = select(self.model).options(
             selectinload(self.model.teacher),
@@ -0,0 +1,242 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, insert, update, and_, or_, case, exists, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.crud.base import CRUDBase
+from app.crud.booking_stats import booking_stats
+from app.models.booking import Booking, BookingStatus
+from app.models.time_slot import TimeSlot, SlotStatus
+from app.models.waitlist import WaitlistEntry, WaitlistStatus
+from app.schemas.waitlist import WaitlistJoin
+from app.core.exceptions import (
+    SlotNotFoundException, SlotInPastException, WaitlistEntryNotFoundException, WaitlistConflictException
+)
+
+
+class CRUDWaitlist(CRUDBase[WaitlistEntry, WaitlistJoin, WaitlistJoin]):
+    """Листы ожидания заполненных слотов.
+
+    Очередь слота упорядочена по приоритету (больший — раньше), внутри
+    приоритета — по порядку записи. Освободившиеся места передаются
+    головам очередей в транзакции отмены (promote).
+    """
+
+    def _waiting(self, entry=None):
+        entry = entry or self.model
+        return and_(entry.status == WaitlistStatus.WAITING, entry.is_deleted == False)  # type: ignore
+
+    def _active_booking(self, slot_id, student_id):
+        return exists().where(
+            Booking.time_slot_id == slot_id,
+            Booking.student_id == student_id,
+            Booking.status != BookingStatus.CANCELLED,
+            Booking.is_deleted == False  # type: ignore
+        )
+
+    def _position(self):
+        """Место ожидающей записи: число записей впереди + 1 (коррелированный подзапрос)"""
+        ahead = aliased(self.model)
+        return (
+            select(func.count(ahead.id) + 1)
+            .where(
+                ahead.time_slot_id == self.model.time_slot_id,
+                self._waiting(ahead),
+                or_(
+                    ahead.priority > self.model.priority,
+                    and_(ahead.priority == self.model.priority, ahead.id < self.model.id)
+                )
+            )
+            .correlate(self.model)
+            .scalar_subquery()
+        )
+
+    def _with_positions(self, rows) -> List[Tuple[WaitlistEntry, Optional[int]]]:
+        return [
+            (entry, position if entry.status == WaitlistStatus.WAITING else None)
+            for entry, position in rows
+        ]
+
+    async def join(self, db: AsyncSession, obj_in: WaitlistJoin) -> Tuple[WaitlistEntry, int]:
+        """Записать студента в очередь заполненного слота; вернуть (запись, место).
+
+        Слот, дубликаты и место в очереди проверяются одним запросом.
+        В очередь слота со свободными местами не записывают — его бронируют.
+        """
+        ahead = aliased(self.model)
+        query = select(
+            TimeSlot,
+            self._active_booking(TimeSlot.id, obj_in.student_id),
+            exists().where(
+                self.model.time_slot_id == TimeSlot.id,
+                self.model.student_id == obj_in.student_id,
+                self._waiting()
+            ),
+            select(func.count(ahead.id))
+            .where(ahead.time_slot_id == TimeSlot.id, self._waiting(ahead), ahead.priority >= obj_in.priority)
+            .scalar_subquery()
+        ).where(TimeSlot.id == obj_in.time_slot_id, TimeSlot.is_deleted == False)  # type: ignore
+        row = (await db.execute(query)).one_or_none()
+        if row is None:
+            raise SlotNotFoundException("Slot not found")
+        slot, booked, waiting, ahead_count = row
+        if slot.status == SlotStatus.CANCELLED:
+            raise WaitlistConflictException("Slot is cancelled")
+        if slot.start_time <= datetime.utcnow():
+            raise SlotInPastException("Cannot join waitlist for a past slot")
+        if slot.is_available:
+            raise WaitlistConflictException("Slot has free seats, book it directly")
+        if booked:
+            raise WaitlistConflictException("Student already booked this slot")
+        if waiting:
+            raise WaitlistConflictException("Student is already in the waitlist")
+
+        try:
+            entry = await self.insert_row(db, obj_in.model_dump())
+            await db.commit()
+        except IntegrityError:
+            # Параллельная запись того же студента: уникальный индекс ожидающих
+            await db.rollback()
+            raise WaitlistConflictException("Student is already in the waitlist")
+        return entry, ahead_count + 1
+
+    async def get_with_position(
+        self,
+        db: AsyncSession,
+        entry_id: int
+    ) -> Optional[Tuple[WaitlistEntry, Optional[int]]]:
+        """Запись и ее место в очереди (None, если запись уже не ожидает)"""
+        query = select(self.model, self._position()).where(
+            self.model.id == entry_id,
+            self.model.is_deleted == False  # type: ignore
+        )
+        row = (await db.execute(query)).one_or_none()
+        return self._with_positions([row])[0] if row else None
+
+    async def get_student_entries(
+        self,
+        db: AsyncSession,
+        student_id: int,
+        status: Optional[WaitlistStatus] = None
+    ) -> List[Tuple[WaitlistEntry, Optional[int]]]:
+        """Записи студента с местами в очередях, новые первыми"""
+        query = select(self.model, self._position()).where(
+            self.model.student_id == student_id,
+            self.model.is_deleted == False  # type: ignore
+        )
+        if status:
+            query = query.where(self.model.status == status)
+        query = query.order_by(self.model.id.desc())
+        return self._with_positions((await db.execute(query)).all())
+
+    async def leave(self, db: AsyncSession, entry_id: int) -> WaitlistEntry:
+        """Покинуть очередь: условный UPDATE только ожидающей записи"""
+        query = (
+            update(self.model)
+            .where(self.model.id == entry_id, self._waiting())
+            .values(status=WaitlistStatus.LEFT)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        entry = (await db.scalars(query)).one_or_none()
+        if entry is None:
+            current = await self.get(db, entry_id)
+            if current is None:
+                raise WaitlistEntryNotFoundException("Waitlist entry not found")
+            raise WaitlistConflictException(f"Cannot leave {current.status.value} waitlist entry")
+        await db.commit()
+        return entry
+
+    async def promote(
+        self,
+        db: AsyncSession,
+        seats: Dict[int, int],
+        stats: Optional[Counter] = None
+    ) -> List[Booking]:
+        """Передать освободившиеся места головам очередей (без commit).
+
+        seats — сколько мест освободилось в каждом слоте (slot_id -> число).
+        Головы очередей отбираются в WHERE того же UPDATE, что переводит их
+        в PROMOTED; на PostgreSQL строки, которые продвигает параллельная
+        транзакция, пропускаются (FOR UPDATE SKIP LOCKED). Для каждой
+        продвинутой записи вставляется бронирование PENDING — место в слоте
+        переходит к нему, current_bookings не меняется. Изменения роллапа
+        статистики добавляются в stats, если он передан, иначе применяются
+        сразу. Возвращает созданные бронирования.
+        """
+        now = datetime.utcnow()
+        # Псевдоним: иначе подзапрос коррелирует с изменяемой таблицей UPDATE
+        queue = aliased(self.model)
+        heads = [
+            self.model.id.in_(
+                select(queue.id)
+                .where(
+                    queue.time_slot_id == slot_id,
+                    self._waiting(queue),
+                    ~self._active_booking(slot_id, queue.student_id),
+                    exists().where(
+                        TimeSlot.id == slot_id,
+                        TimeSlot.is_deleted == False,  # type: ignore
+                        TimeSlot.status != SlotStatus.CANCELLED,
+                        TimeSlot.start_time > now
+                    )
+                )
+                .order_by(queue.priority.desc(), queue.id)
+                .limit(count)
+                .with_for_update(skip_locked=True)
+            )
+            for slot_id, count in seats.items() if count > 0
+        ]
+        if not heads:
+            return []
+
+        teacher_id = select(TimeSlot.teacher_id).where(TimeSlot.id == self.model.time_slot_id).scalar_subquery()
+        query = (
+            update(self.model)
+            .where(self._waiting(), or_(*heads))
+            .values(status=WaitlistStatus.PROMOTED, promoted_at=now)
+            .returning(self.model, teacher_id)
+            .execution_options(populate_existing=True)
+        )
+        rows = sorted((await db.execute(query)).all(), key=lambda row: row[0].id)
+        if not rows:
+            return []
+
+        bookings = (await db.scalars(
+            insert(Booking).returning(Booking, sort_by_parameter_order=True),
+            [
+                Booking(
+                    time_slot_id=entry.time_slot_id,
+                    student_id=entry.student_id,
+                    student_notes=entry.student_notes,
+                    booking_time=now,
+                    status=BookingStatus.PENDING
+                ).model_dump(exclude={"id"})
+                for entry, _ in rows
+            ]
+        )).all()
+        # Ссылка записи на бронирование; объекты сессии обновляются из RETURNING
+        (await db.scalars(
+            update(self.model)
+            .where(self.model.id.in_([entry.id for entry, _ in rows]))
+            .values(booking_id=case(
+                {entry.id: db_booking.id for (entry, _), db_booking in zip(rows, bookings)},
+                value=self.model.id
+            ))
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )).all()
+
+        changes = Counter((slot_teacher_id, now.date(), BookingStatus.PENDING) for _, slot_teacher_id in rows)
+        if stats is None:
+            await booking_stats.apply(db, changes)
+        else:
+            stats.update(changes)
+        return bookings
+
+
+waitlist = CRUDWaitlist(WaitlistEntry)
@@ -1,15 +1,23 @@
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
-from app.core.database import init_db, close_db, check_db_connection
+from app.core.database import init_db, close_db, check_db_connection, replica_router
+from app.core.dependencies import READ_PRIMARY_COOKIE
+from app.core.auth import password_hasher, token_cache
+from app.core.cache import availability_cache
+from app.core.ical import feed_cache
+from app.core import metrics
+from app.core.profiling import PROFILE_ID_HEADER, current_profile, profiler
+from app.core.tracing import STATUS_ERROR, TRACEPARENT_HEADER, current_span, tracer
 from app.api.v1 import api_router
-from app.core.exceptions import BaseCustomException
+from app.api.debug import router as debug_router
+from app.core.exceptions import BaseCustomException, NotModifiedException
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -36,10 +44,15 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Database initialization error: {e}")
 
+    # Фоновая проверка здоровья и отставания реплик
+    replica_router.start()
+
     yield
 
     # Shutdown
     logger.info("Shutting down application...")
+    password_hasher.shutdown()
+    tracer.close()
     await close_db()
 
 
@@ -65,9 +78,85 @@ if settings.BACKEND_CORS_ORIGINS:
     )
 
 
+async def read_your_writes(request: Request, call_next):
+    """После успешной записи клиент какое-то время читает с primary"""
+    response = await call_next(request)
+    if request.method in ("POST", "PUT", "PATCH", "DELETE") and response.status_code < 400:
+        response.set_cookie(
+            READ_PRIMARY_COOKIE, "1", max_age=settings.READ_YOUR_WRITES_SECONDS, httponly=True, samesite="lax"
+        )
+    return response
+
+
+# Без реплик все чтения и так идут на primary
+if replica_router.replicas:
+    app.middleware("http")(read_your_writes)
+
+
+async def profile_requests(request: Request, call_next):
+    """Сэмплирующий профиль запроса: по подписанному X-Debug-Profile или 1 из N"""
+    trigger = profiler.trigger(request)
+    if trigger is None:
+        return await call_next(request)
+
+    profile = profiler.start(trigger)
+    token = current_profile.set(profile)
+    try:
+        response = await call_next(request)
+    finally:
+        current_profile.reset(token)
+        profiler.finish(profile, request.method, metrics.route_label(request))
+    if trigger == "header":
+        response.headers[PROFILE_ID_HEADER] = str(profile.id)
+    return response
+
+
+if profiler.enabled:
+    app.middleware("http")(profile_requests)
+
+
+async def trace_requests(request: Request, call_next):
+    """Корневой спан запроса; CRUD-методы и SQL внутри него — дочерние спаны"""
+    root = tracer.start_trace(f"{request.method} {request.url.path}", request.headers.get(TRACEPARENT_HEADER))
+    if root is None:
+        return await call_next(request)
+
+    token = current_span.set(root)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        current_span.reset(token)
+        route = metrics.route_label(request)
+        root.name = f"{request.method} {route}"
+        root.attributes.update({
+            "http.request.method": request.method,
+            "http.route": route,
+            "url.path": request.url.path,
+            "http.response.status_code": status,
+        })
+        if status >= 500:
+            root.status = STATUS_ERROR
+        tracer.finish_trace(root)
+    response.headers[TRACEPARENT_HEADER] = f"00-{root.trace.trace_id}-{root.span_id}-01"
+    return response
+
+
+if tracer.enabled:
+    app.middleware("http")(trace_requests)
+
+# Регистрируется последним — внешний слой, замеряет весь запрос.
+# Нужен и без /metrics: RequestStats читают бюджеты и журнал медленных запросов
+if metrics.sql_events_enabled():
+    app.middleware("http")(metrics.metrics_middleware)
+
+
 # Глобальный обработчик исключений
 @app.exception_handler(BaseCustomException)
 async def custom_exception_handler(request, exc: BaseCustomException):
+    if isinstance(exc, NotModifiedException):
+        return Response(status_code=exc.status_code, headers=exc.headers)
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail}
@@ -106,9 +195,38 @@ async def health_check():
         )
 
 
+@metrics.registry.collector("app_cache", "Статистика кэшей приложения")
+def cache_stats():
+    yield from metrics.stats_samples(availability_cache.stats(), cache="availability")
+    yield from metrics.stats_samples(token_cache.stats(), cache="token")
+    yield from metrics.stats_samples(
+        {"entries": len(feed_cache), "bytes": feed_cache.size_bytes, "evictions": feed_cache.evictions},
+        cache="ics_feed"
+    )
+
+
+@metrics.registry.collector("password_hasher", "Пул хэширования паролей")
+def password_hasher_stats():
+    yield "workers", {}, password_hasher.workers
+    yield "pending", {}, password_hasher.pending
+    yield "rejected", {}, password_hasher.rejected
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Метрики в текстовом формате Prometheus"""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # Подключение API роутеров
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Диагностика (медленные запросы, профили, трассы) — только по явному включению
+if settings.DEBUG_ENDPOINTS_ENABLED:
+    app.include_router(debug_router, prefix="/debug", tags=["debug"], include_in_schema=False)
+
 
 # Root endpoint
 @app.get("/")
@@ -3,6 +3,8 @@ from .teacher import Teacher
 from .student import Student
 from .time_slot import TimeSlot, SlotStatus
 from .booking import Booking, BookingStatus
+from .booking_stats import BookingStatsDaily
+from .waitlist import WaitlistEntry, WaitlistStatus
 
 __all__ = [
     "BaseModel",
@@ -11,5 +13,8 @@ __all__ = [
     "TimeSlot",
     "SlotStatus",
     "Booking",
-    "BookingStatus"
+    "BookingStatus",
+    "BookingStatsDaily",
+    "WaitlistEntry",
+    "WaitlistStatus"
 ]
@@ -19,7 +19,9 @@ class BaseModel(SQLModel):
         default_factory=datetime.utcnow,
         sa_column_kwargs={
             "nullable": True,
-            "onupdate": func.now()
+            # Как и default_factory: UTC с микросекундами, а не now() сервера БД —
+            # по max(updated_at) строятся версии календарных лент
+            "onupdate": datetime.utcnow
         }
     )
     is_deleted: bool = Field(default=False)
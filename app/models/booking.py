@@ -3,6 +3,7 @@ from typing import Optional
 from enum import Enum
 
 from sqlmodel import Field, Relationship
+from sqlalchemy import Index, text
 
 from app.models.base import BaseModel
 
@@ -18,6 +19,28 @@ class BookingStatus(str, Enum):
 class Booking(BaseModel, table=True):
     """Модель бронирования"""
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Бронирование студента для конкретного слота
+        Index(
+            "ix_bookings_student_slot", "student_id", "time_slot_id",
+            postgresql_where=text("is_deleted = false"),
+            sqlite_where=text("is_deleted = 0")
+        ),
+        # Бронирования студента по времени
+        Index(
+            "ix_bookings_student_booking_time", "student_id", "booking_time",
+            postgresql_where=text("is_deleted = false"),
+            sqlite_where=text("is_deleted = 0")
+        ),
+        # Бронирования слота (join со слотами и selectinload без фильтра is_deleted)
+        Index("ix_bookings_time_slot", "time_slot_id"),
+        # Фильтр по статусу и статистика
+        Index(
+            "ix_bookings_status_booking_time", "status", "booking_time",
+            postgresql_where=text("is_deleted = false"),
+            sqlite_where=text("is_deleted = 0")
+        ),
+    )
 
     time_slot_id: int = Field(foreign_key="time_slots.id")
     student_id: int = Field(foreign_key="students.id")
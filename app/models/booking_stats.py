@@ -0,0 +1,19 @@
+from datetime import date
+
+from sqlmodel import Field, SQLModel
+
+from app.models.booking import BookingStatus
+
+
+class BookingStatsDaily(SQLModel, table=True):
+    """Счетчики бронирований по преподавателю, дню бронирования и статусу.
+
+    Поддерживается транзакционно операциями CRUDBooking; пересобирается
+    командой app.commands.rebuild_booking_stats.
+    """
+    __tablename__ = "booking_stats_daily"
+
+    teacher_id: int = Field(foreign_key="teachers.id", primary_key=True)
+    day: date = Field(primary_key=True, description="День booking_time (UTC)")
+    status: BookingStatus = Field(primary_key=True)
+    count: int = Field(default=0)
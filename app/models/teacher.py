@@ -15,6 +15,7 @@ class Teacher(BaseModel, table=True):
     is_active: bool = Field(default=True)
     slug: Optional[str] = Field(default=None, max_length=20, unique=True, description="Уникальный username/slug для учителя")
     password_hash: Optional[str] = Field(default=None, max_length=128, description="Хеш пароля учителя")
+    meeting_url_seq: int = Field(default=0, description="Последний выданный номер ссылки на встречу")
 
     # Связи
     time_slots: List["TimeSlot"] = Relationship(back_populates="teacher")
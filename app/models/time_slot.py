@@ -3,10 +3,16 @@ from typing import Optional, List, TYPE_CHECKING
 from enum import Enum
 
 from sqlmodel import Field, Relationship, SQLModel
+from sqlalchemy import DDL, Index, event, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 
 from app.models.base import BaseModel
 
 
+# Запрет пересечения неудаленных слотов одного преподавателя (только PostgreSQL)
+OVERLAP_CONSTRAINT = "ex_time_slots_teacher_no_overlap"
+
+
 class SlotStatus(str, Enum):
     """Статусы временного слота"""
     AVAILABLE = "available"
@@ -17,6 +23,33 @@ class SlotStatus(str, Enum):
 class TimeSlot(BaseModel, table=True):
     """Модель временного слота"""
     __tablename__ = "time_slots"
+    __table_args__ = (
+        # Проверка пересечений и расписание преподавателя
+        Index(
+            "ix_time_slots_teacher_start", "teacher_id", "start_time",
+            postgresql_where=text("is_deleted = false"),
+            sqlite_where=text("is_deleted = 0")
+        ),
+        # Доступные слоты преподавателя
+        Index(
+            "ix_time_slots_available_teacher_start", "teacher_id", "start_time",
+            postgresql_where=text("is_deleted = false AND status = 'AVAILABLE'"),
+            sqlite_where=text("is_deleted = 0 AND status = 'AVAILABLE'")
+        ),
+        # Доступные слоты всех преподавателей
+        Index(
+            "ix_time_slots_available_start", "start_time",
+            postgresql_where=text("is_deleted = false AND status = 'AVAILABLE'"),
+            sqlite_where=text("is_deleted = 0 AND status = 'AVAILABLE'")
+        ),
+        ExcludeConstraint(
+            ("teacher_id", "="),
+            (text("tsrange(start_time, end_time)"), "&&"),
+            name=OVERLAP_CONSTRAINT,
+            using="gist",
+            where=text("NOT is_deleted")
+        ).ddl_if(dialect="postgresql"),
+    )
 
     teacher_id: int = Field(foreign_key="teachers.id")
     start_time: datetime = Field(index=True)
@@ -46,6 +79,13 @@ class TimeSlot(BaseModel, table=True):
         """Проверка заполненности слота"""
         return self.current_bookings >= self.max_students
 
+# Оператор "=" для integer в gist-индексе дает расширение btree_gist
+event.listen(
+    TimeSlot.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql")
+)
+
 if TYPE_CHECKING:
     from app.models.teacher import Teacher
     from app.models.booking import Booking
@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import Optional
+from enum import Enum
+
+from sqlmodel import Field
+from sqlalchemy import Index, text
+
+from app.models.base import BaseModel
+
+
+class WaitlistStatus(str, Enum):
+    """Статусы записи в листе ожидания"""
+    WAITING = "waiting"
+    PROMOTED = "promoted"
+    LEFT = "left"
+
+
+class WaitlistEntry(BaseModel, table=True):
+    """Запись студента в лист ожидания заполненного слота"""
+    __tablename__ = "waitlist_entries"
+    __table_args__ = (
+        # Очередь слота в порядке продвижения: приоритет по убыванию, затем порядок записи
+        Index(
+            "ix_waitlist_entries_queue", "time_slot_id", text("priority DESC"), "id",
+            postgresql_where=text("status = 'WAITING' AND is_deleted = false"),
+            sqlite_where=text("status = 'WAITING' AND is_deleted = 0")
+        ),
+        # Студент стоит в очереди слота не больше одного раза
+        Index(
+            "uq_waitlist_entries_waiting_student", "time_slot_id", "student_id",
+            unique=True,
+            postgresql_where=text("status = 'WAITING' AND is_deleted = false"),
+            sqlite_where=text("status = 'WAITING' AND is_deleted = 0")
+        ),
+        # Записи студента
+        Index("ix_waitlist_entries_student", "student_id"),
+    )
+
+    time_slot_id: int = Field(foreign_key="time_slots.id")
+    student_id: int = Field(foreign_key="students.id")
+    priority: int = Field(default=0)  # больший приоритет продвигается раньше
+    status: WaitlistStatus = Field(default=WaitlistStatus.WAITING)
+    student_notes: Optional[str] = Field(default=None, max_length=500)
+    promoted_at: Optional[datetime] = Field(default=None)
+    booking_id: Optional[int] = Field(default=None, foreign_key="bookings.id")
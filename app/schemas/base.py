@@ -19,6 +19,13 @@ class PaginationParams(BaseModel):
     """Параметры пагинации"""
     page: int = Field(default=1, ge=1, description="Номер страницы")
     size: int = Field(default=20, ge=1, le=100, description="Размер страницы")
+    cursor: Optional[str] = Field(default=None, description="Курсор keyset-пагинации")
+    estimate_total: bool = Field(default=False, description="Вернуть оценку общего количества")
+
+    @property
+    def is_cursor(self) -> bool:
+        """Включен ли режим keyset-пагинации (пустой курсор — первая страница)"""
+        return self.cursor is not None
 
     @property
     def offset(self) -> int:
@@ -30,12 +37,17 @@ class PaginationParams(BaseModel):
 
 
 class PaginatedResponse(BaseModel):
-    """Пагинированный ответ"""
-    total: int
-    page: int
+    """Пагинированный ответ.
+
+    В режиме курсора total и pages не считаются (total может быть оценкой
+    при estimate_total), а следующая страница запрашивается по next_cursor.
+    """
+    total: Optional[int] = None
+    page: Optional[int] = None
     size: int
-    pages: int
+    pages: Optional[int] = None
     items: list
+    next_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
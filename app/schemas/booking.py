@@ -1,6 +1,7 @@
-from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, Field
+from datetime import date, datetime
+from enum import Enum
+from typing import List, Optional
+from pydantic import BaseModel, Field, validator, model_validator
 
 from app.models.booking import BookingStatus
 from app.schemas.base import BaseResponse
@@ -41,6 +42,20 @@ class BookingResponse(BaseResponse):
         from_attributes = True
 
 
+class TeacherBookingRow(BaseModel):
+    """Плоская строка бронирования преподавателя (без вложенных объектов)"""
+    id: int
+    time_slot_id: int
+    student_id: int
+    status: BookingStatus
+    booking_time: datetime
+    student_notes: Optional[str]
+    start_time: datetime
+    end_time: datetime
+    student_name: str
+    student_email: str
+
+
 class BookingWithDetails(BookingResponse):
     """Схема бронирования с деталями"""
     time_slot: "TimeSlotResponse"
@@ -60,6 +75,88 @@ class BookingCancel(BaseModel):
     reason: Optional[str] = Field(None, max_length=500)
 
 
+class BatchBookingMode(str, Enum):
+    """Режим пакетного бронирования"""
+    ALL_OR_NOTHING = "all_or_nothing"
+    BEST_EFFORT = "best_effort"
+
+
+class BookingBatchCreate(BaseModel):
+    """Схема пакетного бронирования нескольких слотов"""
+    student_id: int = Field(gt=0)
+    time_slot_ids: List[int] = Field(min_length=1)
+    student_notes: Optional[str] = Field(default=None, max_length=500)
+    mode: BatchBookingMode = BatchBookingMode.ALL_OR_NOTHING
+
+    @validator('time_slot_ids')
+    def validate_time_slot_ids(cls, v):
+        if len(set(v)) != len(v):
+            raise ValueError('Time slot ids must be unique')
+        if any(slot_id <= 0 for slot_id in v):
+            raise ValueError('Time slot ids must be positive')
+        return v
+
+
+class BookingBatchItem(BaseModel):
+    """Результат бронирования одного слота из пакета"""
+    time_slot_id: int
+    booked: bool
+    error: Optional[str] = None
+    booking: Optional[BookingResponse] = None
+
+
+class BookingBatchResponse(BaseModel):
+    """Схема ответа пакетного бронирования"""
+    mode: BatchBookingMode
+    booked: int
+    failed: int
+    items: List[BookingBatchItem]
+
+
+class BookingBulkTransition(BaseModel):
+    """Выбор бронирований для массового перехода: список id, слот или день преподавателя"""
+    booking_ids: Optional[List[int]] = Field(default=None, min_length=1)
+    time_slot_id: Optional[int] = Field(default=None, gt=0)
+    teacher_id: Optional[int] = Field(default=None, gt=0)
+    day: Optional[date] = None
+    teacher_notes: Optional[str] = Field(default=None, max_length=500, description="Для отмены — причина")
+
+    @validator('booking_ids')
+    def validate_booking_ids(cls, v):
+        if v is not None and len(set(v)) != len(v):
+            raise ValueError('Booking ids must be unique')
+        return v
+
+    @model_validator(mode='after')
+    def validate_selector(self):
+        selectors = [
+            self.booking_ids is not None,
+            self.time_slot_id is not None,
+            self.teacher_id is not None or self.day is not None,
+        ]
+        if sum(selectors) != 1:
+            raise ValueError('Specify exactly one of booking_ids, time_slot_id or teacher_id with day')
+        if (self.teacher_id is None) != (self.day is None):
+            raise ValueError('teacher_id and day must be specified together')
+        return self
+
+
+class BookingBulkItem(BaseModel):
+    """Результат перехода одного бронирования"""
+    booking_id: int
+    updated: bool
+    error: Optional[str] = None
+    booking: Optional[BookingResponse] = None
+
+
+class BookingBulkResponse(BaseModel):
+    """Схема ответа массового перехода"""
+    status: BookingStatus
+    updated: int
+    failed: int
+    items: List[BookingBulkItem]
+
+
 # Импорты будут добавлены в конце файла
 from app.schemas.time_slot import TimeSlotResponse
 from app.schemas.student import StudentResponse
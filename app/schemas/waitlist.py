@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+
+from app.models.waitlist import WaitlistStatus
+from app.schemas.base import BaseResponse
+
+
+class WaitlistJoin(BaseModel):
+    """Схема записи в лист ожидания слота"""
+    time_slot_id: int = Field(gt=0)
+    student_id: int = Field(gt=0)
+    priority: int = Field(default=0, ge=0, le=100, description="Больший приоритет продвигается раньше")
+    student_notes: Optional[str] = Field(default=None, max_length=500)
+
+
+class WaitlistEntryResponse(BaseResponse):
+    """Схема ответа записи в листе ожидания"""
+    time_slot_id: int
+    student_id: int
+    priority: int
+    status: WaitlistStatus
+    student_notes: Optional[str]
+    promoted_at: Optional[datetime]
+    booking_id: Optional[int]
+    position: Optional[int] = Field(default=None, description="Место в очереди (1 — следующий); только для ожидающих")
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,68 @@
+"""Бенчмарк: пакетное бронирование курса против последовательных create_booking.
+
+    python -m benchmarks.bench_batch_booking --students 50 --weeks 12
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from app.crud import booking, time_slot
+from app.schemas.booking import BookingCreate, BookingBatchCreate
+from app.schemas.time_slot import BulkSlotCreate
+from benchmarks.common import bench_session, create_teacher, create_student, Timer, report
+
+
+async def create_course(db, weeks: int, students: int):
+    """Еженедельные слоты курса, в которые помещаются все студенты"""
+    teacher = await create_teacher(db)
+    first_day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    slots = await time_slot.bulk_create(db, BulkSlotCreate(
+        teacher_id=teacher.id,
+        start_date=first_day,
+        end_date=first_day + timedelta(weeks=weeks, days=-1),
+        start_time="10:00",
+        end_time="11:00",
+        days_of_week=[first_day.weekday()],
+        max_students=10
+    ))
+    # Схема ограничивает max_students десятью; для бенчмарка расширяем напрямую
+    for slot in slots:
+        slot.max_students = students
+    await db.commit()
+    return [slot.id for slot in slots]
+
+
+async def main(students: int, weeks: int) -> None:
+    async with bench_session() as (engine, session_maker):
+        async with session_maker() as db:
+            sequential_slots = await create_course(db, weeks, students)
+            batch_slots = await create_course(db, weeks, students)
+            student_ids = [(await create_student(db)).id for _ in range(students)]
+
+        async with session_maker() as db:
+            with Timer() as sequential:
+                for student_id in student_ids:
+                    for slot_id in sequential_slots:
+                        await booking.create_booking(db, BookingCreate(time_slot_id=slot_id, student_id=student_id))
+
+        async with session_maker() as db:
+            with Timer() as batch:
+                for student_id in student_ids:
+                    result = await booking.create_bookings_batch(db, BookingBatchCreate(
+                        student_id=student_id, time_slot_ids=batch_slots
+                    ))
+                    assert result.booked == weeks
+
+        report("create_booking x weeks", students=students, total=sequential.elapsed,
+               per_student=sequential.elapsed / students)
+        report("create_bookings_batch", students=students, total=batch.elapsed,
+               per_student=batch.elapsed / students)
+        print(f"speedup: {sequential.elapsed / batch.elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=50)
+    parser.add_argument("--weeks", type=int, default=12)
+    args = parser.parse_args()
+    asyncio.run(main(args.students, args.weeks))
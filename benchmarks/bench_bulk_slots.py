@@ -0,0 +1,52 @@
+"""Бенчмарк: массовое создание слотов против N вызовов create_with_overlap_check.
+
+    python -m benchmarks.bench_bulk_slots --slots 300
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from app.crud import time_slot
+from app.schemas.time_slot import TimeSlotCreate, BulkSlotCreate
+from benchmarks.common import bench_session, create_teacher, Timer, report
+
+
+async def main(slots: int) -> None:
+    async with bench_session() as (engine, session_maker):
+        first_day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+        async with session_maker() as db:
+            teacher = await create_teacher(db)
+            with Timer() as sequential:
+                for day in range(slots):
+                    start = first_day + timedelta(days=day, hours=10)
+                    await time_slot.create_with_overlap_check(db, TimeSlotCreate(
+                        teacher_id=teacher.id,
+                        start_time=start,
+                        end_time=start + timedelta(hours=1)
+                    ))
+
+        async with session_maker() as db:
+            teacher = await create_teacher(db)
+            with Timer() as bulk:
+                created = await time_slot.bulk_create(db, BulkSlotCreate(
+                    teacher_id=teacher.id,
+                    start_date=first_day,
+                    end_date=first_day + timedelta(days=slots - 1),
+                    start_time="10:00",
+                    end_time="11:00",
+                    days_of_week=list(range(7))
+                ))
+            assert len(created) == slots
+
+        report("create_with_overlap_check x N", slots=slots, total=sequential.elapsed,
+               per_slot=sequential.elapsed / slots)
+        report("bulk_create", slots=slots, total=bulk.elapsed, per_slot=bulk.elapsed / slots)
+        print(f"speedup: {sequential.elapsed / bulk.elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slots", type=int, default=300)
+    args = parser.parse_args()
+    asyncio.run(main(args.slots))
@@ -0,0 +1,116 @@
+"""Бенчмарк: условный GET на повторяющемся опросе.
+
+    python -m benchmarks.bench_conditional_get --clients 20 --rounds 50
+
+Клиенты по кругу опрашивают список слотов преподавателя, страницу
+преподавателей и отдельные слоты, отправляя If-None-Match с последним
+полученным ETag. Между раундами меняется небольшая доля слотов.
+Один и тот же сценарий прогоняется с CONDITIONAL_GET_ENABLED=false и true;
+сравниваются байты тел ответов и процессорное время (всего процесса,
+вместе с клиентом httpx — экономия на стороне сервера больше).
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient
+
+from app.main import app
+from app.core.config import get_settings
+from app.core.dependencies import get_db
+from app.crud import time_slot
+from app.schemas.time_slot import TimeSlotCreate, TimeSlotUpdate
+from benchmarks.common import bench_session, create_teacher, report
+
+SLOTS_PER_TEACHER = 40
+
+
+async def seed(session_maker, teachers: int):
+    async with session_maker() as db:
+        slot_ids = {}
+        start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+        for _ in range(teachers):
+            owner = await create_teacher(db)
+            slot_ids[owner.id] = []
+            for hour in range(SLOTS_PER_TEACHER):
+                slot = await time_slot.create(db, TimeSlotCreate(
+                    teacher_id=owner.id,
+                    start_time=start + timedelta(hours=hour),
+                    end_time=start + timedelta(hours=hour, minutes=50),
+                    description="Регулярное занятие"
+                ))
+                slot_ids[owner.id].append(slot.id)
+        return slot_ids
+
+
+async def replay(session_maker, slot_ids, clients: int, rounds: int, write_ratio: float, seed_value: int):
+    """Прогнать сценарий опроса; вернуть (байты тел, число 304, CPU-секунды)"""
+    rng = random.Random(seed_value)
+    teacher_ids = list(slot_ids)
+    # Каждый клиент следит за преподавателем и несколькими его слотами
+    watched = []
+    for n in range(clients):
+        teacher_id = teacher_ids[n % len(teacher_ids)]
+        urls = [f"/api/v1/slots/?teacher_id={teacher_id}&size=50", "/api/v1/teachers/?size=20"]
+        urls += [f"/api/v1/slots/{slot_id}" for slot_id in rng.sample(slot_ids[teacher_id], 3)]
+        watched.append(urls)
+    etags = {}
+    body_bytes = not_modified = 0
+
+    async def override_get_db():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    started = time.process_time()
+    try:
+        async with AsyncClient(app=app, base_url="http://bench") as client:
+            for _ in range(rounds):
+                for n, urls in enumerate(watched):
+                    for url in urls:
+                        headers = {"If-None-Match": etags[n, url]} if (n, url) in etags else {}
+                        response = await client.get(url, headers=headers)
+                        body_bytes += len(response.content)
+                        if response.status_code == 304:
+                            not_modified += 1
+                        elif "etag" in response.headers:
+                            etags[n, url] = response.headers["etag"]
+                # Изменения между раундами
+                async with session_maker() as db:
+                    for teacher_id in teacher_ids:
+                        if rng.random() < write_ratio:
+                            slot = await time_slot.get(db, rng.choice(slot_ids[teacher_id]))
+                            await time_slot.update(db, slot, TimeSlotUpdate(description=f"Изменено {rng.random():.6f}"))
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+    return body_bytes, not_modified, time.process_time() - started
+
+
+async def main(teachers: int, clients: int, rounds: int, write_ratio: float) -> None:
+    # Лог каждого запроса httpx искажает замер CPU
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    settings = get_settings()
+    async with bench_session() as (engine, session_maker):
+        slot_ids = await seed(session_maker, teachers)
+        results = {}
+        for enabled in (False, True):
+            settings.CONDITIONAL_GET_ENABLED = enabled
+            results[enabled] = await replay(session_maker, slot_ids, clients, rounds, write_ratio, seed_value=1)
+            body_bytes, not_modified, cpu = results[enabled]
+            report(f"conditional GET {'on' if enabled else 'off'}",
+                   requests=clients * 5 * rounds, bytes=body_bytes, not_modified=not_modified, cpu=cpu)
+        off, on = results[False], results[True]
+        print(f"bytes saved: {1 - on[0] / off[0]:.1%}, cpu saved: {1 - on[2] / off[2]:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teachers", type=int, default=10)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="доля преподавателей с изменением за раунд")
+    args = parser.parse_args()
+    asyncio.run(main(args.teachers, args.clients, args.rounds, args.write_ratio))
@@ -0,0 +1,105 @@
+"""Бенчмарк: p99 /slots/available во время шторма логинов.
+
+    python -m benchmarks.bench_login_storm --logins 50 --probes 200
+
+Сравниваются bcrypt прямо в event loop (workers=0, прежнее поведение)
+и выделенный пул потоков/процессов.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient
+
+from app.main import app
+from app.core import auth
+from app.core.cache import availability_cache
+from app.core.dependencies import get_db
+from app.models.student import Student
+from app.models.time_slot import TimeSlot
+from benchmarks.common import bench_session, create_teacher, report
+
+PASSWORD = "storm-password"
+
+
+async def seed(session_maker) -> None:
+    async with session_maker() as db:
+        teacher = await create_teacher(db)
+        start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+        db.add_all([
+            TimeSlot(teacher_id=teacher.id, start_time=start + timedelta(hours=h),
+                     end_time=start + timedelta(hours=h, minutes=50))
+            for h in range(50)
+        ])
+        db.add(Student(name="Storm Student", email="storm@test.com", slug="storm",
+                       password_hash=auth.hash_password(PASSWORD)))
+        await db.commit()
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def run(hasher: auth.PasswordHasher, logins: int, probes: int) -> dict:
+    auth.password_hasher = hasher
+    await availability_cache.clear()
+    latencies = []
+    statuses = []
+
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+        async def login():
+            response = await client.post("/api/v1/auth/student/login",
+                                         json={"slug_or_email": "storm", "password": PASSWORD})
+            statuses.append(response.status_code)
+
+        async def probe():
+            for _ in range(probes):
+                started = time.perf_counter()
+                response = await client.get("/api/v1/slots/available")
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200
+                await asyncio.sleep(0.001)
+
+        await asyncio.gather(probe(), *(login() for _ in range(logins)))
+
+    hasher.shutdown()
+    return {
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        "ok": statuses.count(200),
+        "busy": statuses.count(503),
+    }
+
+
+async def main(logins: int, probes: int, workers: int) -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    async with bench_session() as (engine, session_maker):
+        await seed(session_maker)
+
+        async def override_get_db():
+            async with session_maker() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            modes = [
+                ("inline (event loop)", auth.PasswordHasher(0, 0)),
+                (f"threads x{workers}", auth.PasswordHasher(workers, logins)),
+                (f"processes x{workers}", auth.PasswordHasher(workers, logins, use_processes=True)),
+            ]
+            for title, hasher in modes:
+                report(title, logins=logins, **await run(hasher, logins, probes))
+        finally:
+            app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.probes, args.workers))
@@ -0,0 +1,91 @@
+"""Бенчмарк: первая и глубокая страница /bookings/ в режиме OFFSET и курсора.
+
+    python -m benchmarks.bench_pagination --rows 1000000 --page 5000
+
+Для 1M строк используйте PostgreSQL (BENCH_DATABASE_URL).
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from app.crud import booking
+from app.crud.base import encode_cursor
+from app.models.booking import Booking, BookingStatus
+from app.models.time_slot import TimeSlot
+from app.schemas.base import PaginationParams
+from benchmarks.common import bench_session, create_teacher, create_student, Timer, report
+
+SIZE = 20
+CHUNK = 10000
+
+
+async def seed(session_maker, rows: int) -> None:
+    async with session_maker() as db:
+        teacher = await create_teacher(db)
+        student = await create_student(db)
+        start = datetime.utcnow() + timedelta(days=1)
+        slot = TimeSlot(teacher_id=teacher.id, start_time=start, end_time=start + timedelta(hours=1))
+        db.add(slot)
+        await db.commit()
+
+        base_time = datetime(2024, 1, 1)
+        now = datetime.utcnow()
+        for offset in range(0, rows, CHUNK):
+            await db.execute(insert(Booking), [
+                {
+                    "time_slot_id": slot.id,
+                    "student_id": student.id,
+                    "status": BookingStatus.PENDING,
+                    "booking_time": base_time + timedelta(seconds=i),
+                    "created_at": now,
+                    "updated_at": now,
+                    "is_deleted": False,
+                }
+                for i in range(offset, min(offset + CHUNK, rows))
+            ])
+        await db.commit()
+
+
+async def measure(session_maker, pagination: PaginationParams, repeat: int = 5) -> float:
+    best = None
+    for _ in range(repeat):
+        async with session_maker() as db:
+            with Timer() as timer:
+                page = await booking.get_multi(db, pagination)
+            assert len(page.items) == SIZE
+        best = timer.elapsed if best is None else min(best, timer.elapsed)
+    return best
+
+
+async def main(rows: int, page: int) -> None:
+    async with bench_session() as (engine, session_maker):
+        await seed(session_maker, rows)
+
+        # Курсор, соответствующий началу страницы page (вычисляется вне замера)
+        async with session_maker() as db:
+            last = (await db.execute(
+                select(Booking.booking_time, Booking.id)
+                .order_by(Booking.booking_time, Booking.id)
+                .offset((page - 1) * SIZE - 1).limit(1)
+            )).one()
+        deep_cursor = encode_cursor(last.booking_time, last.id)
+
+        offset_first = await measure(session_maker, PaginationParams(page=1, size=SIZE))
+        offset_deep = await measure(session_maker, PaginationParams(page=page, size=SIZE))
+        cursor_first = await measure(session_maker, PaginationParams(size=SIZE, cursor=""))
+        cursor_deep = await measure(session_maker, PaginationParams(size=SIZE, cursor=deep_cursor))
+
+        report("offset page 1", rows=rows, best=offset_first)
+        report(f"offset page {page}", rows=rows, best=offset_deep)
+        report("cursor page 1", rows=rows, best=cursor_first)
+        report(f"cursor page {page}", rows=rows, best=cursor_deep)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.page))
@@ -0,0 +1,85 @@
+"""Бенчмарк: запись через INSERT/UPDATE ... RETURNING против commit + refresh.
+
+    python -m benchmarks.bench_returning_writes --writes 2000
+
+Прежняя схема — объект в сессии, commit и refresh (лишний SELECT по id
+после каждой записи); новая — CRUDBase.create/update, где объект
+заполняется из RETURNING той же команды. Для каждой схемы считаются
+SQL-команды на запись (без COMMIT) и задержка записи, p50 и p99.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import event
+
+from app.crud import student
+from app.models.student import Student
+from app.schemas.student import StudentCreate, StudentUpdate
+from benchmarks.common import bench_session, report
+
+
+async def legacy_create(db, obj_in: StudentCreate) -> Student:
+    db_obj = Student(**obj_in.model_dump())
+    db.add(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+
+async def legacy_update(db, db_obj: Student, obj_in: StudentUpdate) -> Student:
+    for field, value in obj_in.model_dump(exclude_unset=True).items():
+        setattr(db_obj, field, value)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+
+async def measure(session_maker, statements, writes: int, create, update):
+    """Создать и изменить writes студентов; вернуть (команд на запись, задержки)"""
+    latencies = []
+    statements.clear()
+    async with session_maker() as db:
+        for n in range(writes):
+            started = time.perf_counter()
+            if n % 2 == 0:
+                suffix = uuid.uuid4().hex[:8]
+                last = await create(db, StudentCreate(name="Bench", email=f"rw_{suffix}@test.com"))
+            else:
+                last = await update(db, last, StudentUpdate(phone=f"+7{n:010d}"))
+            latencies.append(time.perf_counter() - started)
+    return len(statements) / writes, latencies
+
+
+async def main(writes: int) -> None:
+    async with bench_session() as (engine, session_maker):
+        statements = []
+        event.listen(
+            engine.sync_engine, "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement)
+        )
+        cases = [
+            ("commit + refresh", legacy_create, legacy_update),
+            ("INSERT/UPDATE ... RETURNING", student.create, student.update),
+        ]
+        for title, create, update in cases:
+            # Прогрев: компиляция SQL и кэш запросов
+            await measure(session_maker, statements, 50, create, update)
+            per_write, latencies = await measure(session_maker, statements, writes, create, update)
+            latencies.sort()
+            report(
+                title,
+                statements_per_write=f"{per_write:.2f}",
+                p50=statistics.median(latencies),
+                p99=latencies[int(len(latencies) * 0.99) - 1],
+                total=sum(latencies)
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writes", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.writes))
@@ -0,0 +1,91 @@
+"""Микробенчмарк: сериализация ответов по схемам.
+
+    python -m benchmarks.bench_serialization --rows 500
+
+Для каждой схемы (TimeSlot, Booking, Teacher, Student) список ORM-объектов
+кодируется так, как это делает FastAPI с response_model (валидация
+from_attributes + jsonable_encoder + json.dumps), и через fast_response
+(attrgetter + orjson). База не нужна — объекты создаются в памяти.
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.serialization import dumps, serializer_for
+from app.models.booking import Booking, BookingStatus
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.models.time_slot import TimeSlot
+from app.schemas.booking import BookingResponse
+from app.schemas.student import StudentResponse
+from app.schemas.teacher import TeacherResponse
+from app.schemas.time_slot import TimeSlotResponse
+from benchmarks.common import report
+
+
+def make_rows(rows: int):
+    now = datetime.utcnow().replace(microsecond=0)
+    return {
+        TimeSlotResponse: [
+            TimeSlot(
+                id=n, teacher_id=1, start_time=now + timedelta(hours=n), end_time=now + timedelta(hours=n, minutes=50),
+                max_students=4, current_bookings=n % 5, description="Регулярное занятие", price=1500.0,
+                meeting_url=f"https://meet.example.com/{n}", created_at=now, updated_at=now
+            )
+            for n in range(rows)
+        ],
+        BookingResponse: [
+            Booking(
+                id=n, time_slot_id=n, student_id=n % 50, status=BookingStatus.CONFIRMED,
+                student_notes="Подготовить упражнения", booking_time=now, confirmed_at=now,
+                created_at=now, updated_at=now
+            )
+            for n in range(rows)
+        ],
+        TeacherResponse: [
+            Teacher(
+                id=n, name=f"Преподаватель {n}", email=f"teacher{n}@example.com", phone="+70000000000",
+                bio="Английский язык", slug=f"teacher{n}", created_at=now, updated_at=now
+            )
+            for n in range(rows)
+        ],
+        StudentResponse: [
+            Student(
+                id=n, name=f"Студент {n}", email=f"student{n}@example.com", phone="+70000000000",
+                slug=f"student{n}", created_at=now, updated_at=now
+            )
+            for n in range(rows)
+        ],
+    }
+
+
+def response_model_path(adapter: TypeAdapter, objects) -> bytes:
+    """Как serialize_response + JSONResponse в FastAPI 0.104"""
+    value = adapter.validate_python(objects, from_attributes=True)
+    content = jsonable_encoder(adapter.dump_python(value, mode="json"))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def main(rows: int, repeat: int) -> None:
+    for schema, objects in make_rows(rows).items():
+        adapter = TypeAdapter(List[schema])
+        serializer = serializer_for(schema)
+        assert json.loads(response_model_path(adapter, objects)) == json.loads(dumps(serializer.dump(objects)))
+
+        slow = min(timeit.repeat(lambda: response_model_path(adapter, objects), number=1, repeat=repeat))
+        fast = min(timeit.repeat(lambda: dumps(serializer.dump(objects)), number=1, repeat=repeat))
+        report(schema.__name__, rows=rows, response_model=slow, fast=fast)
+        print(f"{'':<40} speedup: {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
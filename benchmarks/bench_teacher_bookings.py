@@ -0,0 +1,116 @@
+"""Бенчмарк: бронирования преподавателя с 50k бронированиями.
+
+    python -m benchmarks.bench_teacher_bookings --bookings 50000
+
+Сравнивается прежний запрос (JOIN + EXISTS + три selectin-загрузки,
+без фильтра по окну — диапазонные фильтры в нем не работали) с новым:
+ORM, плоская проекция, окно в неделю и первая страница по курсору.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from typing import Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import selectinload
+
+from app.crud import booking
+from app.models.booking import Booking, BookingStatus
+from app.models.time_slot import TimeSlot
+from benchmarks.common import bench_session, create_teacher, create_student, Timer, report
+
+PER_SLOT = 10
+CHUNK = 5000
+
+
+async def seed_teacher(db, bookings: int, students) -> Tuple[int, datetime]:
+    """Преподаватель с почасовыми слотами по PER_SLOT бронирований в каждом"""
+    teacher = await create_teacher(db)
+    now = datetime.utcnow()
+    first = now.replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    slot_count = bookings // PER_SLOT
+    for offset in range(0, slot_count, CHUNK):
+        await db.execute(insert(TimeSlot), [
+            {
+                "teacher_id": teacher.id,
+                "start_time": first + timedelta(hours=h),
+                "end_time": first + timedelta(hours=h, minutes=50),
+                "max_students": PER_SLOT,
+                "current_bookings": PER_SLOT,
+                "created_at": now,
+                "updated_at": now,
+                "is_deleted": False,
+            }
+            for h in range(offset, min(offset + CHUNK, slot_count))
+        ])
+    slot_ids = (await db.scalars(select(TimeSlot.id).where(TimeSlot.teacher_id == teacher.id))).all()
+    rows = [
+        {
+            "time_slot_id": slot_id,
+            "student_id": students[n].id,
+            "status": BookingStatus.CONFIRMED,
+            "booking_time": now,
+            "created_at": now,
+            "updated_at": now,
+            "is_deleted": False,
+        }
+        for slot_id in slot_ids for n in range(PER_SLOT)
+    ]
+    for offset in range(0, len(rows), CHUNK):
+        await db.execute(insert(Booking), rows[offset:offset + CHUNK])
+    await db.commit()
+    return teacher.id, first
+
+
+async def legacy_query(db, teacher_id: int):
+    query = select(Booking).options(
+        selectinload(Booking.time_slot).selectinload(TimeSlot.teacher),
+        selectinload(Booking.student)
+    ).join(Booking.time_slot).where(
+        Booking.time_slot.has(teacher_id=teacher_id),
+        Booking.is_deleted == False
+    ).order_by(Booking.booking_time.desc())
+    return (await db.execute(query)).scalars().all()
+
+
+async def measure(session_maker, fn, repeat: int = 3):
+    best, count = None, None
+    for _ in range(repeat):
+        async with session_maker() as db:
+            with Timer() as timer:
+                count = len(await fn(db))
+        best = timer.elapsed if best is None else min(best, timer.elapsed)
+    return best, count
+
+
+async def main(bookings: int) -> None:
+    async with bench_session() as (engine, session_maker):
+        async with session_maker() as db:
+            students = [await create_student(db) for _ in range(PER_SLOT)]
+            teacher_id, first = await seed_teacher(db, bookings, students)
+            # Второй преподаватель с тем же объемом — шум для индекса
+            await seed_teacher(db, bookings, students)
+
+        week = (first, first + timedelta(days=7))
+        cases = [
+            ("legacy (all, 3x selectin)", lambda db: legacy_query(db, teacher_id)),
+            ("join (all, ORM)", lambda db: booking.get_teacher_bookings(db, teacher_id)),
+            ("join (all, flat)", lambda db: booking.get_teacher_bookings(db, teacher_id, flat=True)),
+            ("join (week window, flat)",
+             lambda db: booking.get_teacher_bookings(db, teacher_id, *week, flat=True)),
+            ("join (cursor page of 100, flat)",
+             lambda db: booking.get_teacher_bookings(db, teacher_id, cursor="", size=100, flat=True)),
+        ]
+        for title, fn in cases:
+            async def run(db, fn=fn):
+                result = await fn(db)
+                return result[0] if isinstance(result, tuple) else result
+            best, count = await measure(session_maker, run)
+            report(title, rows=count, best=best)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=50_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.bookings))
@@ -0,0 +1,103 @@
+"""Бенчмарк: накладные расходы трассировки на CRUD-нагрузке.
+
+    python -m benchmarks.bench_tracing --requests 2000
+
+Один и тот же сценарий (список и карточки преподавателей и слотов, создание
+и изменение слота) прогоняется через приложение без трассировки, через
+middleware трассировки без попадания в выборку (TRACING_SAMPLE_RATE=0) и с
+трассировкой каждого запроса. Сравнивается процессорное время процесса
+(вместе с клиентом httpx); слой BaseHTTPMiddleware и запись спанов
+выводятся отдельно.
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app import main
+from app.core.dependencies import get_db, get_read_db
+from app.core.tracing import Tracer, TracedAsyncSession
+from benchmarks.common import bench_session, create_teacher, report
+
+TEACHERS = 20
+# Сквозной счетчик часов: слоты разных прогонов не пересекаются
+HOURS = itertools.count()
+
+
+async def replay(client: AsyncClient, teacher_ids, requests: int, seed_value: int) -> float:
+    rng = random.Random(seed_value)
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    slot_ids = []
+    started = time.process_time()
+    for n in range(requests):
+        teacher_id = rng.choice(teacher_ids)
+        kind = n % 5
+        if kind == 0:
+            hour = start + timedelta(hours=next(HOURS))
+            response = await client.post("/api/v1/slots/", json={
+                "teacher_id": teacher_id,
+                "start_time": hour.isoformat(),
+                "end_time": (hour + timedelta(minutes=50)).isoformat(),
+            })
+            slot_ids.append(response.json()["id"])
+        elif kind == 1:
+            await client.put(f"/api/v1/slots/{rng.choice(slot_ids)}", json={"description": f"v{n}"})
+        elif kind == 2:
+            await client.get(f"/api/v1/slots/?teacher_id={teacher_id}&size=20")
+        elif kind == 3:
+            await client.get(f"/api/v1/slots/{rng.choice(slot_ids)}")
+        else:
+            await client.get(f"/api/v1/teachers/{teacher_id}")
+    return time.process_time() - started
+
+
+async def main_(requests: int) -> None:
+    # Лог каждого запроса httpx искажает замер CPU
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    async with bench_session() as (engine, _):
+        session_maker = async_sessionmaker(engine, class_=TracedAsyncSession, expire_on_commit=False)
+        async with session_maker() as db:
+            teacher_ids = [(await create_teacher(db)).id for _ in range(TEACHERS)]
+
+        async def override_get_db():
+            async with session_maker() as session:
+                yield session
+
+        main.app.dependency_overrides[get_db] = override_get_db
+        main.app.dependency_overrides[get_read_db] = override_get_db
+        traced_app = BaseHTTPMiddleware(main.app, dispatch=main.trace_requests)
+        cases = [
+            ("tracing off", main.app, 0.0),
+            ("tracing middleware, not sampled", traced_app, 0.0),
+            ("tracing every request", traced_app, 1.0),
+        ]
+        results = {}
+        try:
+            for title, asgi_app, sample_rate in cases:
+                main.tracer = Tracer(enabled=True, sample_rate=sample_rate, buffer_size=500)
+                async with AsyncClient(app=asgi_app, base_url="http://bench") as client:
+                    # Прогрев: первые запросы компилируют SQL и заполняют кэши
+                    await replay(client, teacher_ids, 50, seed_value=0)
+                    results[title] = await replay(client, teacher_ids, requests, seed_value=1)
+                spans = sum(len(trace.spans) for trace in main.tracer.traces)
+                report(title, requests=requests, cpu=results[title], buffered_spans=spans)
+        finally:
+            main.app.dependency_overrides.clear()
+        off, layer, traced = (results[title] for title, _, _ in cases)
+        # Отдельно цена слоя BaseHTTPMiddleware и цена самих спанов
+        print(f"middleware layer: {layer / off - 1:+.1%}, spans: {traced / layer - 1:+.1%}, "
+              f"total: {traced / off - 1:+.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main_(args.requests))
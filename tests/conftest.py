@@ -1,14 +1,22 @@
 import pytest
 import asyncio
-from typing import AsyncGenerator
+from typing import AsyncGenerator, List
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from httpx import AsyncClient
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 import uuid
 
 from app.main import app
+from app.api.debug import DEBUG_TOKEN_HEADER, router as debug_router
+from app.core.config import get_settings
+from app.core.profiling import sign_profile_token
 from app.core.database import get_async_session
+from app.core.dependencies import get_db, get_read_db
+from app.core.cache import availability_cache
+from app.core.metrics import instrument_engine
+from app.core.query_budget import QueryReport, report_listeners
 from app.models.base import BaseModel
 
 # Тестовая база данных
@@ -19,6 +27,9 @@ test_engine = create_async_engine(
     connect_args={"check_same_thread": False}
 )
 
+# Число SQL-запросов на HTTP-запрос считается по событиям движка
+instrument_engine(test_engine, "test")
+
 TestingSessionLocal = sessionmaker(
     class_=AsyncSession,
     expire_on_commit=False
@@ -39,10 +50,16 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
     async with test_engine.begin() as connection:
         await connection.run_sync(BaseModel.metadata.create_all)
 
-        async with AsyncSession(bind=connection) as session:
+        async with AsyncSession(
+            bind=connection,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint"
+        ) as session:
             yield session
 
         await connection.run_sync(BaseModel.metadata.drop_all)
+    # id в новой базе повторяются — закэшированные окна прошлого теста не нужны
+    await availability_cache.clear()
 
 
 @pytest.fixture(scope="function")
@@ -59,6 +76,38 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+async def api_client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
+    """Клиент API поверх тестовой сессии (для записи и для чтения)"""
+    async def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def debug_client() -> AsyncGenerator[AsyncClient, None]:
+    """Клиент отладочного роутера (по умолчанию он не подключен) с подписанным X-Debug-Token"""
+    debug_app = FastAPI()
+    debug_app.include_router(debug_router, prefix="/debug")
+    headers = {DEBUG_TOKEN_HEADER: sign_profile_token(get_settings().SECRET_KEY)}
+    async with AsyncClient(app=debug_app, base_url="http://test", headers=headers) as ac:
+        yield ac
+
+
+@pytest.fixture
+def query_reports() -> List[QueryReport]:
+    """Отчеты о SQL каждого HTTP-запроса теста (число, бюджет, N+1)"""
+    reports: List[QueryReport] = []
+    report_listeners.append(reports.append)
+    yield reports
+    report_listeners.remove(reports.append)
+
+
 @pytest.fixture
 def teacher_data():
     unique_email = f"teacher_{uuid.uuid4()}@test.com"
@@ -0,0 +1,90 @@
+import pytest
+import asyncio
+import time
+from datetime import timedelta
+
+from jose import jwt
+
+from app.core.auth import (
+    PasswordHasher, TokenCache, token_cache, create_access_token, decode_access_token, decode_hs256
+)
+from app.core.config import get_settings
+from app.core.exceptions import PasswordHasherBusyException
+
+
+class TestPasswordHasher:
+    pytestmark = pytest.mark.asyncio
+    """Тесты вынесения bcrypt из event loop"""
+
+    async def test_hash_and_verify(self):
+        hasher = PasswordHasher(workers=2, max_pending=4)
+        try:
+            hashed = await hasher.hash("secret123")
+            assert await hasher.verify("secret123", hashed)
+            assert not await hasher.verify("wrong", hashed)
+        finally:
+            hasher.shutdown()
+
+    async def test_inline_mode(self):
+        hasher = PasswordHasher(workers=0, max_pending=0)
+        hashed = await hasher.hash("secret123")
+        assert await hasher.verify("secret123", hashed)
+
+    async def test_rejects_when_saturated(self):
+        hasher = PasswordHasher(workers=1, max_pending=2)
+        try:
+            results = await asyncio.gather(
+                *(hasher.hash("secret123") for _ in range(4)), return_exceptions=True
+            )
+            rejected = [r for r in results if isinstance(r, PasswordHasherBusyException)]
+            assert len(rejected) == 2
+            assert rejected[0].status_code == 503
+            assert hasher.rejected == 2
+            assert hasher.pending == 0
+        finally:
+            hasher.shutdown()
+
+
+class TestTokenCache:
+    """Тесты кэша проверенных JWT"""
+
+    @pytest.fixture(autouse=True)
+    def clean_cache(self):
+        token_cache.clear()
+        yield
+        token_cache.clear()
+
+    def test_decode_is_cached(self):
+        token = create_access_token({"sub": "1", "role": "student"})
+        hits = token_cache.hits
+        assert decode_access_token(token)["sub"] == "1"
+        assert decode_access_token(token)["sub"] == "1"
+        assert token_cache.hits == hits + 1
+
+    def test_entry_expires_with_token(self, monkeypatch):
+        token = create_access_token({"sub": "1", "role": "student"}, timedelta(minutes=1))
+        assert decode_access_token(token)
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 120)
+        assert token_cache.get(token) is None
+
+    def test_lru_eviction(self):
+        cache = TokenCache(max_size=2)
+        tokens = [create_access_token({"sub": str(i), "role": "student"}) for i in range(3)]
+        for token in tokens:
+            cache.set(token, decode_hs256(token, get_settings().SECRET_KEY))
+        assert cache.get(tokens[0]) is None
+        assert cache.get(tokens[2])["sub"] == "2"
+        assert cache.evictions == 1
+
+    def test_fast_hs256_matches_jose(self):
+        secret = get_settings().SECRET_KEY
+        token = create_access_token({"sub": "7", "role": "teacher"})
+        assert decode_hs256(token, secret) == jwt.decode(token, secret, algorithms=["HS256"])
+
+        header, payload, signature = token.split(".")
+        tampered = f"{header}.{payload}.{'A' * len(signature)}"
+        assert decode_hs256(tampered, secret) == {}
+        expired = create_access_token({"sub": "7"}, timedelta(minutes=-1))
+        assert decode_hs256(expired, secret) == {}
+        assert decode_hs256("not.a.token", secret) == {}
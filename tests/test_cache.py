@@ -0,0 +1,186 @@
+import pytest
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import teacher, student, time_slot, booking
+from app.core.cache import AvailabilityCache, CacheBackend, LRUCache, MemoryCacheBackend, RedisCacheBackend
+from app.models.time_slot import SlotStatus
+from app.schemas.teacher import TeacherCreate
+from app.schemas.student import StudentCreate
+from app.schemas.time_slot import TimeSlotCreate, TimeSlotUpdate
+from app.schemas.booking import BookingCreate
+
+
+class FakeRedis:
+    """Минимальный клиент с протоколом redis.asyncio для тестов"""
+
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, px=None):
+        self.data[key] = value
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(m.encode() for m in members)
+
+    async def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(m.encode() for m in members)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def pexpire(self, key, ms):
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def flushdb(self):
+        self.data.clear()
+        self.sets.clear()
+
+
+NOW = datetime(2030, 1, 7, 10, 0)
+WEEK = (NOW, NOW + timedelta(days=7))
+
+
+def payload(n: int = 1) -> list:
+    return [{"id": i, "start_time": NOW.isoformat()} for i in range(n)]
+
+
+class TestLRUCache:
+    """Тесты LRU-кэша с бюджетом памяти"""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_bytes=10)
+        cache.set("a", b"aaaa", ttl=60)
+        cache.set("b", b"bbbb", ttl=60)
+        cache.get("a")
+        cache.set("c", b"cccc", ttl=60)
+        assert "a" in cache and "c" in cache and "b" not in cache
+        assert cache.size_bytes == 8
+        assert cache.evictions == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        cache = LRUCache(max_bytes=100)
+        cache.set("a", b"value", ttl=5)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+        assert cache.get("a") is None
+        assert cache.size_bytes == 0
+
+    def test_backend_must_implement_interface(self):
+        class PartialBackend(CacheBackend):
+            async def get(self, key):
+                return None
+
+        with pytest.raises(TypeError, match="invalidate"):
+            PartialBackend()
+
+
+class TestAvailabilityCache:
+    pytestmark = pytest.mark.asyncio
+    """Тесты кэша доступности на обоих бэкендах"""
+
+    @pytest.fixture(params=["memory", "redis"])
+    def cache(self, request):
+        if request.param == "redis":
+            backend = RedisCacheBackend(FakeRedis())
+        else:
+            backend = MemoryCacheBackend(max_bytes=1024 * 1024)
+        return AvailabilityCache(backend, ttl=60)
+
+    async def test_hit_and_miss(self, cache):
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return payload(2)
+
+        assert await cache.get_or_load(1, WEEK, loader) == payload(2)
+        assert await cache.get_or_load(1, WEEK, loader) == payload(2)
+        assert len(calls) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    async def test_invalidation_is_scoped(self, cache):
+        async def loader():
+            return payload()
+
+        next_week = (WEEK[1], WEEK[1] + timedelta(days=7))
+        await cache.get_or_load(1, WEEK, loader)
+        await cache.get_or_load(1, next_week, loader)
+        await cache.get_or_load(2, WEEK, loader)
+        await cache.get_or_load(None, (None, None), loader)
+
+        # Слот преподавателя 1 на этой неделе: его неделя и общее окно
+        slot = (NOW + timedelta(days=1), NOW + timedelta(days=1, hours=1))
+        await cache.invalidate(1, [slot])
+        assert cache.invalidations == 2
+
+        cache.hits = cache.misses = 0
+        for teacher_id, window in ((1, WEEK), (1, next_week), (2, WEEK), (None, (None, None))):
+            await cache.get_or_load(teacher_id, window, loader)
+        assert (cache.hits, cache.misses) == (2, 2)
+
+
+@pytest.fixture
+async def db_teacher(db_session: AsyncSession):
+    suffix = uuid.uuid4().hex[:8]
+    return await teacher.create(db_session, TeacherCreate(
+        name="Cache Teacher",
+        email=f"cache_{suffix}@test.com",
+        slug=f"c{suffix}"
+    ))
+
+
+class TestWriteThroughInvalidation:
+    pytestmark = pytest.mark.asyncio
+    """Изменения слотов сбрасывают закэшированную доступность"""
+
+    async def test_create_book_update_remove(self, db_session: AsyncSession, db_teacher):
+        start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+        teacher_id = db_teacher.id
+
+        assert await time_slot.get_available_slots_cached(db_session, teacher_id) == []
+
+        slot = await time_slot.create_with_overlap_check(db_session, TimeSlotCreate(
+            teacher_id=teacher_id, start_time=start, end_time=start + timedelta(hours=1)
+        ))
+        slot_id = slot.id
+        cached = await time_slot.get_available_slots_cached(db_session, teacher_id)
+        assert [item["id"] for item in cached] == [slot_id]
+
+        db_student = await student.create(db_session, StudentCreate(
+            name="Cache Student", email=f"cache_{uuid.uuid4().hex[:8]}@test.com"
+        ))
+        await booking.create_booking(db_session, BookingCreate(time_slot_id=slot_id, student_id=db_student.id))
+        assert await time_slot.get_available_slots_cached(db_session, teacher_id) == []
+
+        await time_slot.unbook_slot(db_session, slot_id)
+        assert len(await time_slot.get_available_slots_cached(db_session, teacher_id)) == 1
+
+        await time_slot.update(db_session, await time_slot.get(db_session, slot_id),
+                               TimeSlotUpdate(status=SlotStatus.CANCELLED))
+        assert await time_slot.get_available_slots_cached(db_session, teacher_id) == []
+
+        # Перенос слота сбрасывает и старое, и новое окно
+        day = (start, start + timedelta(hours=2))
+        await time_slot.update(db_session, await time_slot.get(db_session, slot_id),
+                               TimeSlotUpdate(status=SlotStatus.AVAILABLE))
+        assert len(await time_slot.get_available_slots_cached(db_session, teacher_id, *day)) == 1
+        await time_slot.update(db_session, await time_slot.get(db_session, slot_id), TimeSlotUpdate(
+            start_time=start + timedelta(days=2), end_time=start + timedelta(days=2, hours=1)
+        ))
+        assert await time_slot.get_available_slots_cached(db_session, teacher_id, *day) == []
+        assert len(await time_slot.get_available_slots_cached(db_session, teacher_id)) == 1
+
+        await time_slot.delete(db_session, slot_id)
+        assert await time_slot.get_available_slots_cached(db_session, teacher_id) == []
@@ -0,0 +1,136 @@
+"""Нагрузочные тесты конкурентного доступа.
+
+Каждый тест работает с собственными соединениями из пула, поэтому
+используется отдельная база: PostgreSQL из TEST_POSTGRES_URL, если задан,
+иначе SQLite-файл (SQLite сериализует запись, но условный UPDATE
+должен отсекать переполнение и там).
+"""
+import os
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.crud import booking, time_slot
+from app.models.base import BaseModel
+from app.models.booking import Booking
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.models.time_slot import TimeSlot, SlotStatus
+from app.schemas.booking import BookingCreate
+from app.schemas.time_slot import TimeSlotCreate
+from app.core.exceptions import SlotAlreadyBookedException, SlotOverlapException
+
+pytestmark = pytest.mark.asyncio
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+CONCURRENCY_DATABASE_URL = TEST_POSTGRES_URL or "sqlite+aiosqlite:///./test_concurrency.db"
+
+
+@pytest.fixture
+async def session_maker():
+    engine = create_async_engine(CONCURRENCY_DATABASE_URL, pool_size=20, max_overflow=0)
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.drop_all)
+        await conn.run_sync(BaseModel.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.drop_all)
+    await engine.dispose()
+    if not TEST_POSTGRES_URL and os.path.exists("./test_concurrency.db"):
+        os.remove("./test_concurrency.db")
+
+
+async def seed_slot(session_maker, max_students: int, students: int):
+    async with session_maker() as db:
+        teacher = Teacher(name="Load Teacher", email=f"load_{uuid.uuid4().hex[:8]}@test.com",
+                          slug=f"l{uuid.uuid4().hex[:8]}")
+        db.add(teacher)
+        await db.flush()
+        start = datetime.utcnow() + timedelta(days=1)
+        slot = TimeSlot(teacher_id=teacher.id, start_time=start, end_time=start + timedelta(hours=1),
+                        max_students=max_students)
+        db.add(slot)
+        db.add_all([
+            Student(name=f"Student {i}", email=f"load_{i}_{uuid.uuid4().hex[:6]}@test.com")
+            for i in range(students)
+        ])
+        await db.commit()
+        student_ids = (await db.scalars(select(Student.id))).all()
+        return slot.id, student_ids
+
+
+class TestConcurrentBooking:
+    pytestmark = pytest.mark.asyncio
+    """Одновременные бронирования одного слота не должны приводить к овербукингу"""
+
+    async def test_no_overbooking_under_load(self, session_maker):
+        max_students = 5
+        slot_id, student_ids = await seed_slot(session_maker, max_students, students=300)
+
+        async def book(student_id: int) -> bool:
+            async with session_maker() as db:
+                try:
+                    await booking.create_booking(
+                        db, BookingCreate(time_slot_id=slot_id, student_id=student_id)
+                    )
+                    return True
+                except SlotAlreadyBookedException:
+                    return False
+
+        results = await asyncio.gather(*(book(student_id) for student_id in student_ids))
+
+        async with session_maker() as db:
+            slot = await db.get(TimeSlot, slot_id)
+            booked = await db.scalar(
+                select(func.count(Booking.id)).where(Booking.time_slot_id == slot_id)
+            )
+
+        assert sum(results) == max_students
+        assert booked == max_students
+        assert slot.current_bookings == max_students
+        assert slot.status == SlotStatus.BOOKED
+
+
+class TestConcurrentSlotCreation:
+    pytestmark = pytest.mark.asyncio
+    """Параллельное создание пересекающихся слотов одним преподавателем"""
+
+    async def test_no_overlapping_slots(self, session_maker):
+        async with session_maker() as db:
+            teacher = Teacher(name="Busy Teacher", email=f"busy_{uuid.uuid4().hex[:8]}@test.com",
+                              slug=f"b{uuid.uuid4().hex[:8]}")
+            db.add(teacher)
+            await db.commit()
+            teacher_id = teacher.id
+
+        base = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+
+        async def create(n: int) -> bool:
+            # 50 создателей, у каждого слот длиной час со сдвигом 10 минут:
+            # каждый интервал пересекается с пятью соседями с каждой стороны
+            start = base + timedelta(minutes=10 * n)
+            async with session_maker() as db:
+                try:
+                    await time_slot.create_with_overlap_check(db, TimeSlotCreate(
+                        teacher_id=teacher_id,
+                        start_time=start,
+                        end_time=start + timedelta(hours=1)
+                    ))
+                    return True
+                except SlotOverlapException:
+                    return False
+
+        results = await asyncio.gather(*(create(n) for n in range(50)))
+
+        async with session_maker() as db:
+            slots = (await db.scalars(
+                select(TimeSlot).where(TimeSlot.teacher_id == teacher_id).order_by(TimeSlot.start_time)
+            )).all()
+
+        assert sum(results) == len(slots) > 0
+        for previous, current in zip(slots, slots[1:]):
+            assert previous.end_time <= current.start_time
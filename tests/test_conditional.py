@@ -0,0 +1,88 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.crud import teacher, time_slot
+from app.schemas.teacher import TeacherCreate, TeacherUpdate
+from app.schemas.time_slot import TimeSlotCreate
+
+pytestmark = pytest.mark.asyncio
+
+
+async def create_teacher(db: AsyncSession):
+    suffix = uuid.uuid4().hex[:8]
+    return await teacher.create(db, TeacherCreate(name="ETag Teacher", email=f"etag_{suffix}@test.com", slug=f"e{suffix}"))
+
+
+class TestConditionalGet:
+    """ETag / If-None-Match для GET-эндпоинтов v1"""
+
+    async def test_entity_etag(self, api_client: AsyncClient, db_session: AsyncSession):
+        owner = await create_teacher(db_session)
+        url = f"/api/v1/teachers/{owner.id}"
+
+        response = await api_client.get(url)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert "last-modified" in response.headers
+
+        response = await api_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+        await teacher.update(db_session, owner, TeacherUpdate(bio="Новая биография"))
+        response = await api_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["bio"] == "Новая биография"
+
+    async def test_missing_entity_is_not_conditional(self, api_client: AsyncClient):
+        response = await api_client.get("/api/v1/teachers/999999", headers={"If-None-Match": "*"})
+        assert response.status_code == 404
+
+    async def test_list_etag_tracks_rows_and_query(self, api_client: AsyncClient, db_session: AsyncSession):
+        owner = await create_teacher(db_session)
+        start = datetime.utcnow() + timedelta(days=1)
+
+        async def add_slot(hours: int):
+            return await time_slot.create(db_session, TimeSlotCreate(
+                teacher_id=owner.id,
+                start_time=start + timedelta(hours=hours),
+                end_time=start + timedelta(hours=hours, minutes=50)
+            ))
+
+        first = await add_slot(0)
+        await add_slot(1)
+        url = f"/api/v1/slots/?teacher_id={owner.id}"
+
+        response = await api_client.get(url)
+        etag = response.headers["etag"]
+        assert (await api_client.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+        # Другая страница — другой ETag
+        other = await api_client.get(url + "&size=1")
+        assert other.headers["etag"] != etag
+
+        await time_slot.remove(db_session, first.id)
+        response = await api_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["total"] == 1
+
+    async def test_body_hash_fallback(self, api_client: AsyncClient, db_session: AsyncSession):
+        await create_teacher(db_session)
+        response = await api_client.get("/api/v1/teachers/active/list")
+        etag = response.headers["etag"]
+        response = await api_client.get("/api/v1/teachers/active/list", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    async def test_disabled(self, api_client: AsyncClient, db_session: AsyncSession, monkeypatch):
+        owner = await create_teacher(db_session)
+        monkeypatch.setattr(get_settings(), "CONDITIONAL_GET_ENABLED", False)
+        response = await api_client.get(f"/api/v1/teachers/{owner.id}", headers={"If-None-Match": "*"})
+        assert response.status_code == 200
+        assert "etag" not in response.headers
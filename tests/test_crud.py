@@ -0,0 +1,508 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import teacher, student, time_slot, booking, booking_stats
+from app.core.metrics import RequestStats, current_request
+from app.models.time_slot import SlotStatus
+from app.models.booking import BookingStatus
+from app.schemas.teacher import TeacherCreate
+from app.schemas.student import StudentCreate
+from app.schemas.time_slot import TimeSlotCreate, TimeSlotUpdate, BulkSlotCreate
+from app.schemas.booking import BookingCreate, BookingBatchCreate, BatchBookingMode, BookingBulkTransition
+from app.schemas.base import PaginationParams
+from app.core.exceptions import (
+    SlotOverlapException, TooManySlotsException, SlotAlreadyBookedException,
+    SlotNotFoundException, InvalidCursorException, BookingAlreadyCancelledException,
+    BookingAlreadyConfirmedException, BookingTransitionException, BookingNotFoundException,
+    TeacherNotFoundException, TeacherSlugRequiredException
+)
+
+
+@pytest.fixture
+async def db_teacher(db_session: AsyncSession):
+    suffix = uuid.uuid4().hex[:8]
+    return await teacher.create(db_session, TeacherCreate(
+        name="CRUD Teacher",
+        email=f"crud_{suffix}@test.com",
+        slug=f"t{suffix}"
+    ))
+
+
+async def make_student(db: AsyncSession):
+    return await student.create(db, StudentCreate(
+        name="CRUD Student",
+        email=f"crud_{uuid.uuid4().hex[:8]}@test.com"
+    ))
+
+
+async def make_slot(db: AsyncSession, teacher_id: int, days: int = 1, max_students: int = 1):
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(days=days)
+    return await time_slot.create_with_overlap_check(db, TimeSlotCreate(
+        teacher_id=teacher_id,
+        start_time=start,
+        end_time=start + timedelta(hours=1),
+        max_students=max_students
+    ))
+
+
+def bulk_payload(teacher_id: int, days: int = 14, **overrides) -> BulkSlotCreate:
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    data = {
+        "teacher_id": teacher_id,
+        "start_date": start,
+        "end_date": start + timedelta(days=days - 1),
+        "start_time": "10:00",
+        "end_time": "11:00",
+        "days_of_week": [0, 1, 2, 3, 4, 5, 6],
+        "max_students": 2
+    }
+    data.update(overrides)
+    return BulkSlotCreate(**data)
+
+
+class TestUniqueFields:
+    pytestmark = pytest.mark.asyncio
+    """Проверка уникальности email/slug одним запросом"""
+
+    async def test_get_taken(self, db_session: AsyncSession, db_teacher):
+        assert await teacher.get_taken(db_session, {"email": db_teacher.email, "slug": "free"}) == {"email"}
+        assert await teacher.get_taken(db_session, {"email": "free@test.com", "slug": db_teacher.slug}) == {"slug"}
+        assert await teacher.get_taken(db_session, {"email": db_teacher.email, "slug": None}) == {"email"}
+        assert await teacher.get_taken(
+            db_session, {"email": db_teacher.email, "slug": db_teacher.slug}, exclude_id=db_teacher.id
+        ) == set()
+        assert await teacher.get_taken(db_session, {}) == set()
+
+
+class TestReturningWrites:
+    pytestmark = pytest.mark.asyncio
+    """Запись одной командой с RETURNING, без refresh после commit"""
+
+    async def test_one_statement_per_write(self, db_session: AsyncSession, db_teacher):
+        stats = RequestStats()
+        token = current_request.set(stats)
+        try:
+            slot = await make_slot(db_session, db_teacher.id)
+            # allocate_meeting_urls + проверка пересечения (SQLite) + INSERT
+            assert stats.queries == 3
+            assert slot.id is not None and slot.created_at is not None
+
+            stats.queries = 0
+            before = slot.updated_at
+            updated = await time_slot.update(db_session, slot, TimeSlotUpdate(description="Новое"))
+            assert stats.queries == 1
+            assert updated is slot
+            assert slot.description == "Новое" and slot.updated_at > before
+
+            stats.queries = 0
+            assert await time_slot.update(db_session, slot, TimeSlotUpdate()) is slot
+            assert stats.queries == 0
+        finally:
+            current_request.reset(token)
+
+
+class TestBulkSlots:
+    pytestmark = pytest.mark.asyncio
+    """Тесты массового создания слотов"""
+
+    async def test_bulk_create(self, db_session: AsyncSession, db_teacher):
+        slots = await time_slot.bulk_create(db_session, bulk_payload(db_teacher.id))
+        assert len(slots) == 14
+        assert [s.start_time for s in slots] == sorted(s.start_time for s in slots)
+        assert all(s.id is not None and s.max_students == 2 for s in slots)
+        urls = [s.meeting_url for s in slots]
+        assert urls[0].endswith(f"/{db_teacher.slug}-1")
+        assert urls[-1].endswith(f"/{db_teacher.slug}-14")
+
+    async def test_bulk_continues_meeting_url_sequence(self, db_session: AsyncSession, db_teacher):
+        first = await make_slot(db_session, db_teacher.id, days=30)
+        assert first.meeting_url.endswith(f"/{db_teacher.slug}-1")
+        slots = await time_slot.bulk_create(db_session, bulk_payload(db_teacher.id, days=3))
+        assert [s.meeting_url.rsplit("-", 1)[-1] for s in slots] == ["2", "3", "4"]
+        last = await make_slot(db_session, db_teacher.id, days=31)
+        assert last.meeting_url.endswith(f"/{db_teacher.slug}-5")
+
+    async def test_bulk_create_respects_days_of_week(self, db_session: AsyncSession, db_teacher):
+        payload = bulk_payload(db_teacher.id, days=14, days_of_week=[0, 3])
+        slots = await time_slot.bulk_create(db_session, payload)
+        assert len(slots) == 4
+        assert {s.start_time.weekday() for s in slots} == {0, 3}
+
+    async def test_bulk_create_overlap_is_atomic(self, db_session: AsyncSession, db_teacher):
+        teacher_id = db_teacher.id
+        payload = bulk_payload(teacher_id, days=7)
+        day = payload.start_date + timedelta(days=3)
+        await time_slot.create_with_overlap_check(db_session, TimeSlotCreate(
+            teacher_id=teacher_id,
+            start_time=day.replace(hour=10, minute=30),
+            end_time=day.replace(hour=11, minute=30)
+        ))
+
+        with pytest.raises(SlotOverlapException):
+            await time_slot.bulk_create(db_session, payload)
+
+        schedule = await time_slot.get_teacher_schedule(db_session, teacher_id)
+        assert len(schedule) == 1
+
+    async def test_bulk_create_requires_active_teacher(self, db_session: AsyncSession, db_teacher):
+        await teacher.delete(db_session, db_teacher.id)
+        with pytest.raises(TeacherNotFoundException):
+            await time_slot.bulk_create(db_session, bulk_payload(db_teacher.id, days=3))
+        assert await time_slot.get_teacher_schedule(db_session, db_teacher.id) == []
+
+    async def test_meeting_url_requires_slug(self, db_session: AsyncSession):
+        teacher_id = (await teacher.insert_row(
+            db_session, {"name": "No Slug", "email": f"ns_{uuid.uuid4().hex[:8]}@test.com"}
+        )).id
+        await db_session.commit()
+        with pytest.raises(TeacherSlugRequiredException):
+            await time_slot.bulk_create(db_session, bulk_payload(teacher_id, days=3))
+        # Счетчик ссылок откатан вместе с отказом
+        assert (await teacher.get(db_session, teacher_id)).meeting_url_seq == 0
+
+    async def test_bulk_create_limit(self, db_session: AsyncSession, db_teacher, monkeypatch):
+        from app.core.config import get_settings
+        monkeypatch.setattr(get_settings(), "BULK_SLOTS_MAX", 5)
+        with pytest.raises(TooManySlotsException):
+            await time_slot.bulk_create(db_session, bulk_payload(db_teacher.id, days=7))
+
+
+class TestBookingTransaction:
+    pytestmark = pytest.mark.asyncio
+    """Тесты атомарного бронирования"""
+
+    async def test_create_booking_increments_slot(self, db_session: AsyncSession, db_teacher):
+        slot = await make_slot(db_session, db_teacher.id, max_students=2)
+        first = await make_student(db_session)
+        second = await make_student(db_session)
+
+        db_booking = await booking.create_booking(
+            db_session, BookingCreate(time_slot_id=slot.id, student_id=first.id)
+        )
+        assert db_booking.id is not None
+        assert (await time_slot.get(db_session, slot.id)).current_bookings == 1
+
+        await booking.create_booking(
+            db_session, BookingCreate(time_slot_id=slot.id, student_id=second.id)
+        )
+        db_slot = await time_slot.get(db_session, slot.id)
+        assert db_slot.current_bookings == 2
+        assert db_slot.status == SlotStatus.BOOKED
+
+    async def test_create_booking_full_slot(self, db_session: AsyncSession, db_teacher):
+        slot_id = (await make_slot(db_session, db_teacher.id)).id
+        first = await make_student(db_session)
+        second = await make_student(db_session)
+        await booking.create_booking(
+            db_session, BookingCreate(time_slot_id=slot_id, student_id=first.id)
+        )
+        with pytest.raises(SlotAlreadyBookedException):
+            await booking.create_booking(
+                db_session, BookingCreate(time_slot_id=slot_id, student_id=second.id)
+            )
+        assert (await time_slot.get(db_session, slot_id)).current_bookings == 1
+
+    async def test_create_booking_duplicate_rolls_back(self, db_session: AsyncSession, db_teacher):
+        slot_id = (await make_slot(db_session, db_teacher.id, max_students=3)).id
+        student_id = (await make_student(db_session)).id
+        await booking.create_booking(
+            db_session, BookingCreate(time_slot_id=slot_id, student_id=student_id)
+        )
+        with pytest.raises(SlotAlreadyBookedException):
+            await booking.create_booking(
+                db_session, BookingCreate(time_slot_id=slot_id, student_id=student_id)
+            )
+        assert (await time_slot.get(db_session, slot_id)).current_bookings == 1
+
+    async def test_create_booking_missing_slot(self, db_session: AsyncSession):
+        with pytest.raises(SlotNotFoundException):
+            await booking.create_booking(
+                db_session, BookingCreate(time_slot_id=999, student_id=1)
+            )
+
+
+class TestKeysetPagination:
+    pytestmark = pytest.mark.asyncio
+    """Тесты keyset-пагинации get_multi"""
+
+    async def test_cursor_walks_all_rows(self, db_session: AsyncSession, db_teacher):
+        slots = await time_slot.bulk_create(db_session, bulk_payload(db_teacher.id, days=5))
+
+        seen, cursor = [], ""
+        while cursor is not None:
+            page = await time_slot.get_multi(db_session, PaginationParams(size=2, cursor=cursor))
+            assert page.total is None
+            seen.extend(item.id for item in page.items)
+            cursor = page.next_cursor
+
+        assert seen == [s.id for s in slots]
+
+    async def test_offset_mode_unchanged(self, db_session: AsyncSession, db_teacher):
+        await time_slot.bulk_create(db_session, bulk_payload(db_teacher.id, days=5))
+        page = await time_slot.get_multi(db_session, PaginationParams(page=2, size=2))
+        assert page.total == 5
+        assert page.pages == 3
+        assert len(page.items) == 2
+        assert page.next_cursor is None
+
+    async def test_invalid_cursor(self, db_session: AsyncSession):
+        with pytest.raises(InvalidCursorException):
+            await booking.get_multi(db_session, PaginationParams(cursor="not-a-cursor"))
+
+
+class TestBatchBooking:
+    pytestmark = pytest.mark.asyncio
+    """Тесты пакетного бронирования"""
+
+    async def test_books_all_slots(self, db_session: AsyncSession, db_teacher):
+        slot_ids = [s.id for s in await time_slot.bulk_create(db_session, bulk_payload(db_teacher.id, days=4))]
+        student_id = (await make_student(db_session)).id
+
+        result = await booking.create_bookings_batch(db_session, BookingBatchCreate(
+            student_id=student_id, time_slot_ids=slot_ids
+        ))
+        assert (result.booked, result.failed) == (4, 0)
+        assert [item.time_slot_id for item in result.items] == slot_ids
+        assert all(item.booking.student_id == student_id for item in result.items)
+        for slot_id in slot_ids:
+            assert (await time_slot.get(db_session, slot_id)).current_bookings == 1
+
+    async def test_all_or_nothing_rolls_back(self, db_session: AsyncSession, db_teacher):
+        slot_ids = [s.id for s in await time_slot.bulk_create(db_session, bulk_payload(db_teacher.id, days=3))]
+        student_id = (await make_student(db_session)).id
+        await booking.create_booking(db_session, BookingCreate(time_slot_id=slot_ids[1], student_id=student_id))
+
+        result = await booking.create_bookings_batch(db_session, BookingBatchCreate(
+            student_id=student_id, time_slot_ids=slot_ids + [9999]
+        ))
+        assert result.booked == 0
+        assert {item.time_slot_id: item.error for item in result.items if item.error} == {
+            slot_ids[1]: "Student already booked this slot",
+            9999: "Slot not found",
+        }
+        assert [(await time_slot.get(db_session, i)).current_bookings for i in slot_ids] == [0, 1, 0]
+
+    async def test_best_effort_books_the_rest(self, db_session: AsyncSession, db_teacher):
+        slot_ids = [s.id for s in await time_slot.bulk_create(db_session, bulk_payload(db_teacher.id, days=3))]
+        student_id = (await make_student(db_session)).id
+        await time_slot.update(db_session, await time_slot.get(db_session, slot_ids[0]),
+                               TimeSlotUpdate(status=SlotStatus.CANCELLED))
+
+        result = await booking.create_bookings_batch(db_session, BookingBatchCreate(
+            student_id=student_id, time_slot_ids=slot_ids, mode=BatchBookingMode.BEST_EFFORT
+        ))
+        assert (result.booked, result.failed) == (2, 1)
+        assert result.items[0].error == "Slot is not available"
+        assert [item.booked for item in result.items] == [False, True, True]
+
+
+class TestTeacherBookings:
+    pytestmark = pytest.mark.asyncio
+    """Тесты выборки бронирований преподавателя"""
+
+    async def test_window_filter_and_cursor(self, db_session: AsyncSession, db_teacher):
+        slots = await time_slot.bulk_create(db_session, bulk_payload(db_teacher.id, days=6))
+        slot_ids = [s.id for s in slots]
+        window = (slots[1].start_time, slots[4].end_time)
+        student_id = (await make_student(db_session)).id
+        await booking.create_bookings_batch(db_session, BookingBatchCreate(
+            student_id=student_id, time_slot_ids=slot_ids
+        ))
+
+        items, next_cursor = await booking.get_teacher_bookings(db_session, db_teacher.id, *window)
+        assert [b.time_slot_id for b in items] == slot_ids[1:5]
+        assert next_cursor is None
+
+        seen, cursor = [], ""
+        while cursor is not None:
+            page, cursor = await booking.get_teacher_bookings(
+                db_session, db_teacher.id, cursor=cursor, size=4, flat=True
+            )
+            seen.extend(page)
+        assert [row["time_slot_id"] for row in seen] == slot_ids
+        assert seen[0]["student_name"] == "CRUD Student"
+        assert seen[0]["start_time"] == slots[0].start_time
+
+
+class TestBookingTransitions:
+    pytestmark = pytest.mark.asyncio
+    """Переходы статусов условным UPDATE ... RETURNING"""
+
+    async def book(self, db: AsyncSession, slot_id: int, count: int):
+        bookings = []
+        for _ in range(count):
+            student_id = (await make_student(db)).id
+            bookings.append(await booking.create_booking(db, BookingCreate(time_slot_id=slot_id, student_id=student_id)))
+        return bookings
+
+    async def test_guarded_transitions(self, db_session: AsyncSession, db_teacher):
+        slot = await make_slot(db_session, db_teacher.id, max_students=2)
+        first, second = await self.book(db_session, slot.id, 2)
+
+        confirmed = await booking.confirm_booking(db_session, first.id, "Жду")
+        assert confirmed.status == BookingStatus.CONFIRMED and confirmed.teacher_notes == "Жду"
+        with pytest.raises(BookingAlreadyConfirmedException):
+            await booking.confirm_booking(db_session, first.id)
+        with pytest.raises(BookingAlreadyConfirmedException):
+            await booking.complete_booking(db_session, second.id)
+
+        # Отмена освобождает место в той же транзакции
+        await booking.cancel_booking(db_session, second.id)
+        db_slot = await time_slot.get(db_session, slot.id)
+        assert db_slot.current_bookings == 1 and db_slot.status == SlotStatus.AVAILABLE
+        with pytest.raises(BookingAlreadyCancelledException):
+            await booking.cancel_booking(db_session, second.id)
+        with pytest.raises(BookingAlreadyCancelledException):
+            await booking.confirm_booking(db_session, second.id)
+
+        with pytest.raises(BookingNotFoundException):
+            await booking.confirm_booking(db_session, 999999)
+        assert (await time_slot.get(db_session, slot.id)).current_bookings == 1
+
+    async def test_cancel_completed_booking(self, db_session: AsyncSession, db_teacher):
+        # Как и до условных UPDATE, отменить нельзя только уже отмененное бронирование
+        slot = await make_slot(db_session, db_teacher.id)
+        [db_booking] = await self.book(db_session, slot.id, 1)
+        await booking.confirm_booking(db_session, db_booking.id)
+        await booking.complete_booking(db_session, db_booking.id)
+        with pytest.raises(BookingTransitionException):
+            await booking.confirm_booking(db_session, db_booking.id)
+
+        cancelled = await booking.cancel_booking(db_session, db_booking.id, "Урок не состоялся")
+        assert cancelled.status == BookingStatus.CANCELLED and cancelled.completed_at is not None
+        assert cancelled.teacher_notes == "Урок не состоялся"
+        # Место прошедшего урока не возвращается в продажу
+        assert (await time_slot.get(db_session, slot.id)).current_bookings == 1
+        with pytest.raises(BookingAlreadyCancelledException):
+            await booking.cancel_booking(db_session, db_booking.id)
+
+        stats = await booking.get_booking_stats(db_session, db_teacher.id)
+        assert stats == {"pending": 0, "confirmed": 0, "cancelled": 1, "completed": 0}
+        await booking_stats.rebuild(db_session)
+        assert await booking.get_booking_stats(db_session, db_teacher.id) == stats
+
+    async def test_api_transition_errors_are_409(self, api_client: AsyncClient, db_session: AsyncSession, db_teacher):
+        slot = await make_slot(db_session, db_teacher.id, max_students=2)
+        first, second = await self.book(db_session, slot.id, 2)
+        await booking.confirm_booking(db_session, first.id)
+        await booking.complete_booking(db_session, first.id)
+        await booking.cancel_booking(db_session, second.id)
+
+        # Отмененное нельзя отменить повторно или завершить; завершенное отменяется
+        cancel_again = await api_client.post(f"/api/v1/bookings/{second.id}/cancel", json={})
+        assert cancel_again.status_code == 409
+        assert cancel_again.json()["detail"] == "Booking is already cancelled"
+        cancel_completed = await api_client.post(f"/api/v1/bookings/{first.id}/cancel", json={})
+        assert cancel_completed.status_code == 200 and cancel_completed.json()["status"] == "cancelled"
+        assert (await api_client.post(f"/api/v1/bookings/{second.id}/complete", json={})).status_code == 409
+        assert (await api_client.post("/api/v1/bookings/999999/cancel", json={})).status_code == 404
+
+    async def test_bulk_by_ids_reports_each(self, db_session: AsyncSession, db_teacher):
+        slot = await make_slot(db_session, db_teacher.id, max_students=3)
+        bookings = await self.book(db_session, slot.id, 3)
+        await booking.cancel_booking(db_session, bookings[2].id)
+
+        ids = [b.id for b in bookings] + [999999]
+        result = await booking.transition_bookings(
+            db_session, BookingBulkTransition(booking_ids=ids), BookingStatus.CONFIRMED
+        )
+        assert (result.updated, result.failed) == (2, 2)
+        assert [item.booking_id for item in result.items] == ids
+        assert [item.updated for item in result.items] == [True, True, False, False]
+        assert result.items[2].error == "Cannot confirm cancelled booking"
+        assert result.items[3].error == "Booking not found"
+        assert result.items[0].booking.confirmed_at is not None
+
+    async def test_bulk_cancel_releases_seats_in_aggregate(self, db_session: AsyncSession, db_teacher):
+        slots = await time_slot.bulk_create(db_session, bulk_payload(db_teacher.id, days=2, max_students=3))
+        first = await self.book(db_session, slots[0].id, 3)
+        await self.book(db_session, slots[1].id, 2)
+        await booking.confirm_booking(db_session, first[0].id)
+        assert (await time_slot.get(db_session, slots[0].id)).status == SlotStatus.BOOKED
+
+        result = await booking.transition_bookings(
+            db_session, BookingBulkTransition(time_slot_id=slots[0].id, teacher_notes="Урок отменен"),
+            BookingStatus.CANCELLED
+        )
+        assert result.updated == 3
+        db_slot = await time_slot.get(db_session, slots[0].id)
+        assert db_slot.current_bookings == 0 and db_slot.status == SlotStatus.AVAILABLE
+        assert (await time_slot.get(db_session, slots[1].id)).current_bookings == 2
+
+        # День преподавателя — по началу слота
+        day = slots[1].start_time.date()
+        result = await booking.transition_bookings(
+            db_session, BookingBulkTransition(teacher_id=db_teacher.id, day=day), BookingStatus.CONFIRMED
+        )
+        assert result.updated == 2
+
+        stats = await booking.get_booking_stats(db_session, db_teacher.id)
+        assert stats == {"pending": 0, "confirmed": 2, "cancelled": 3, "completed": 0}
+        await booking_stats.rebuild(db_session)
+        assert await booking.get_booking_stats(db_session, db_teacher.id) == stats
+
+
+class TestBulkSelectorValidation:
+    """Ровно один способ выбора бронирований в BookingBulkTransition"""
+
+    def test_bulk_selector_validation(self):
+        with pytest.raises(ValueError):
+            BookingBulkTransition()
+        with pytest.raises(ValueError):
+            BookingBulkTransition(booking_ids=[1], time_slot_id=2)
+        with pytest.raises(ValueError):
+            BookingBulkTransition(teacher_id=1)
+        with pytest.raises(ValueError):
+            BookingBulkTransition(booking_ids=[1, 1])
+
+
+class TestBookingStats:
+    pytestmark = pytest.mark.asyncio
+    """Тесты роллапа статистики бронирований"""
+
+    async def test_rollup_follows_transitions(self, db_session: AsyncSession, db_teacher):
+        slots = await time_slot.bulk_create(db_session, bulk_payload(db_teacher.id, days=4))
+        student_id = (await make_student(db_session)).id
+        result = await booking.create_bookings_batch(db_session, BookingBatchCreate(
+            student_id=student_id, time_slot_ids=[s.id for s in slots]
+        ))
+        booking_ids = [item.booking.id for item in result.items]
+        await booking.confirm_booking(db_session, booking_ids[0])
+        await booking.confirm_booking(db_session, booking_ids[1])
+        await booking.complete_booking(db_session, booking_ids[1])
+        await booking.cancel_booking(db_session, booking_ids[2])
+
+        expected = {"pending": 1, "confirmed": 1, "cancelled": 1, "completed": 1}
+        assert await booking.get_booking_stats(db_session, db_teacher.id) == expected
+        assert await booking.get_booking_stats(db_session) == expected
+
+        await booking_stats.rebuild(db_session)
+        assert await booking.get_booking_stats(db_session, db_teacher.id) == expected
+
+    async def test_window_edges_are_exact(self, db_session: AsyncSession, db_teacher):
+        slot_ids = [s.id for s in await time_slot.bulk_create(db_session, bulk_payload(db_teacher.id, days=6))]
+        student_id = (await make_student(db_session)).id
+        # Бронирования по одному в день, в 12:00, начиная с 2030-01-01
+        base = datetime(2030, 1, 1, 12, 0)
+        for n, slot_id in enumerate(slot_ids):
+            db_booking = await booking.create_booking(
+                db_session, BookingCreate(time_slot_id=slot_id, student_id=student_id)
+            )
+            db_booking.booking_time = base + timedelta(days=n)
+        await db_session.commit()
+        await booking_stats.rebuild(db_session)
+
+        async def pending(start, end):
+            stats = await booking.get_booking_stats(db_session, db_teacher.id, start, end)
+            return stats["pending"]
+
+        assert await pending(None, None) == 6
+        assert await pending(datetime(2030, 1, 2), datetime(2030, 1, 4)) == 2
+        assert await pending(datetime(2030, 1, 2, 12, 0), datetime(2030, 1, 4, 12, 0)) == 3
+        assert await pending(datetime(2030, 1, 2, 12, 1), datetime(2030, 1, 4, 11, 59)) == 1
+        assert await pending(datetime(2030, 1, 3, 6, 0), datetime(2030, 1, 3, 18, 0)) == 1
+        assert await pending(datetime(2030, 1, 3, 13, 0), None) == 3
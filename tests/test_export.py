@@ -0,0 +1,110 @@
+"""Потоковая выгрузка: память не растет с числом строк.
+
+Выгружается EXPORT_TEST_ROWS бронирований (по умолчанию 1M) из отдельной
+базы — PostgreSQL из TEST_POSTGRES_URL, если задан, иначе SQLite-файл.
+Прирост RSS процесса во время выгрузки должен остаться ниже потолка.
+"""
+import os
+import gc
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.crud import booking
+from app.core.export import ExportFormat, export_response
+from app.models.base import BaseModel
+from app.models.booking import Booking, BookingStatus
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.models.time_slot import TimeSlot
+
+pytestmark = pytest.mark.asyncio
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+EXPORT_DATABASE_URL = TEST_POSTGRES_URL or "sqlite+aiosqlite:///./test_export.db"
+EXPORT_TEST_ROWS = int(os.getenv("EXPORT_TEST_ROWS", "1000000"))
+RSS_CEILING_MB = 64
+CHUNK = 20000
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+@pytest.fixture(scope="module")
+async def session_maker():
+    engine = create_async_engine(EXPORT_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.drop_all)
+        await conn.run_sync(BaseModel.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await seed_bookings(session_maker, EXPORT_TEST_ROWS)
+    yield session_maker
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.drop_all)
+    await engine.dispose()
+    if not TEST_POSTGRES_URL and os.path.exists("./test_export.db"):
+        os.remove("./test_export.db")
+
+
+async def seed_bookings(session_maker, rows: int) -> None:
+    async with session_maker() as db:
+        teacher = Teacher(name="Export Teacher", email="export@test.com", slug="export")
+        student = Student(name="Export Student", email="export_student@test.com")
+        db.add_all([teacher, student])
+        await db.flush()
+        start = datetime.utcnow() + timedelta(days=1)
+        slot = TimeSlot(teacher_id=teacher.id, start_time=start, end_time=start + timedelta(hours=1))
+        db.add(slot)
+        await db.flush()
+
+        now = datetime.utcnow()
+        row = {
+            "time_slot_id": slot.id,
+            "student_id": student.id,
+            "status": BookingStatus.PENDING,
+            "student_notes": "export",
+            "booking_time": now,
+            "created_at": now,
+            "updated_at": now,
+            "is_deleted": False,
+        }
+        for offset in range(0, rows, CHUNK):
+            await db.execute(insert(Booking), [row] * min(CHUNK, rows - offset))
+        await db.commit()
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="RSS is read from /proc")
+class TestStreamingExport:
+    pytestmark = pytest.mark.asyncio
+    """Выгрузка большого числа строк с ограничением памяти"""
+
+    @pytest.mark.parametrize("export_format", [ExportFormat.NDJSON, ExportFormat.CSV])
+    async def test_export_memory_is_flat(self, session_maker, export_format):
+        gc.collect()
+        baseline = peak = rss_mb()
+
+        lines = 0
+        first = None
+        async with session_maker() as db:
+            response = export_response(
+                booking.stream_batches(db, {"status": BookingStatus.PENDING}),
+                booking.export_columns, export_format, "bookings"
+            )
+            async for chunk in response.body_iterator:
+                if first is None:
+                    first = chunk.split(b"\n", 1)[0]
+                lines += chunk.count(b"\n")
+                peak = max(peak, rss_mb())
+
+        header = 1 if export_format == ExportFormat.CSV else 0
+        assert lines == EXPORT_TEST_ROWS + header
+        if export_format == ExportFormat.NDJSON:
+            assert json.loads(first)["status"] == "pending"
+        else:
+            assert first.decode().rstrip("\r").split(",") == booking.export_columns
+        assert peak - baseline < RSS_CEILING_MB, f"RSS grew by {peak - baseline:.1f} MB"
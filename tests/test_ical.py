@@ -0,0 +1,133 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.ical import CalendarEvent, escape_text, fold_line, render_calendar
+from app.crud import teacher, student, time_slot, booking
+from app.schemas.teacher import TeacherCreate
+from app.schemas.student import StudentCreate
+from app.schemas.time_slot import TimeSlotCreate, TimeSlotUpdate
+from app.schemas.booking import BookingCreate
+
+
+async def create_teacher(db: AsyncSession):
+    suffix = uuid.uuid4().hex[:8]
+    return await teacher.create(db, TeacherCreate(name="Ical Teacher", email=f"ical_{suffix}@test.com", slug=f"i{suffix}"))
+
+
+async def create_slot(db: AsyncSession, teacher_id: int, days: int = 1):
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(days=days)
+    return await time_slot.create(db, TimeSlotCreate(
+        teacher_id=teacher_id,
+        start_time=start,
+        end_time=start + timedelta(hours=1),
+        max_students=2,
+        description="Английский, группа B1"
+    ))
+
+
+class TestRender:
+    """Формат iCalendar"""
+
+    def test_escape_text(self):
+        assert escape_text("a,b;c\\d\ne") == "a\\,b\\;c\\\\d\\ne"
+
+    def test_fold_line_keeps_utf8_characters(self):
+        line = "SUMMARY:" + "Занятие " * 20
+        folded = fold_line(line)
+        parts = folded.split("\r\n")
+        assert len(parts) > 1
+        assert all(len(part.encode()) <= 75 for part in parts)
+        assert all(part.startswith(" ") for part in parts[1:])
+        assert "".join(part[1:] if i else part for i, part in enumerate(parts)) == line
+
+    def test_render_is_deterministic(self):
+        stamp = datetime(2024, 1, 1)
+        event = CalendarEvent(
+            uid="slot-1@test", start=datetime(2024, 1, 2, 10), end=datetime(2024, 1, 2, 11), summary="Занятие"
+        )
+        body = render_calendar("Расписание", [event], stamp)
+        assert body == render_calendar("Расписание", [event], stamp)
+        text = body.decode()
+        assert text.startswith("BEGIN:VCALENDAR\r\n")
+        assert "DTSTART:20240102T100000Z\r\n" in text
+        assert "DTSTAMP:20240101T000000Z\r\n" in text
+        assert text.endswith("END:VCALENDAR\r\n")
+
+
+class TestFeeds:
+    pytestmark = pytest.mark.asyncio
+    """Ленты .ics с условным GET"""
+
+    async def test_teacher_feed_conditional_get(self, api_client: AsyncClient, db_session: AsyncSession):
+        owner = await create_teacher(db_session)
+        slot = await create_slot(db_session, owner.id)
+        url = f"/api/v1/slots/teacher/{owner.id}/schedule.ics"
+
+        response = await api_client.get(url)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/calendar")
+        assert f"UID:slot-{slot.id}@schedule-service" in response.text
+        assert "SUMMARY:Английский\\, группа B1" in response.text
+        etag = response.headers["etag"]
+        last_modified = response.headers["last-modified"]
+
+        response = await api_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+        response = await api_client.get(url, headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+
+        # Удаление слота меняет версию даже без нового updated_at
+        await create_slot(db_session, owner.id, days=2)
+        response = await api_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.text.count("BEGIN:VEVENT") == 2
+
+        etag = response.headers["etag"]
+        await time_slot.remove(db_session, slot.id)
+        response = await api_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.text.count("BEGIN:VEVENT") == 1
+
+    async def test_teacher_feed_unknown_teacher(self, api_client: AsyncClient):
+        response = await api_client.get("/api/v1/slots/teacher/999999/schedule.ics")
+        assert response.status_code == 404
+
+    async def test_student_feed_tracks_booking_changes(self, api_client: AsyncClient, db_session: AsyncSession):
+        owner = await create_teacher(db_session)
+        learner = await student.create(db_session, StudentCreate(name="Ical Student", email=f"{uuid.uuid4()}@test.com"))
+        slot = await create_slot(db_session, owner.id)
+        created = await booking.create_booking(db_session, BookingCreate(time_slot_id=slot.id, student_id=learner.id))
+        url = f"/api/v1/bookings/student/{learner.id}/bookings.ics"
+
+        response = await api_client.get(url)
+        assert response.status_code == 200
+        assert f"UID:booking-{created.id}@schedule-service" in response.text
+        assert "STATUS:TENTATIVE" in response.text
+        etag = response.headers["etag"]
+
+        assert (await api_client.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+        # Перенос слота тоже меняет ленту студента
+        await time_slot.update(db_session, slot, TimeSlotUpdate(description="Перенесено"))
+        response = await api_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert "DESCRIPTION:Перенесено" in response.text
+
+    async def test_version_is_one_aggregate(self, db_session: AsyncSession):
+        owner = await create_teacher(db_session)
+        last_modified, count = await time_slot.get_schedule_version(db_session, owner.id)
+        assert count == 0
+        assert last_modified is not None
+
+        await create_slot(db_session, owner.id)
+        _, count = await time_slot.get_schedule_version(db_session, owner.id)
+        assert count == 1
+        assert await booking.get_student_bookings_version(db_session, 999999) is None
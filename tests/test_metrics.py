@@ -0,0 +1,120 @@
+import pytest
+import uuid
+
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core import metrics
+from app.core.metrics import Histogram, Metric, Registry, fingerprint, normalize_sql
+from app.crud import teacher
+from app.schemas.teacher import TeacherCreate
+
+
+class TestFingerprint:
+    """Нормализация SQL"""
+
+    def test_literals_and_params(self):
+        assert normalize_sql("SELECT * FROM teachers WHERE id = $1 AND name = 'O''Brien'") == \
+            "SELECT * FROM teachers WHERE id = ? AND name = ?"
+        assert normalize_sql("SELECT a FROM t WHERE id = :id_1 LIMIT 10") == "SELECT a FROM t WHERE id = ? LIMIT ?"
+        assert normalize_sql("SELECT x::text FROM t1") == "SELECT x::text FROM t1"
+
+    def test_lists_collapse(self):
+        assert fingerprint("SELECT * FROM slots WHERE id IN (?, ?, ?)") == \
+            fingerprint("SELECT * FROM slots WHERE id IN ($1,\n $2)")
+        assert normalize_sql("INSERT INTO t (a, b) VALUES (?, ?), (?, ?)") == "INSERT INTO t (a, b) VALUES (?)"
+
+
+class TestRender:
+    """Текстовый формат Prometheus"""
+
+    def test_histogram(self):
+        registry = Registry()
+        histogram = registry.register(Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1)))
+        histogram.observe(0.05, route='/a"b')
+        histogram.observe(0.5, route='/a"b')
+        histogram.observe(5, route='/a"b')
+        text = registry.render()
+        assert "# TYPE latency_seconds histogram" in text
+        assert 'latency_seconds_bucket{route="/a\\"b",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{route="/a\\"b",le="1"} 2' in text
+        assert 'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{route="/a\\"b"} 3' in text
+
+    def test_metric_must_implement_samples_and_clear(self):
+        class Gauge(Metric):
+            type = "gauge"
+
+            def samples(self):
+                return []
+
+        with pytest.raises(TypeError, match="clear"):
+            Gauge("queue_size", "Queue size")
+
+
+@pytest.mark.asyncio
+class TestMetricsEndpoint:
+    """/metrics поверх реальных запросов"""
+
+    async def test_request_and_query_metrics(self, api_client: AsyncClient, db_session: AsyncSession):
+        suffix = uuid.uuid4().hex[:8]
+        owner = await teacher.create(db_session, TeacherCreate(name="M", email=f"m_{suffix}@test.com", slug=f"m{suffix}"))
+
+        route = "/api/v1/teachers/{teacher_id}"
+        before = metrics.http_request_queries.count(method="GET", route=route)
+        assert (await api_client.get(f"/api/v1/teachers/{owner.id}")).status_code == 200
+        assert metrics.http_request_queries.count(method="GET", route=route) == before + 1
+
+        response = await api_client.get("/metrics")
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+        assert f'http_request_duration_seconds_count{{method="GET",route="{route}"}}' in text
+        assert f'http_requests_total{{method="GET",route="{route}",status="200"}}' in text
+        assert 'db_query_duration_seconds_bucket{fingerprint="SELECT teachers.' in text
+        assert 'app_cache_hits{cache="availability"}' in text
+        assert "password_hasher_pending 0" in text
+        # Запросы одного HTTP-запроса посчитаны: наблюдение попало не в корзину le="0"
+        line = next(
+            line for line in text.splitlines()
+            if line.startswith(f'http_request_queries_bucket{{method="GET",route="{route}",le="0"}}')
+        )
+        assert int(line.split()[-1]) < metrics.http_request_queries.count(method="GET", route=route)
+
+    async def test_unmatched_route(self, api_client: AsyncClient):
+        await api_client.get(f"/no-such-page/{uuid.uuid4().hex}")
+        assert 'route="unmatched",status="404"' in (await api_client.get("/metrics")).text
+
+
+@pytest.mark.asyncio
+class TestSqlEventsWithoutMetrics:
+    """События SQL нужны журналу, трассировке и профилировщику и без /metrics"""
+
+    async def run_select(self, monkeypatch, **overrides):
+        for name, value in overrides.items():
+            monkeypatch.setattr(metrics.settings, name, value)
+        monkeypatch.setattr(metrics, "_engines", {})
+        seen = []
+        monkeypatch.setattr(metrics, "query_hooks", [lambda conn, statement, *args: seen.append(statement)])
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        metrics.instrument_engine(engine, "hooks")
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 42"))
+        await engine.dispose()
+        return seen
+
+    async def test_hooks_run_with_metrics_off(self, monkeypatch):
+        before = metrics.db_query_duration.count(fingerprint="SELECT ?")
+        seen = await self.run_select(
+            monkeypatch, METRICS_ENABLED=False, SLOW_QUERY_THRESHOLD_MS=500.0, TRACING_ENABLED=False
+        )
+        assert seen == ["SELECT 42"]
+        # Сами метрики при этом не собираются
+        assert metrics.db_query_duration.count(fingerprint="SELECT ?") == before
+
+    async def test_no_events_without_consumers(self, monkeypatch):
+        seen = await self.run_select(
+            monkeypatch, METRICS_ENABLED=False, SLOW_QUERY_THRESHOLD_MS=0,
+            TRACING_ENABLED=False, PROFILING_ENABLED=False
+        )
+        assert seen == []
@@ -0,0 +1,125 @@
+import pytest
+import sys
+import time
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from app.main import profile_requests
+from app.api.debug import DEBUG_TOKEN_HEADER
+from app.core.profiling import (
+    PROFILE_HEADER, PROFILE_ID_HEADER, Profiler, collapse, sign_profile_token, verify_profile_token
+)
+from app.core import profiling
+
+SECRET = "profile-secret"
+
+
+def burn_cpu(seconds: float) -> int:
+    total = 0
+    deadline = time.process_time() + seconds
+    while time.process_time() < deadline:
+        total += sum(range(100))
+    return total
+
+
+@pytest.fixture
+def sampled(monkeypatch):
+    """Включенный профилировщик и приложение с одним «тяжелым» маршрутом"""
+    enabled = Profiler(enabled=True, sample_rate=0, interval_ms=1, secret=SECRET, buffer_size=10)
+    monkeypatch.setattr(profiling, "profiler", enabled)
+    monkeypatch.setattr(sys.modules["app.main"], "profiler", enabled)
+    monkeypatch.setattr(sys.modules["app.api.debug"], "profiler", enabled)
+
+    hot = FastAPI()
+    hot.middleware("http")(profile_requests)
+
+    @hot.get("/hot/{n}")
+    async def hot_route(n: int):
+        return {"total": burn_cpu(0.1)}
+
+    return enabled, hot
+
+
+class TestProfileToken:
+    """Подпись заголовка X-Debug-Profile"""
+
+    def test_sign_and_verify(self):
+        token = sign_profile_token(SECRET)
+        assert verify_profile_token(SECRET, token)
+        assert not verify_profile_token("other", token)
+        assert not verify_profile_token(SECRET, sign_profile_token(SECRET, ttl=-1))
+        assert not verify_profile_token(SECRET, "garbage")
+
+    def test_collapse(self):
+        def inner():
+            return collapse(sys._getframe())
+        stack = inner()
+        assert stack.endswith("tests.test_profiling.TestProfileToken.test_collapse.<locals>.inner")
+        assert ";" in stack
+
+
+@pytest.mark.asyncio
+class TestSamplingProfiler:
+    """Профилирование запроса по заголовку и выборкой"""
+
+    async def test_signed_header_profiles_request(self, sampled):
+        enabled, hot = sampled
+        async with AsyncClient(app=hot, base_url="http://test") as client:
+            response = await client.get("/hot/1", headers={PROFILE_HEADER: sign_profile_token(SECRET)})
+            assert response.status_code == 200
+            profile = enabled.get(int(response.headers[PROFILE_ID_HEADER]))
+
+            # Без заголовка и без выборки запрос не профилируется
+            plain = await client.get("/hot/2")
+            assert PROFILE_ID_HEADER not in plain.headers
+            # Неверная подпись — тоже
+            forged = await client.get("/hot/3", headers={PROFILE_HEADER: "9999999999.deadbeef"})
+            assert PROFILE_ID_HEADER not in forged.headers
+
+        assert profile.route == "/hot/{n}"
+        assert profile.samples > 10
+        stacks = profile.collapsed(enabled.interval)
+        assert all(stack.startswith("GET /hot/{n}") for stack in stacks)
+        assert any("burn_cpu" in stack for stack in stacks)
+        assert len(enabled.profiles) == 1
+
+    async def test_sample_rate_and_aggregate(self, sampled):
+        enabled, hot = sampled
+        enabled.sample_rate = 2
+        async with AsyncClient(app=hot, base_url="http://test") as client:
+            for n in range(4):
+                await client.get(f"/hot/{n}")
+
+        assert [profile.trigger for profile in enabled.profiles] == ["sample", "sample"]
+        merged = enabled.aggregate("/hot/{n}", window=60)
+        assert sum(merged.values()) == sum(profile.samples for profile in enabled.profiles)
+        assert enabled.aggregate("/other", window=60) == {}
+
+    async def test_debug_endpoints(self, sampled, debug_client: AsyncClient):
+        enabled, hot = sampled
+        async with AsyncClient(app=hot, base_url="http://test") as client:
+            response = await client.get("/hot/1", headers={PROFILE_HEADER: sign_profile_token(SECRET)})
+        profile_id = response.headers[PROFILE_ID_HEADER]
+
+        listing = (await debug_client.get("/debug/profiles", params={"route": "/hot/{n}"})).json()
+        assert listing[0]["id"] == int(profile_id)
+        single = await debug_client.get(f"/debug/profiles/{profile_id}")
+        assert single.headers["content-type"].startswith("text/plain")
+        line = single.text.splitlines()[0]
+        assert line.startswith("GET /hot/{n}") and line.rsplit(" ", 1)[1].isdigit()
+        merged = await debug_client.get("/debug/profile", params={"route": "/hot/{n}", "window": 60})
+        assert "burn_cpu" in merged.text
+        assert (await debug_client.get("/debug/profiles/999999")).status_code == 404
+
+    async def test_debug_endpoints_require_token(self, sampled, debug_client: AsyncClient):
+        enabled, hot = sampled
+        async with AsyncClient(app=hot, base_url="http://test") as client:
+            response = await client.get("/hot/1", headers={PROFILE_HEADER: sign_profile_token(SECRET)})
+        profile_id = response.headers[PROFILE_ID_HEADER]
+
+        # Стеки читаются только с подписанным X-Debug-Token, заголовка профиля мало
+        for url in ("/debug/profiles", f"/debug/profiles/{profile_id}", "/debug/profile"):
+            assert (await debug_client.get(url, headers={DEBUG_TOKEN_HEADER: ""})).status_code == 403
+            forged = {DEBUG_TOKEN_HEADER: sign_profile_token(SECRET), PROFILE_HEADER: sign_profile_token(SECRET)}
+            assert (await debug_client.get(url, headers=forged)).status_code == 403
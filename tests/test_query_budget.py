@@ -0,0 +1,137 @@
+"""Бюджеты SQL-запросов эндпоинтов.
+
+Сценарий проходит по всем маршрутам, объявившим @query_budget, и падает,
+если какой-то запрос превысил бюджет или повторил SQL одной формы
+QUERY_N_PLUS_ONE_THRESHOLD раз (N+1). Новый маршрут с бюджетом нужно
+добавить в сценарий — иначе упадет проверка покрытия.
+"""
+import pytest
+import uuid
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient
+from starlette.requests import Request
+
+from app.main import app
+from app.core.metrics import RequestStats
+from app.core.query_budget import check_request, n_plus_one_detected, query_budget
+
+N_BOOKINGS = 6  # больше порога N+1: ленивые загрузки в циклах будут видны
+
+
+def budgeted_routes():
+    return {
+        (method, route.path): route.endpoint.query_budget
+        for route in app.routes
+        if hasattr(getattr(route, "endpoint", None), "query_budget")
+        for method in route.methods
+    }
+
+
+async def run_scenario(client: AsyncClient) -> None:
+    suffix = uuid.uuid4().hex[:8]
+
+    async def call(method: str, url: str, **kwargs):
+        response = await client.request(method, url, **kwargs)
+        assert response.status_code < 300, f"{method} {url}: {response.text}"
+        return response.json()
+
+    teacher = await call("POST", "/api/v1/teachers/", json={
+        "name": "Budget Teacher", "email": f"budget_{suffix}@test.com", "slug": f"b{suffix}"
+    })
+    await call("PUT", f"/api/v1/teachers/{teacher['id']}", json={"email": f"budget2_{suffix}@test.com"})
+    await call("GET", f"/api/v1/teachers/{teacher['id']}")
+    await call("GET", "/api/v1/teachers/")
+
+    student = await call("POST", "/api/v1/students/", json={
+        "name": "Budget Student", "email": f"budget_s{suffix}@test.com", "slug": f"s{suffix}"
+    })
+    await call("PUT", f"/api/v1/students/{student['id']}", json={"slug": f"t{suffix}"})
+    await call("GET", f"/api/v1/students/{student['id']}")
+    await call("GET", "/api/v1/students/")
+
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+    slots = []
+    for n in range(N_BOOKINGS + 2):
+        slots.append(await call("POST", "/api/v1/slots/", json={
+            "teacher_id": teacher["id"],
+            "start_time": (start + timedelta(hours=n)).isoformat(),
+            "end_time": (start + timedelta(hours=n, minutes=50)).isoformat(),
+        }))
+    await call("PUT", f"/api/v1/slots/{slots[0]['id']}", json={"description": "Обновлено"})
+    await call("GET", f"/api/v1/slots/{slots[0]['id']}")
+    await call("GET", f"/api/v1/slots/?teacher_id={teacher['id']}")
+    await call("GET", f"/api/v1/slots/available?teacher_id={teacher['id']}")
+    await call("GET", f"/api/v1/slots/teacher/{teacher['id']}/schedule")
+
+    bookings = []
+    for slot in slots[:N_BOOKINGS - 1]:
+        bookings.append(await call("POST", "/api/v1/bookings/", json={
+            "time_slot_id": slot["id"], "student_id": student["id"]
+        }))
+    await call("POST", "/api/v1/bookings/batch", json={
+        "student_id": student["id"], "time_slot_ids": [slots[N_BOOKINGS - 1]["id"]]
+    })
+    await call("GET", f"/api/v1/bookings/{bookings[0]['id']}")
+    await call("GET", f"/api/v1/bookings/student/{student['id']}/bookings")
+    await call("GET", f"/api/v1/bookings/teacher/{teacher['id']}/bookings")
+    await call("GET", f"/api/v1/bookings/teacher/{teacher['id']}/bookings?flat=true")
+    await call("POST", f"/api/v1/bookings/{bookings[0]['id']}/confirm", json={})
+    await call("POST", f"/api/v1/bookings/{bookings[0]['id']}/complete", json={})
+    # Лист ожидания: отмена bookings[1] продвигает первую запись в бронирование
+    waiting_student = await call("POST", "/api/v1/students/", json={
+        "name": "Waiting Student", "email": f"budget_w{suffix}@test.com", "slug": f"w{suffix}"
+    })
+    promoted = await call("POST", "/api/v1/waitlist/", json={
+        "time_slot_id": bookings[1]["time_slot_id"], "student_id": waiting_student["id"]
+    })
+    left = await call("POST", "/api/v1/waitlist/", json={
+        "time_slot_id": bookings[0]["time_slot_id"], "student_id": waiting_student["id"]
+    })
+    await call("GET", f"/api/v1/waitlist/{promoted['id']}")
+    await call("POST", f"/api/v1/bookings/{bookings[1]['id']}/cancel", json={"reason": "Заболел"})
+    await call("GET", f"/api/v1/waitlist/student/{waiting_student['id']}")
+    await call("DELETE", f"/api/v1/waitlist/{left['id']}")
+    await call("POST", "/api/v1/bookings/bulk/confirm", json={
+        "booking_ids": [booking["id"] for booking in bookings]
+    })
+    await call("POST", "/api/v1/bookings/bulk/complete", json={"time_slot_id": bookings[2]["time_slot_id"]})
+    await call("POST", "/api/v1/bookings/bulk/cancel", json={
+        "teacher_id": teacher["id"], "day": slots[N_BOOKINGS - 2]["start_time"][:10]
+    })
+
+    await call("DELETE", f"/api/v1/slots/{slots[-1]['id']}")
+
+
+class TestQueryBudgets:
+    """Число SQL-запросов на эндпоинт"""
+
+    @pytest.mark.asyncio
+    async def test_endpoints_within_budget(self, api_client: AsyncClient, query_reports):
+        await run_scenario(api_client)
+
+        for report in query_reports:
+            assert not report.over_budget, f"{report.method} {report.route}: {report.queries} > {report.budget}"
+            assert not report.n_plus_one, f"{report.method} {report.route}: N+1 {report.repeated}"
+
+        covered = {(report.method, report.route) for report in query_reports if report.budget is not None}
+        assert covered == set(budgeted_routes())
+
+    def test_n_plus_one_detection(self, query_reports):
+        @query_budget(2)
+        async def endpoint():
+            pass
+
+        route = type("Route", (), {"endpoint": endpoint})()
+        request = Request({"type": "http", "method": "GET", "headers": [], "path": "/", "route": route})
+        stats = RequestStats()
+        stats.queries = 7
+        stats.fingerprints = {"SELECT students.id FROM students WHERE students.id = ?": 6, "SELECT ?": 1}
+
+        before = n_plus_one_detected.value(method="GET", route="/n-plus-one")
+        check_request(request, "/n-plus-one", stats)
+
+        [report] = query_reports
+        assert report.over_budget
+        assert report.repeated == {"SELECT students.id FROM students WHERE students.id = ?": 6}
+        assert n_plus_one_detected.value(method="GET", route="/n-plus-one") == before + 1
@@ -0,0 +1,168 @@
+"""EXPLAIN-харнесс: горячие CRUD-запросы должны идти по индексам.
+
+Запросы CRUD-методов перехватываются через before_cursor_execute и
+прогоняются через EXPLAIN на засеянных данных. На PostgreSQL
+(TEST_POSTGRES_URL) seq scan отключается, чтобы проверить именно
+применимость индекса, а не выбор планировщика на маленькой таблице.
+"""
+import os
+import json
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.crud import time_slot, booking
+from app.models.base import BaseModel
+from app.models.booking import Booking, BookingStatus
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.models.time_slot import TimeSlot
+
+pytestmark = pytest.mark.asyncio
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+PLANS_DATABASE_URL = TEST_POSTGRES_URL or "sqlite+aiosqlite:///./test_query_plans.db"
+HOT_TABLES = ("time_slots", "bookings")
+
+
+@pytest.fixture
+async def plan_engine():
+    engine = create_async_engine(PLANS_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.drop_all)
+        await conn.run_sync(BaseModel.metadata.create_all)
+    yield engine
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.drop_all)
+    await engine.dispose()
+    if not TEST_POSTGRES_URL and os.path.exists("./test_query_plans.db"):
+        os.remove("./test_query_plans.db")
+
+
+@pytest.fixture
+async def seeded(plan_engine):
+    """Несколько преподавателей со слотами и бронированиями"""
+    session_maker = async_sessionmaker(plan_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as db:
+        teachers = [
+            Teacher(name=f"Teacher {i}", email=f"plan_t{i}_{uuid.uuid4().hex[:6]}@test.com", slug=f"plan-t{i}")
+            for i in range(5)
+        ]
+        students = [
+            Student(name=f"Student {i}", email=f"plan_s{i}_{uuid.uuid4().hex[:6]}@test.com")
+            for i in range(20)
+        ]
+        db.add_all(teachers + students)
+        await db.flush()
+
+        start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+        slots = [
+            TimeSlot(teacher_id=t.id, start_time=start + timedelta(hours=h), end_time=start + timedelta(hours=h, minutes=50))
+            for t in teachers for h in range(100)
+        ]
+        db.add_all(slots)
+        await db.flush()
+
+        db.add_all([
+            Booking(time_slot_id=slot.id, student_id=students[n % len(students)].id,
+                    status=BookingStatus.PENDING, booking_time=datetime.utcnow())
+            for n, slot in enumerate(slots[::3])
+        ])
+        await db.commit()
+        yield db, teachers[0].id, students[0].id, slots[0].id
+
+
+@contextmanager
+def capture_statements(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def full_scans(db: AsyncSession, statement: str, parameters) -> list:
+    """Вернуть описания полных сканирований горячих таблиц в плане запроса"""
+    conn = await db.connection()
+    if conn.dialect.name == "postgresql":
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = result.scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+
+        scans = []
+
+        def walk(node):
+            if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in HOT_TABLES:
+                scans.append(f"Seq Scan on {node['Relation Name']}")
+            for child in node.get("Plans", []):
+                walk(child)
+
+        walk(plan[0]["Plan"])
+        await conn.exec_driver_sql("RESET enable_seqscan")
+        return scans
+
+    result = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+    return [
+        row[-1] for row in result.all()
+        if row[-1].startswith("SCAN") and any(f" {table}" in row[-1] for table in HOT_TABLES)
+        and "USING" not in row[-1]
+    ]
+
+
+async def assert_indexed(db: AsyncSession, statements: list) -> None:
+    assert statements, "no statements captured"
+    for statement, parameters in statements:
+        scans = await full_scans(db, statement, parameters)
+        assert not scans, f"{scans} in:\n{statement}"
+
+
+class TestQueryPlans:
+    pytestmark = pytest.mark.asyncio
+    """Горячие запросы используют индексы"""
+
+    async def test_available_slots(self, plan_engine, seeded):
+        db, teacher_id, _, _ = seeded
+        with capture_statements(plan_engine) as statements:
+            await time_slot.get_available_slots(db, teacher_id=teacher_id)
+            await time_slot.get_available_slots(db, start_date=datetime.utcnow())
+        await assert_indexed(db, statements)
+
+    async def test_slot_overlap(self, plan_engine, seeded):
+        db, teacher_id, _, _ = seeded
+        start = datetime.utcnow() + timedelta(days=2)
+        with capture_statements(plan_engine) as statements:
+            await time_slot.check_slot_overlap(db, teacher_id, start, start + timedelta(hours=1))
+        await assert_indexed(db, statements)
+
+    async def test_teacher_schedule(self, plan_engine, seeded):
+        db, teacher_id, _, _ = seeded
+        with capture_statements(plan_engine) as statements:
+            await time_slot.get_teacher_schedule(db, teacher_id)
+        await assert_indexed(db, statements)
+
+    async def test_teacher_bookings(self, plan_engine, seeded):
+        db, teacher_id, _, _ = seeded
+        start = datetime.utcnow()
+        with capture_statements(plan_engine) as statements:
+            await booking.get_teacher_bookings(db, teacher_id, start, start + timedelta(days=7))
+            await booking.get_teacher_bookings(db, teacher_id, cursor="", size=20, flat=True)
+        await assert_indexed(db, statements)
+
+    async def test_student_bookings(self, plan_engine, seeded):
+        db, _, student_id, slot_id = seeded
+        with capture_statements(plan_engine) as statements:
+            await booking.get_student_bookings(db, student_id)
+            await booking.get_student_slot_booking(db, student_id, slot_id)
+            await booking.has_active_booking(db, student_id, slot_id)
+        await assert_indexed(db, statements)
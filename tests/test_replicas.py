@@ -0,0 +1,137 @@
+"""Маршрутизация чтений на реплики.
+
+Primary и реплика — два отдельных SQLite-файла: в реплике те же id,
+но другое описание слота, поэтому по ответу видно, откуда он прочитан.
+"""
+import os
+import pytest
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.main import app, read_your_writes
+from app.core import database
+from app.core.database import Replica, ReplicaRouter, get_read_session
+from app.core.dependencies import READ_PRIMARY_COOKIE
+from app.models.base import BaseModel
+from app.models.teacher import Teacher
+from app.models.time_slot import TimeSlot
+
+pytestmark = pytest.mark.asyncio
+
+PRIMARY_URL = "sqlite+aiosqlite:///./test_primary.db"
+REPLICA_URLS = ["sqlite+aiosqlite:///./test_replica_a.db", "sqlite+aiosqlite:///./test_replica_b.db"]
+UNREACHABLE_URL = "sqlite+aiosqlite:////nonexistent/dir/replica.db"
+
+
+async def seed(engine, description: str) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.drop_all)
+        await conn.run_sync(BaseModel.metadata.create_all)
+    async with async_sessionmaker(engine, class_=AsyncSession)() as db:
+        db.add(Teacher(id=1, name="Replica Teacher", email="replica@test.com", slug="replica"))
+        start = datetime.utcnow() + timedelta(days=1)
+        db.add(TimeSlot(id=1, teacher_id=1, start_time=start, end_time=start + timedelta(hours=1), description=description))
+        await db.commit()
+
+
+@pytest.fixture
+async def databases(monkeypatch):
+    primary = create_async_engine(PRIMARY_URL)
+    await seed(primary, "primary")
+    replicas = [Replica(url) for url in REPLICA_URLS]
+    for replica in replicas:
+        await seed(replica.engine, "replica")
+    router = ReplicaRouter(replicas, max_lag=5.0)
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(primary, class_=AsyncSession))
+    monkeypatch.setattr(database, "replica_router", router)
+    yield router
+    await router.stop()
+    await primary.dispose()
+    for url in [PRIMARY_URL] + REPLICA_URLS:
+        path = url.split("///", 1)[1]
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def read_description(prefer_primary: bool = False) -> str:
+    sessions = get_read_session(prefer_primary)
+    try:
+        session = await sessions.__anext__()
+        return (await session.get(TimeSlot, 1)).description
+    finally:
+        await sessions.aclose()
+
+
+class TestReplicaRouter:
+    """Выбор реплики"""
+
+    async def test_round_robin(self, databases):
+        chosen = [databases.choose() for _ in range(4)]
+        assert chosen == databases.replicas * 2
+
+    async def test_least_connections(self, databases):
+        databases.strategy = "least_connections"
+        busy, idle = databases.replicas
+        busy.active = 3
+        assert {databases.choose() for _ in range(4)} == {idle}
+
+    async def test_health_check_ejects_and_restores(self, databases):
+        broken = Replica(UNREACHABLE_URL)
+        databases.replicas.append(broken)
+        await databases.check_all()
+        assert not broken.healthy
+        assert broken not in {databases.choose() for _ in range(6)}
+        await broken.engine.dispose()
+
+        # Исключенная после ошибки реплика возвращается успешной проверкой
+        databases.eject(databases.replicas[0], "connection lost")
+        await databases.check(databases.replicas[0])
+        assert databases.replicas[0].healthy
+
+    async def test_stale_replicas_fall_back_to_primary(self, databases):
+        for replica in databases.replicas:
+            replica.lag = 30.0
+        assert databases.choose() is None
+        assert await read_description() == "primary"
+
+
+class TestReadSession:
+    """get_read_session / get_read_db"""
+
+    async def test_reads_go_to_replica(self, databases):
+        assert await read_description() == "replica"
+        assert await read_description(prefer_primary=True) == "primary"
+        assert all(replica.active == 0 for replica in databases.replicas)
+
+    async def test_connection_error_ejects_replica(self, databases):
+        sessions = get_read_session()
+        await sessions.__anext__()
+        replica = databases.replicas[0]
+        assert replica.active == 1
+        with pytest.raises(OperationalError):
+            await sessions.athrow(OperationalError("SELECT 1", {}, Exception("connection lost")))
+        assert not replica.healthy
+        assert replica.active == 0
+        assert databases.choose() is databases.replicas[1]
+
+    async def test_endpoint_honours_read_your_writes_cookie(self, databases):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/api/v1/slots/1")
+            assert response.json()["description"] == "replica"
+            client.cookies.set(READ_PRIMARY_COOKIE, "1")
+            response = await client.get("/api/v1/slots/1")
+            assert response.json()["description"] == "primary"
+
+    async def test_writes_set_marker(self):
+        async def call_next(request):
+            return Response(status_code=200)
+
+        post = Request({"type": "http", "method": "POST", "headers": [], "path": "/"})
+        get = Request({"type": "http", "method": "GET", "headers": [], "path": "/"})
+        assert READ_PRIMARY_COOKIE in (await read_your_writes(post, call_next)).headers.get("set-cookie", "")
+        assert "set-cookie" not in (await read_your_writes(get, call_next)).headers
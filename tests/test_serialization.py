@@ -0,0 +1,96 @@
+import pytest
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.serialization import FastJSONResponse, dumps, fast_response, serializer_for
+from app.crud import teacher, student, time_slot, booking
+from app.schemas.booking import BookingCreate, BookingResponse
+from app.schemas.student import StudentCreate, StudentResponse
+from app.schemas.teacher import TeacherCreate, TeacherResponse
+from app.schemas.time_slot import TimeSlotCreate, TimeSlotResponse
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def rows(db_session: AsyncSession):
+    suffix = uuid.uuid4().hex[:8]
+    db_teacher = await teacher.create(db_session, TeacherCreate(
+        name="Json Teacher", email=f"json_{suffix}@test.com", slug=f"j{suffix}", bio="Учитель \"в кавычках\""
+    ))
+    db_student = await student.create(db_session, StudentCreate(name="Json Student", email=f"json_s{suffix}@test.com"))
+    start = datetime.utcnow() + timedelta(days=1)
+    db_slot = await time_slot.create(db_session, TimeSlotCreate(
+        teacher_id=db_teacher.id, start_time=start, end_time=start + timedelta(hours=1), price=12.5
+    ))
+    db_booking = await booking.create_booking(db_session, BookingCreate(
+        time_slot_id=db_slot.id, student_id=db_student.id, student_notes="Заметка"
+    ))
+    return {
+        TeacherResponse: db_teacher,
+        StudentResponse: db_student,
+        TimeSlotResponse: db_slot,
+        BookingResponse: db_booking,
+    }
+
+
+class TestFastSerialization:
+    """Быстрые сериализаторы совпадают с response_model"""
+
+    @pytest.mark.parametrize("schema", [TeacherResponse, StudentResponse, TimeSlotResponse, BookingResponse])
+    async def test_matches_pydantic(self, rows, schema):
+        obj = rows[schema]
+        expected = json.loads(schema.model_validate(obj).model_dump_json())
+        assert json.loads(dumps(serializer_for(schema).dump(obj))) == expected
+        assert json.loads(dumps(serializer_for(schema).dump([obj]))) == [expected]
+
+    async def test_endpoint_output_unchanged(self, api_client: AsyncClient, rows, monkeypatch):
+        slot = rows[TimeSlotResponse]
+        urls = [
+            f"/api/v1/slots/{slot.id}",
+            f"/api/v1/slots/available?teacher_id={slot.teacher_id}",
+            f"/api/v1/slots/teacher/{slot.teacher_id}/schedule",
+            f"/api/v1/bookings/teacher/{slot.teacher_id}/bookings?flat=true",
+            f"/api/v1/bookings/student/{rows[StudentResponse].id}/bookings",
+            "/api/v1/teachers/active/list",
+        ]
+        slow = [(await api_client.get(url)).json() for url in urls]
+        monkeypatch.setattr(get_settings(), "FAST_JSON_RESPONSES", True)
+        fast = [(await api_client.get(url)).json() for url in urls]
+        assert fast == slow
+
+    async def test_default_is_validated_json_response(self, api_client: AsyncClient, rows):
+        # Без FAST_JSON_RESPONSES=true объекты уходят в response_model как раньше
+        slot = rows[TimeSlotResponse]
+        assert not get_settings().FAST_JSON_RESPONSES
+        assert fast_response(TimeSlotResponse, slot) is slot
+        assert not isinstance(fast_response(TimeSlotResponse, [slot]), JSONResponse)
+
+        response = await api_client.get(f"/api/v1/slots/{slot.id}")
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == json.loads(TimeSlotResponse.model_validate(slot).model_dump_json())
+
+    async def test_opt_in_uses_fast_response(self, rows, monkeypatch):
+        monkeypatch.setattr(get_settings(), "FAST_JSON_RESPONSES", True)
+        response = fast_response(TimeSlotResponse, rows[TimeSlotResponse])
+        assert isinstance(response, FastJSONResponse)
+
+    async def test_cursor_header_kept(self, api_client: AsyncClient, db_session: AsyncSession, rows):
+        slot = rows[TimeSlotResponse]
+        start = slot.end_time + timedelta(hours=1)
+        second = await time_slot.create(db_session, TimeSlotCreate(
+            teacher_id=slot.teacher_id, start_time=start, end_time=start + timedelta(hours=1)
+        ))
+        await booking.create_booking(db_session, BookingCreate(
+            time_slot_id=second.id, student_id=rows[StudentResponse].id
+        ))
+        response = await api_client.get(f"/api/v1/bookings/teacher/{slot.teacher_id}/bookings?cursor=&size=1")
+        assert response.status_code == 200
+        assert [item["id"] for item in response.json()] == [rows[BookingResponse].id]
+        assert response.headers["x-next-cursor"]
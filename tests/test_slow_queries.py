@@ -0,0 +1,102 @@
+import os
+import pytest
+
+from httpx import AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.main import app
+from app.api.debug import DEBUG_TOKEN_HEADER
+from app.core.config import get_settings
+from app.core.metrics import instrument_engine
+from app.core.profiling import sign_profile_token
+from app.core.slow_queries import redact_value, slow_query_log
+from app.models.base import BaseModel
+from app.models.student import Student
+
+SLOW_DATABASE_URL = "sqlite+aiosqlite:///./test_slow.db"
+
+
+@pytest.fixture
+async def slow_engine(monkeypatch):
+    """Отдельная база с закоммиченной схемой: EXPLAIN идет другим соединением"""
+    engine = create_async_engine(SLOW_DATABASE_URL)
+    instrument_engine(engine, "slow")
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+    slow_query_log.clear()
+    # Любой запрос считается медленным
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 1e-6)
+    yield engine
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0)
+    await slow_query_log.drain()
+    slow_query_log.clear()
+    await engine.dispose()
+    os.remove("test_slow.db")
+
+
+async def run(engine, query):
+    async with engine.connect() as conn:
+        await conn.execute(query)
+
+
+class TestRedaction:
+    """Параметры медленных запросов в журнале"""
+
+    def test_redaction(self):
+        assert redact_value(("secret@mail.com", 5, None, b"xx")) == ["<str:15>", 5, None, "<bytes:2>"]
+        assert redact_value({"notes": "личное"}) == {"notes": "<str:6>"}
+
+
+class TestSlowQueryLog:
+    pytestmark = pytest.mark.asyncio
+    """Журнал медленных запросов"""
+
+    async def test_records_and_explains(self, slow_engine):
+        await run(slow_engine, select(Student).where(Student.email == "student@mail.com"))
+        await slow_query_log.drain()
+
+        [entry] = [item for item in slow_query_log.top() if item["fingerprint"].startswith("SELECT students.")]
+        assert entry["count"] == 1
+        assert "WHERE students.email = ?" in entry["fingerprint"]
+        assert entry["last_parameters"] == ["<str:16>"]
+        # SQLite отдает EXPLAIN QUERY PLAN — список шагов плана
+        assert any("students" in step for step in entry["plan"])
+
+    async def test_explain_rate_limit(self, slow_engine, monkeypatch):
+        monkeypatch.setattr(slow_query_log, "explain_per_minute", 1)
+        monkeypatch.setattr(slow_query_log, "_window_count", 0)
+        await run(slow_engine, select(Student.id).where(Student.id == 1))
+        await run(slow_engine, select(Student.name).where(Student.id == 1))
+        await run(slow_engine, select(Student.id).where(Student.id == 2))
+        await slow_query_log.drain()
+
+        plans = [item["plan"] for item in slow_query_log.top() if item["fingerprint"].startswith("SELECT students.")]
+        assert sum(plan is not None for plan in plans) == 1
+        assert slow_query_log.explains_skipped == 1
+        # Повтор уже объясненного отпечатка не тратит лимит
+        assert max(item["count"] for item in slow_query_log.top()) == 2
+
+    async def test_debug_endpoint(self, slow_engine, debug_client: AsyncClient):
+        await run(slow_engine, text("SELECT 1"))
+        response = await debug_client.get("/debug/slow-queries", params={"limit": 5, "order": "count"})
+        assert response.status_code == 200
+        assert response.json()["top"][0]["fingerprint"] == "SELECT ?"
+        recent = (await debug_client.get("/debug/slow-queries/recent")).json()
+        assert recent[0]["fingerprint"] == "SELECT ?"
+
+    async def test_debug_endpoint_requires_token(self, debug_client: AsyncClient, monkeypatch):
+        # В приложении по умолчанию отладочных маршрутов нет
+        assert not any(route.path.startswith("/debug") for route in app.routes)
+
+        url = "/debug/slow-queries"
+        assert (await debug_client.get(url, headers={DEBUG_TOKEN_HEADER: ""})).status_code == 403
+        forged = sign_profile_token("other-secret")
+        assert (await debug_client.get(url, headers={DEBUG_TOKEN_HEADER: forged})).status_code == 403
+        expired = sign_profile_token(get_settings().SECRET_KEY, ttl=-1)
+        assert (await debug_client.get(url, headers={DEBUG_TOKEN_HEADER: expired})).status_code == 403
+
+        monkeypatch.setattr(get_settings(), "DEBUG_ENDPOINTS_SECRET", "debug-secret")
+        assert (await debug_client.get(url)).status_code == 403
+        signed = sign_profile_token("debug-secret")
+        assert (await debug_client.get(url, headers={DEBUG_TOKEN_HEADER: signed})).status_code == 200
@@ -0,0 +1,137 @@
+import json
+import pytest
+import sys
+import uuid
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.main import app, trace_requests
+from app.api.debug import DEBUG_TOKEN_HEADER
+from app.core.dependencies import get_db, get_read_db
+from app.core.profiling import sign_profile_token
+from app.core.tracing import CLIENT, Tracer, TracedAsyncSession, current_span
+from app.crud import teacher
+from app.schemas.teacher import TeacherCreate
+
+pytestmark = pytest.mark.asyncio
+
+
+def names(node):
+    yield node["name"]
+    for child in node["children"]:
+        yield from names(child)
+
+
+@pytest.fixture
+def traces(monkeypatch, tmp_path):
+    enabled = Tracer(enabled=True, sample_rate=1.0, buffer_size=10, export_path=str(tmp_path / "spans.jsonl"))
+    monkeypatch.setattr(sys.modules["app.main"], "tracer", enabled)
+    monkeypatch.setattr(sys.modules["app.api.debug"], "tracer", enabled)
+    yield enabled
+    enabled.close()
+
+
+@pytest.fixture
+async def traced_client(db_session: AsyncSession, traces):
+    """Клиент приложения, обернутого middleware трассировки"""
+    async def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    async with AsyncClient(app=BaseHTTPMiddleware(app, dispatch=trace_requests), base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+class TestTracing:
+    """Спаны запроса, CRUD-методов и SQL"""
+
+    async def test_request_span_tree(self, traced_client: AsyncClient, traces: Tracer):
+        suffix = uuid.uuid4().hex[:8]
+        response = await traced_client.post("/api/v1/teachers/", json={
+            "name": "Traced", "email": f"trace_{suffix}@test.com", "slug": f"t{suffix}"
+        })
+        assert response.status_code == 200
+
+        [trace] = traces.traces
+        tree = trace.tree()
+        assert tree["name"] == "POST /api/v1/teachers/"
+        assert tree["attributes"]["http.response.status_code"] == 200
+        crud_spans = [child["name"] for child in tree["children"]]
+        # Имя по классу экземпляра, хотя методы определены в CRUDBase
+        assert crud_spans == ["CRUDTeacher.get_taken", "CRUDTeacher.create"]
+        create = tree["children"][1]
+        assert "INSERT" in list(names(create))
+        sql = next(child for child in tree["children"][0]["children"] if child["name"] == "SELECT")
+        assert sql["attributes"]["db.statement"].startswith("SELECT teachers.email")
+        assert response.headers["traceparent"].split("-")[1] == trace.trace_id
+
+    async def test_traceparent_and_export(self, traced_client: AsyncClient, traces: Tracer):
+        trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+        await traced_client.get("/api/v1/teachers/999999", headers={"traceparent": f"00-{trace_id}-{parent_id}-01"})
+
+        [trace] = traces.traces
+        assert trace.trace_id == trace_id
+        assert trace.root.parent_id == parent_id
+        with open(traces.export_path) as exported:
+            spans = [json.loads(line) for line in exported]
+        assert {span["traceId"] for span in spans} == {trace_id}
+        root = next(span for span in spans if span["spanId"] == trace.root.span_id)
+        assert root["kind"] == "SPAN_KIND_SERVER"
+        assert {"key": "http.response.status_code", "value": {"intValue": "404"}} in root["attributes"]
+        assert all(span.get("parentSpanId") for span in spans)
+
+    async def test_session_spans_and_limit(self, db_session: AsyncSession):
+        async def run_job(tracer: Tracer):
+            root = tracer.start_trace("job")
+            token = current_span.set(root)
+            try:
+                async with TracedAsyncSession(
+                    bind=await db_session.connection(), join_transaction_mode="create_savepoint"
+                ) as session:
+                    suffix = uuid.uuid4().hex[:8]
+                    await teacher.create(session, TeacherCreate(name="S", email=f"s_{suffix}@test.com", slug=f"s{suffix}"))
+            finally:
+                current_span.reset(token)
+            tracer.finish_trace(root)
+            return tracer.traces[0]
+
+        trace = await run_job(Tracer(enabled=True, sample_rate=1.0, buffer_size=10))
+        assert [span.name for span in trace.spans if span.kind != CLIENT] == \
+            ["job", "CRUDTeacher.create", "CRUDTeacher.insert_row", "session.commit"]
+        assert "INSERT" in [span.name for span in trace.spans if span.kind == CLIENT]
+        assert trace.dropped == 0
+
+        limited = await run_job(Tracer(enabled=True, sample_rate=1.0, buffer_size=10, max_spans=3))
+        assert len(limited.spans) == 3 and limited.dropped > 0
+
+    async def test_no_spans_without_trace(self, db_session: AsyncSession):
+        assert current_span.get() is None
+        assert await teacher.get(db_session, 999999) is None
+
+    async def test_debug_endpoint(self, traced_client: AsyncClient, debug_client: AsyncClient, traces: Tracer):
+        await traced_client.get("/api/v1/teachers/")
+        response = await debug_client.get("/debug/traces", params={"limit": 5})
+        slowest = response.json()
+        assert slowest[0]["root"]["name"] == "GET /api/v1/teachers/"
+        assert "CRUDTeacher.get_multi" in list(names(slowest[0]["root"]))
+
+        trace_id = slowest[0]["trace_id"]
+        detail = (await debug_client.get(f"/debug/traces/{trace_id}")).json()
+        assert detail["spans"][0]["traceId"] == trace_id
+        assert (await debug_client.get("/debug/traces/unknown")).status_code == 404
+
+    async def test_debug_endpoint_requires_token(
+        self, traced_client: AsyncClient, debug_client: AsyncClient, traces: Tracer
+    ):
+        await traced_client.get("/api/v1/teachers/")
+        [trace] = traces.slowest(1)
+        # Деревья спанов с db.statement отдаются только с подписанным X-Debug-Token
+        for url in ("/debug/traces", f"/debug/traces/{trace.trace_id}"):
+            assert (await debug_client.get(url, headers={DEBUG_TOKEN_HEADER: ""})).status_code == 403
+            forged = sign_profile_token("other-secret")
+            assert (await debug_client.get(url, headers={DEBUG_TOKEN_HEADER: forged})).status_code == 403
+            assert (await debug_client.get(url)).status_code == 200
@@ -0,0 +1,206 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import teacher, student, time_slot, booking, booking_stats, waitlist
+from app.models.time_slot import SlotStatus
+from app.models.booking import BookingStatus
+from app.models.waitlist import WaitlistStatus
+from app.schemas.teacher import TeacherCreate
+from app.schemas.student import StudentCreate
+from app.schemas.time_slot import TimeSlotCreate
+from app.schemas.booking import BookingCreate, BookingBulkTransition
+from app.schemas.waitlist import WaitlistJoin
+from app.core.exceptions import (
+    SlotNotFoundException, SlotAlreadyBookedException, WaitlistConflictException,
+    WaitlistEntryNotFoundException
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def db_teacher(db_session: AsyncSession):
+    suffix = uuid.uuid4().hex[:8]
+    return await teacher.create(db_session, TeacherCreate(
+        name="Waitlist Teacher", email=f"wait_{suffix}@test.com", slug=f"w{suffix}"
+    ))
+
+
+async def make_student(db: AsyncSession):
+    return await student.create(db, StudentCreate(
+        name="Waitlist Student", email=f"wait_{uuid.uuid4().hex[:8]}@test.com"
+    ))
+
+
+async def full_slot(db: AsyncSession, teacher_id: int, max_students: int = 1, booked: int = None):
+    """Слот с booked (по умолчанию всеми) занятыми местами; вернуть (слот, бронирования)"""
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1, hours=uuid.uuid4().int % 1000)
+    slot = await time_slot.create_with_overlap_check(db, TimeSlotCreate(
+        teacher_id=teacher_id, start_time=start, end_time=start + timedelta(minutes=50),
+        max_students=max_students
+    ))
+    bookings = []
+    for _ in range(max_students if booked is None else booked):
+        student_id = (await make_student(db)).id
+        bookings.append(await booking.create_booking(db, BookingCreate(time_slot_id=slot.id, student_id=student_id)))
+    return slot, bookings
+
+
+async def join(db: AsyncSession, slot_id: int, priority: int = 0):
+    student_id = (await make_student(db)).id
+    return await waitlist.join(db, WaitlistJoin(time_slot_id=slot_id, student_id=student_id, priority=priority))
+
+
+class TestWaitlist:
+    """Лист ожидания и продвижение при отмене"""
+
+    async def test_join_validation(self, db_session: AsyncSession, db_teacher):
+        slot, [db_booking] = await full_slot(db_session, db_teacher.id, max_students=2, booked=1)
+        # Пока есть свободное место, в очередь не записывают
+        with pytest.raises(WaitlistConflictException, match="free seats"):
+            await join(db_session, slot.id)
+        await booking.create_booking(db_session, BookingCreate(
+            time_slot_id=slot.id, student_id=(await make_student(db_session)).id
+        ))
+
+        with pytest.raises(WaitlistConflictException, match="already booked"):
+            await waitlist.join(db_session, WaitlistJoin(time_slot_id=slot.id, student_id=db_booking.student_id))
+        entry, position = await join(db_session, slot.id)
+        assert entry.status == WaitlistStatus.WAITING and position == 1
+        with pytest.raises(WaitlistConflictException, match="already in the waitlist"):
+            await waitlist.join(db_session, WaitlistJoin(time_slot_id=slot.id, student_id=entry.student_id))
+        with pytest.raises(SlotNotFoundException):
+            await join(db_session, 999999)
+
+    async def test_positions_priority_then_fifo(self, db_session: AsyncSession, db_teacher):
+        slot, _ = await full_slot(db_session, db_teacher.id)
+        first, _ = await join(db_session, slot.id)
+        second, _ = await join(db_session, slot.id)
+        urgent, position = await join(db_session, slot.id, priority=5)
+        assert position == 1
+
+        positions = {entry.id: (await waitlist.get_with_position(db_session, entry.id))[1]
+                     for entry in (first, second, urgent)}
+        assert positions == {urgent.id: 1, first.id: 2, second.id: 3}
+
+        await waitlist.leave(db_session, urgent.id)
+        assert (await waitlist.get_with_position(db_session, second.id))[1] == 2
+        assert await waitlist.get_with_position(db_session, urgent.id) == (urgent, None)
+        with pytest.raises(WaitlistConflictException):
+            await waitlist.leave(db_session, urgent.id)
+        with pytest.raises(WaitlistEntryNotFoundException):
+            await waitlist.leave(db_session, 999999)
+
+    async def test_cancel_promotes_head(self, db_session: AsyncSession, db_teacher):
+        slot, [db_booking] = await full_slot(db_session, db_teacher.id)
+        head, _ = await join(db_session, slot.id)
+        second, _ = await join(db_session, slot.id)
+
+        await booking.cancel_booking(db_session, db_booking.id)
+
+        # Место перешло к голове очереди: слот по-прежнему заполнен
+        db_slot = await time_slot.get(db_session, slot.id)
+        assert db_slot.current_bookings == 1 and db_slot.status == SlotStatus.BOOKED
+        promoted, position = await waitlist.get_with_position(db_session, head.id)
+        assert promoted.status == WaitlistStatus.PROMOTED and position is None
+        assert promoted.promoted_at is not None
+        db_promoted = await booking.get(db_session, promoted.booking_id)
+        assert db_promoted.student_id == head.student_id and db_promoted.status == BookingStatus.PENDING
+        assert (await waitlist.get_with_position(db_session, second.id))[1] == 1
+
+        stats = await booking.get_booking_stats(db_session, db_teacher.id)
+        assert stats == {"pending": 1, "confirmed": 0, "cancelled": 1, "completed": 0}
+        await booking_stats.rebuild(db_session)
+        assert await booking.get_booking_stats(db_session, db_teacher.id) == stats
+
+        # Очередь исчерпана — следующая отмена освобождает место
+        await booking.cancel_booking(db_session, db_promoted.id)
+        await booking.cancel_booking(db_session, (await waitlist.get(db_session, second.id)).booking_id)
+        db_slot = await time_slot.get(db_session, slot.id)
+        assert db_slot.current_bookings == 0 and db_slot.status == SlotStatus.AVAILABLE
+
+    async def test_cancel_completed_keeps_queue(self, db_session: AsyncSession, db_teacher):
+        slot, [done, active] = await full_slot(db_session, db_teacher.id, max_students=2)
+        await booking.confirm_booking(db_session, done.id)
+        await booking.complete_booking(db_session, done.id)
+        entry, _ = await join(db_session, slot.id)
+
+        # Место прошедшего урока не освобождается и очереди не передается
+        await booking.cancel_booking(db_session, done.id)
+        db_slot = await time_slot.get(db_session, slot.id)
+        assert db_slot.current_bookings == 2 and db_slot.status == SlotStatus.BOOKED
+        assert await waitlist.get_with_position(db_session, entry.id) == (entry, 1)
+
+        await booking.cancel_booking(db_session, active.id)
+        assert (await waitlist.get(db_session, entry.id)).status == WaitlistStatus.PROMOTED
+
+    async def test_unbook_slot_promotes(self, db_session: AsyncSession, db_teacher):
+        slot, _ = await full_slot(db_session, db_teacher.id)
+        head, _ = await join(db_session, slot.id)
+
+        db_slot = await time_slot.unbook_slot(db_session, slot.id)
+        assert db_slot.current_bookings == 1
+        [entry] = await waitlist.get_student_entries(db_session, head.student_id)
+        assert entry[0].status == WaitlistStatus.PROMOTED and entry[0].booking_id is not None
+
+        # Пустая очередь — место освобождается как раньше
+        assert (await time_slot.unbook_slot(db_session, slot.id)).current_bookings == 0
+
+    async def test_bulk_slot_cancel_promotes(self, db_session: AsyncSession, db_teacher):
+        slot, _ = await full_slot(db_session, db_teacher.id, max_students=2)
+        entry, _ = await join(db_session, slot.id)
+
+        result = await booking.transition_bookings(
+            db_session, BookingBulkTransition(time_slot_id=slot.id), BookingStatus.CANCELLED
+        )
+        assert result.updated == 2
+        # Одно место у головы очереди, второе освобождено
+        db_slot = await time_slot.get(db_session, slot.id)
+        assert db_slot.current_bookings == 1 and db_slot.status == SlotStatus.AVAILABLE
+        promoted, position = await waitlist.get_with_position(db_session, entry.id)
+        assert promoted.status == WaitlistStatus.PROMOTED and position is None
+        assert (await booking.get(db_session, promoted.booking_id)).status == BookingStatus.PENDING
+
+    async def test_bulk_day_cancel_promotes(self, db_session: AsyncSession, db_teacher):
+        slot, _ = await full_slot(db_session, db_teacher.id)
+        head, _ = await join(db_session, slot.id)
+        second, _ = await join(db_session, slot.id)
+
+        result = await booking.transition_bookings(
+            db_session, BookingBulkTransition(teacher_id=db_teacher.id, day=slot.start_time.date()),
+            BookingStatus.CANCELLED
+        )
+        assert result.updated == 1
+        db_slot = await time_slot.get(db_session, slot.id)
+        assert db_slot.current_bookings == 1 and db_slot.status == SlotStatus.BOOKED
+        assert (await waitlist.get(db_session, head.id)).status == WaitlistStatus.PROMOTED
+        assert (await waitlist.get_with_position(db_session, second.id))[1] == 1
+        # Место не вернулось в продажу: обойти очередь нельзя
+        with pytest.raises(SlotAlreadyBookedException):
+            await booking.create_booking(db_session, BookingCreate(
+                time_slot_id=slot.id, student_id=(await make_student(db_session)).id
+            ))
+
+    async def test_api(self, api_client: AsyncClient, db_session: AsyncSession, db_teacher):
+        slot, [db_booking] = await full_slot(db_session, db_teacher.id)
+        student_id = (await make_student(db_session)).id
+
+        response = await api_client.post("/api/v1/waitlist/", json={"time_slot_id": slot.id, "student_id": student_id})
+        assert response.status_code == 200
+        entry = response.json()
+        assert (entry["status"], entry["position"]) == ("waiting", 1)
+        duplicate = await api_client.post("/api/v1/waitlist/", json={"time_slot_id": slot.id, "student_id": student_id})
+        assert duplicate.status_code == 409
+
+        await api_client.post(f"/api/v1/bookings/{db_booking.id}/cancel", json={})
+        promoted = (await api_client.get(f"/api/v1/waitlist/{entry['id']}")).json()
+        assert promoted["status"] == "promoted" and promoted["position"] is None
+        listing = (await api_client.get(f"/api/v1/waitlist/student/{student_id}")).json()
+        assert [item["booking_id"] for item in listing] == [promoted["booking_id"]]
+
+        assert (await api_client.delete(f"/api/v1/waitlist/{entry['id']}")).status_code == 409
+        assert (await api_client.get("/api/v1/waitlist/999999")).status_code == 404